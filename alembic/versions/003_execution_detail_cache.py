@@ -0,0 +1,39 @@
+"""Add n8n_execution_details cache table.
+
+Revision ID: 003_execution_detail_cache
+Revises: 002_remove_user_access_column
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "003_execution_detail_cache"
+down_revision: Union[str, None] = "002_remove_user_access_column"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "n8n_execution_details",
+        sa.Column("execution_id", sa.Text(), primary_key=True),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("fetched_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("last_accessed_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["execution_id"], ["n8n_executions.id"], ondelete="CASCADE"),
+    )
+    op.create_index(
+        "ix_n8n_execution_details_last_accessed_at",
+        "n8n_execution_details",
+        ["last_accessed_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_n8n_execution_details_last_accessed_at", table_name="n8n_execution_details")
+    op.drop_table("n8n_execution_details")
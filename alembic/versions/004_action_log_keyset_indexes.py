@@ -0,0 +1,41 @@
+"""Add keyset pagination and trigram search indexes on action_logs.
+
+Revision ID: 004_action_log_keyset_indexes
+Revises: 003_execution_detail_cache
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "004_action_log_keyset_indexes"
+down_revision: Union[str, None] = "003_execution_detail_cache"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY so building the indexes does not block audit writes on a large table
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_action_logs_timestamp_id "
+            "ON action_logs (timestamp DESC, id DESC)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_action_logs_user_id_timestamp_id "
+            "ON action_logs (user_id, timestamp DESC, id DESC)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_action_logs_action_trgm "
+            "ON action_logs USING gin (action gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_action_logs_action_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_action_logs_user_id_timestamp_id")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_action_logs_timestamp_id")
@@ -0,0 +1,46 @@
+"""Add n8n_workflow_summaries and a (workflow_id, started_at) execution index.
+
+Revision ID: 005_workflow_summaries
+Revises: 004_action_log_keyset_indexes
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "005_workflow_summaries"
+down_revision: Union[str, None] = "004_action_log_keyset_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "n8n_workflow_summaries",
+        sa.Column("workflow_id", sa.Text(), primary_key=True),
+        sa.Column("last_execution_id", sa.Text(), nullable=True),
+        sa.Column("last_status", sa.Text(), nullable=True),
+        sa.Column("last_started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("execution_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("running_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("success_24h", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error_24h", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["workflow_id"], ["n8n_workflows.id"], ondelete="CASCADE"),
+    )
+    op.create_index("ix_n8n_workflow_summaries_refreshed_at", "n8n_workflow_summaries", ["refreshed_at"])
+    op.create_index(
+        "ix_n8n_executions_workflow_id_started_at",
+        "n8n_executions",
+        ["workflow_id", sa.text("started_at DESC")],
+    )
+    # Summaries are filled in by the next sync cycle (workflows without a summary row are refreshed).
+
+
+def downgrade() -> None:
+    op.drop_index("ix_n8n_executions_workflow_id_started_at", table_name="n8n_executions")
+    op.drop_index("ix_n8n_workflow_summaries_refreshed_at", table_name="n8n_workflow_summaries")
+    op.drop_table("n8n_workflow_summaries")
@@ -0,0 +1,87 @@
+"""Add instance_id / n8n_id columns to n8n_workflows and n8n_executions.
+
+Rows were keyed only by "<prefix>:<n8n id>" strings. This adds the owning
+instance (n8n_instances.id, or a stable uuid5 for env-configured instances,
+which have no row to reference) and the native n8n id, with a composite
+unique key per table. Foreign keys on the string ids become ON UPDATE
+CASCADE so a renamed instance identifier re-keys rows in place instead of
+orphaning them.
+
+Revision ID: 006_instance_id_columns
+Revises: 005_workflow_summaries
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "006_instance_id_columns"
+down_revision: Union[str, None] = "005_workflow_summaries"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, referenced table) for FKs that point at the string ids
+_STRING_ID_FKS = [
+    ("n8n_executions", "workflow_id", "n8n_workflows"),
+    ("user_workflow_access", "workflow_id", "n8n_workflows"),
+    ("n8n_workflow_summaries", "workflow_id", "n8n_workflows"),
+    ("n8n_execution_details", "execution_id", "n8n_executions"),
+]
+
+# Same prefix derivation as the instance registry: identifier (":" -> "-") or inst_<uuid>
+_BACKFILL_SQL = """
+    UPDATE {table} t
+    SET n8n_id = CASE WHEN strpos(t.id, ':') > 0 THEN substr(t.id, strpos(t.id, ':') + 1) ELSE t.id END,
+        instance_id = COALESCE(
+            (
+                SELECT i.id FROM n8n_instances i
+                WHERE CASE WHEN COALESCE(i.identifier, '') <> ''
+                           THEN replace(trim(i.identifier), ':', '-')
+                           ELSE 'inst_' || i.id::text END
+                      = split_part(t.id, ':', 1)
+                ORDER BY i.active DESC, i.created_at
+                LIMIT 1
+            ),
+            uuid_generate_v5(uuid_ns_url(), 'n8n-env:' || split_part(t.id, ':', 1))
+        )
+"""
+
+
+def _recreate_fks(on_update: str) -> None:
+    for table, column, ref in _STRING_ID_FKS:
+        name = f"{table}_{column}_fkey"
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}")
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({column}) "
+            f"REFERENCES {ref} (id) ON DELETE CASCADE ON UPDATE {on_update}"
+        )
+
+
+def upgrade() -> None:
+    for table in ("n8n_workflows", "n8n_executions"):
+        op.add_column(table, sa.Column("instance_id", postgresql.UUID(as_uuid=True), nullable=True))
+        op.add_column(table, sa.Column("n8n_id", sa.Text(), nullable=True))
+        op.execute(_BACKFILL_SQL.format(table=table))
+        op.alter_column(table, "instance_id", nullable=False)
+        op.alter_column(table, "n8n_id", nullable=False)
+        op.create_unique_constraint(f"uq_{table}_instance_id_n8n_id", table, ["instance_id", "n8n_id"])
+
+    op.create_index(
+        "ix_n8n_executions_instance_id_started_at",
+        "n8n_executions",
+        ["instance_id", sa.text("started_at DESC")],
+    )
+    _recreate_fks("CASCADE")
+
+
+def downgrade() -> None:
+    _recreate_fks("NO ACTION")
+    op.drop_index("ix_n8n_executions_instance_id_started_at", table_name="n8n_executions")
+    for table in ("n8n_executions", "n8n_workflows"):
+        op.drop_constraint(f"uq_{table}_instance_id_n8n_id", table, type_="unique")
+        op.drop_column(table, "n8n_id")
+        op.drop_column(table, "instance_id")
@@ -0,0 +1,42 @@
+"""Add n8n_backfill_jobs (resumable execution history import per instance).
+
+Revision ID: 007_backfill_jobs
+Revises: 006_instance_id_columns
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "007_backfill_jobs"
+down_revision: Union[str, None] = "006_instance_id_columns"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "n8n_backfill_jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, server_default=sa.text("uuid_generate_v4()")),
+        sa.Column("instance_id", postgresql.UUID(as_uuid=True), nullable=False, unique=True),
+        sa.Column("status", sa.Text(), nullable=False, server_default="pending"),
+        sa.Column("cursor", sa.Text(), nullable=True),
+        sa.Column("pages_fetched", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("executions_loaded", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["instance_id"], ["n8n_instances.id"], ondelete="CASCADE"),
+        sa.CheckConstraint("status IN ('pending', 'running', 'completed', 'failed')", name="check_backfill_status"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("n8n_backfill_jobs")
@@ -0,0 +1,39 @@
+"""Add n8n_change_journal (versioned change feed for GET /changes).
+
+Revision ID: 008_change_journal
+Revises: 007_backfill_jobs
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "008_change_journal"
+down_revision: Union[str, None] = "007_backfill_jobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "n8n_change_journal",
+        sa.Column("version", sa.BigInteger(), primary_key=True, autoincrement=True),  # BIGSERIAL
+        sa.Column("entity", sa.Text(), nullable=False),
+        sa.Column("entity_id", sa.Text(), nullable=False),
+        sa.Column("workflow_id", sa.Text(), nullable=False),
+        sa.Column("op", sa.Text(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.CheckConstraint("entity IN ('workflow', 'execution')", name="check_change_entity"),
+        sa.CheckConstraint("op IN ('upsert', 'delete')", name="check_change_op"),
+    )
+    op.create_index("ix_n8n_change_journal_changed_at", "n8n_change_journal", ["changed_at"])
+    op.create_index("ix_n8n_change_journal_workflow_id_version", "n8n_change_journal", ["workflow_id", "version"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_n8n_change_journal_workflow_id_version", table_name="n8n_change_journal")
+    op.drop_index("ix_n8n_change_journal_changed_at", table_name="n8n_change_journal")
+    op.drop_table("n8n_change_journal")
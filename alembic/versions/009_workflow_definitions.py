@@ -0,0 +1,50 @@
+"""Content-addressed workflow definitions: n8n_workflow_blobs, n8n_workflow_versions,
+and definition_hash / n8n_updated_at on n8n_workflows.
+
+Revision ID: 009_workflow_definitions
+Revises: 008_change_journal
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "009_workflow_definitions"
+down_revision: Union[str, None] = "008_change_journal"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("n8n_workflows", sa.Column("n8n_updated_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("n8n_workflows", sa.Column("definition_hash", sa.Text(), nullable=True))
+    op.create_table(
+        "n8n_workflow_blobs",
+        sa.Column("hash", sa.Text(), primary_key=True),
+        sa.Column("definition", sa.LargeBinary(), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "n8n_workflow_versions",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("workflow_id", sa.Text(), nullable=False),
+        sa.Column("definition_hash", sa.Text(), nullable=False),
+        sa.Column("n8n_updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("recorded_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(["workflow_id"], ["n8n_workflows.id"], ondelete="CASCADE", onupdate="CASCADE"),
+        sa.ForeignKeyConstraint(["definition_hash"], ["n8n_workflow_blobs.hash"]),
+    )
+    op.create_index("ix_n8n_workflow_versions_workflow_id_id", "n8n_workflow_versions", ["workflow_id", "id"])
+    # Definitions are captured by the next sync cycle (rows with no hash count as changed).
+
+
+def downgrade() -> None:
+    op.drop_index("ix_n8n_workflow_versions_workflow_id_id", table_name="n8n_workflow_versions")
+    op.drop_table("n8n_workflow_versions")
+    op.drop_table("n8n_workflow_blobs")
+    op.drop_column("n8n_workflows", "definition_hash")
+    op.drop_column("n8n_workflows", "n8n_updated_at")
@@ -0,0 +1,57 @@
+"""Cold storage for old executions: n8n_execution_archive_segments (index of the
+segment files) and n8n_workflow_summaries.archived_count.
+
+Revision ID: 010_execution_archive
+Revises: 009_workflow_definitions
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "010_execution_archive"
+down_revision: Union[str, None] = "009_workflow_definitions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "n8n_workflow_summaries",
+        sa.Column("archived_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_table(
+        "n8n_execution_archive_segments",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("instance_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("month", sa.Text(), nullable=False),
+        sa.Column("path", sa.Text(), nullable=False),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("min_started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("max_started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("workflow_ids", postgresql.ARRAY(sa.Text()), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index(
+        "ix_n8n_execution_archive_segments_instance_id_month",
+        "n8n_execution_archive_segments",
+        ["instance_id", "month"],
+    )
+    op.create_index(
+        "ix_n8n_execution_archive_segments_max_started_at",
+        "n8n_execution_archive_segments",
+        ["max_started_at"],
+    )
+
+
+def downgrade() -> None:
+    # Archived executions are not moved back; the segment files stay on disk.
+    op.drop_index("ix_n8n_execution_archive_segments_max_started_at", table_name="n8n_execution_archive_segments")
+    op.drop_index("ix_n8n_execution_archive_segments_instance_id_month", table_name="n8n_execution_archive_segments")
+    op.drop_table("n8n_execution_archive_segments")
+    op.drop_column("n8n_workflow_summaries", "archived_count")
@@ -0,0 +1,31 @@
+"""Add a trigram index on n8n_workflows.name for /workflows/search.
+
+Revision ID: 011_workflow_name_trgm
+Revises: 010_execution_archive
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "011_workflow_name_trgm"
+down_revision: Union[str, None] = "010_execution_archive"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY so the sync upserts are not blocked while the index builds
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_n8n_workflows_name_trgm "
+            "ON n8n_workflows USING gin (name gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_n8n_workflows_name_trgm")
@@ -0,0 +1,40 @@
+"""Per-instance sync checkpoints: n8n_sync_checkpoints.
+
+Revision ID: 012_sync_checkpoints
+Revises: 011_workflow_name_trgm
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "012_sync_checkpoints"
+down_revision: Union[str, None] = "011_workflow_name_trgm"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "n8n_sync_checkpoints",
+        sa.Column("instance_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("workflows_etag", sa.Text(), nullable=True),
+        sa.Column("workflows_digest", sa.Text(), nullable=True),
+        sa.Column("executions_etag", sa.Text(), nullable=True),
+        sa.Column("last_execution_id", sa.Text(), nullable=True),
+        sa.Column("catchup_cursor", sa.Text(), nullable=True),
+        sa.Column("catchup_high_id", sa.Text(), nullable=True),
+        sa.Column("consecutive_failures", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_success_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("n8n_sync_checkpoints")
@@ -0,0 +1,26 @@
+"""Add n8n_change_journal.audience (users granted a workflow when it was deleted).
+
+Revision ID: 013_change_journal_audience
+Revises: 012_sync_checkpoints
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "013_change_journal_audience"
+down_revision: Union[str, None] = "012_sync_checkpoints"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("n8n_change_journal", sa.Column("audience", postgresql.ARRAY(postgresql.UUID(as_uuid=True)), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("n8n_change_journal", "audience")
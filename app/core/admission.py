@@ -0,0 +1,168 @@
+import asyncio
+import math
+import os
+import time
+from typing import Any, Callable, Dict, Tuple
+from fastapi import Depends, HTTPException
+from .deps import get_current_user
+
+# Defaults per route class; each can be overridden with
+# ADMISSION_<CLASS>_CONCURRENCY / _MAX_QUEUE / _QUEUE_TIMEOUT_SECONDS / _RATE_PER_SECOND / _BURST.
+# A rate of 0 disables the per-user limit for that class.
+_ROUTE_CLASSES: Dict[str, Dict[str, float]] = {
+    # Full-table list/feed queries (/workflows, /executions, /executions/history|export, /bootstrap, /changes)
+    "list": {"CONCURRENCY": 4, "MAX_QUEUE": 16, "QUEUE_TIMEOUT_SECONDS": 2, "RATE_PER_SECOND": 1, "BURST": 10},
+    # Typeahead (/workflows/search): one indexed query per debounced keystroke, so sized for typing
+    "search": {"CONCURRENCY": 8, "MAX_QUEUE": 32, "QUEUE_TIMEOUT_SECONDS": 1, "RATE_PER_SECOND": 5, "BURST": 20},
+    # Requests that call out to an n8n instance (/executions/{id})
+    "upstream": {"CONCURRENCY": 8, "MAX_QUEUE": 32, "QUEUE_TIMEOUT_SECONDS": 5, "RATE_PER_SECOND": 2, "BURST": 20},
+    # Admin reports over large tables (action logs)
+    "admin": {"CONCURRENCY": 2, "MAX_QUEUE": 8, "QUEUE_TIMEOUT_SECONDS": 2, "RATE_PER_SECOND": 1, "BURST": 10},
+}
+
+_MAX_TRACKED_USERS = 10000
+
+
+def _class_setting(route_class: str, name: str) -> float:
+    return float(os.getenv(f"ADMISSION_{route_class.upper()}_{name}", str(_ROUTE_CLASSES[route_class][name])))
+
+
+class ConcurrencyLimiter:
+    """Bounded number of in-flight requests with a bounded, time-limited wait queue."""
+
+    def __init__(self, limit: int, max_queue: int, queue_timeout: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.max_wait_seconds = 0.0
+
+    async def acquire(self) -> bool:
+        """Wait for a slot; False (without waiting) if the queue is full, or after the queue timeout."""
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected_queue_full += 1
+            return False
+        self.waiting += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected_timeout += 1
+            return False
+        finally:
+            self.waiting -= 1
+        self.max_wait_seconds = max(self.max_wait_seconds, time.monotonic() - started)
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "max_wait_seconds": round(self.max_wait_seconds, 3),
+        }
+
+
+class RateLimiter:
+    """Token bucket per user: ``rate`` tokens per second, up to ``burst`` saved up."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # user id -> (tokens, updated monotonic)
+        self.allowed = 0
+        self.limited = 0
+
+    def take(self, key: str) -> float:
+        """Consume one token; returns 0 if allowed, else seconds until a token is available."""
+        if self.rate <= 0:
+            self.allowed += 1
+            return 0.0
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            self.limited += 1
+            return (1 - tokens) / self.rate
+        if key not in self._buckets and len(self._buckets) >= _MAX_TRACKED_USERS:
+            self._prune(now)
+        self._buckets[key] = (tokens - 1, now)
+        self.allowed += 1
+        return 0.0
+
+    def _prune(self, now: float):
+        # A bucket that has refilled completely is equivalent to no bucket at all
+        full_after = self.burst / self.rate
+        for key, (_, updated) in list(self._buckets.items()):
+            if now - updated >= full_after:
+                del self._buckets[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "tracked_users": len(self._buckets),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+class AdmissionController:
+    def __init__(self):
+        self._limiters: Dict[str, ConcurrencyLimiter] = {}
+        self._rates: Dict[str, RateLimiter] = {}
+        for route_class in _ROUTE_CLASSES:
+            self._limiters[route_class] = ConcurrencyLimiter(
+                int(_class_setting(route_class, "CONCURRENCY")),
+                int(_class_setting(route_class, "MAX_QUEUE")),
+                _class_setting(route_class, "QUEUE_TIMEOUT_SECONDS"),
+            )
+            self._rates[route_class] = RateLimiter(
+                _class_setting(route_class, "RATE_PER_SECOND"),
+                _class_setting(route_class, "BURST"),
+            )
+
+    def dependency(self, route_class: str) -> Callable:
+        """FastAPI dependency admitting a request of ``route_class``; the slot is held until the handler returns."""
+        limiter = self._limiters[route_class]
+        rate = self._rates[route_class]
+
+        async def admit(user=Depends(get_current_user)):
+            retry_after = rate.take(str(user.get("id")))
+            if retry_after > 0:
+                raise HTTPException(429, "Too many requests", headers={"Retry-After": str(math.ceil(retry_after))})
+            if not await limiter.acquire():
+                raise HTTPException(503, "Server busy, retry shortly",
+                                    headers={"Retry-After": str(max(1, math.ceil(limiter.queue_timeout)))})
+            try:
+                yield
+            finally:
+                limiter.release()
+
+        return admit
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            route_class: {"concurrency": self._limiters[route_class].stats(), "rate_limit": self._rates[route_class].stats()}
+            for route_class in _ROUTE_CLASSES
+        }
+
+
+admission = AdmissionController()
@@ -23,6 +23,76 @@ N8N_API_KEY = os.getenv("N8N_API_KEY")
 LOCAL_N8N_URL = os.getenv("LOCAL_N8N_URL")
 LOCAL_N8N_API_KEY = os.getenv("LOCAL_N8N_API_KEY")
 
+# Seconds between full polling syncs. When n8n pushes executions to
+# POST /ingest/executions this can be raised; polling then only reconciles.
+N8N_SYNC_INTERVAL_SECONDS = float(os.getenv("N8N_SYNC_INTERVAL_SECONDS", "15"))
+# Executions per /executions page (n8n caps this at 250); when more than a page arrived since the
+# last cycle (e.g. across a restart), up to N8N_SYNC_CATCHUP_MAX_PAGES older pages are fetched per cycle
+N8N_SYNC_EXECUTIONS_PAGE_SIZE = int(os.getenv("N8N_SYNC_EXECUTIONS_PAGE_SIZE", "100"))
+N8N_SYNC_CATCHUP_MAX_PAGES = int(os.getenv("N8N_SYNC_CATCHUP_MAX_PAGES", "10"))
+# An instance that fails is skipped for N8N_SYNC_INTERVAL_SECONDS * 2^(failures - 1), at most this long
+N8N_SYNC_BACKOFF_MAX_SECONDS = float(os.getenv("N8N_SYNC_BACKOFF_MAX_SECONDS", "300"))
+
+# Seconds before the cached instance list is reloaded even without an admin change
+INSTANCE_REGISTRY_TTL_SECONDS = float(os.getenv("INSTANCE_REGISTRY_TTL_SECONDS", "300"))
+
+# Pooled HTTP client for n8n API calls (one keep-alive client per instance)
+N8N_HTTP2 = os.getenv("N8N_HTTP2", "true").lower() in ("1", "true", "yes")
+N8N_HTTP_MAX_CONNECTIONS = int(os.getenv("N8N_HTTP_MAX_CONNECTIONS", "10"))
+N8N_HTTP_MAX_KEEPALIVE = int(os.getenv("N8N_HTTP_MAX_KEEPALIVE", "5"))
+N8N_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("N8N_HTTP_KEEPALIVE_EXPIRY", "120"))
+N8N_HTTP_TIMEOUT = float(os.getenv("N8N_HTTP_TIMEOUT", "15"))
+
+# Write-behind action log buffer (entries are flushed in batches with COPY)
+AUDIT_LOG_QUEUE_MAX = int(os.getenv("AUDIT_LOG_QUEUE_MAX", "10000"))
+AUDIT_LOG_BATCH_SIZE = int(os.getenv("AUDIT_LOG_BATCH_SIZE", "500"))
+AUDIT_LOG_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_LOG_FLUSH_INTERVAL_SECONDS", "2"))
+
+# Execution detail cache (compressed n8n execution payloads fetched on demand)
+EXECUTION_DETAIL_CACHE_MAX_ENTRIES = int(os.getenv("EXECUTION_DETAIL_CACHE_MAX_ENTRIES", "500"))
+EXECUTION_DETAIL_CACHE_MAX_BYTES = int(os.getenv("EXECUTION_DETAIL_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+EXECUTION_DETAIL_MAX_ENTRY_BYTES = int(os.getenv("EXECUTION_DETAIL_MAX_ENTRY_BYTES", str(8 * 1024 * 1024)))
+# History backfill for newly registered instances: executions per page (n8n caps this at 250),
+# minimum seconds between page requests, and consecutive page failures before a job is marked failed
+BACKFILL_PAGE_SIZE = int(os.getenv("BACKFILL_PAGE_SIZE", "250"))
+BACKFILL_PAGE_INTERVAL_SECONDS = float(os.getenv("BACKFILL_PAGE_INTERVAL_SECONDS", "1"))
+BACKFILL_MAX_ATTEMPTS = int(os.getenv("BACKFILL_MAX_ATTEMPTS", "5"))
+BACKFILL_MAX_CONCURRENT_JOBS = int(os.getenv("BACKFILL_MAX_CONCURRENT_JOBS", "1"))
+# Change journal behind GET /changes: entries older than this are pruned by the sync loop,
+# and clients whose version predates the pruned range get a reset
+CHANGE_JOURNAL_RETENTION_HOURS = float(os.getenv("CHANGE_JOURNAL_RETENTION_HOURS", "72"))
+# /ws/n8n liveness and fan-out: app-level ping interval, reap sockets silent for longer than
+# the idle timeout, per-process connection cap, coalescing window for broadcasts, per-send timeout
+WS_HEARTBEAT_INTERVAL_SECONDS = float(os.getenv("WS_HEARTBEAT_INTERVAL_SECONDS", "20"))
+WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "70"))
+WS_MAX_CONNECTIONS = int(os.getenv("WS_MAX_CONNECTIONS", "1000"))
+WS_COALESCE_WINDOW_MS = float(os.getenv("WS_COALESCE_WINDOW_MS", "250"))
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+# Reload the workflow grants of connected sockets at least this often (admin grant/revoke
+# in this process refreshes them immediately; this covers changes made by other processes)
+WS_ACCESS_REFRESH_SECONDS = float(os.getenv("WS_ACCESS_REFRESH_SECONDS", "60"))
+# Request profiler: superadmin requests carrying PROFILER_HEADER are sampled from the start;
+# any request running longer than PROFILER_SLOW_REQUEST_MS (0 = off, the default) is sampled from then on.
+# Slow capture registers every request with the watchdog thread, so it is opt-in.
+# The last PROFILER_RING_SIZE profiles are kept in memory.
+PROFILER_HEADER = os.getenv("PROFILER_HEADER", "X-Profile")
+PROFILER_SLOW_REQUEST_MS = float(os.getenv("PROFILER_SLOW_REQUEST_MS", "0"))
+PROFILER_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILER_SAMPLE_INTERVAL_MS", "5"))
+PROFILER_RING_SIZE = int(os.getenv("PROFILER_RING_SIZE", "20"))
+PROFILER_MAX_SAMPLES = int(os.getenv("PROFILER_MAX_SAMPLES", "20000"))
+# Cold storage for old executions: executions that started more than ARCHIVE_AFTER_DAYS ago
+# (0 = off, the default: archiving deletes them from n8n_executions) are moved to gzip JSONL segments of at most ARCHIVE_SEGMENT_ROWS under ARCHIVE_DIR,
+# checked every ARCHIVE_INTERVAL_SECONDS; segments older than ARCHIVE_RETENTION_DAYS (0 = never) are deleted
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "data/archive")
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "0"))
+ARCHIVE_RETENTION_DAYS = float(os.getenv("ARCHIVE_RETENTION_DAYS", "366"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+ARCHIVE_SEGMENT_ROWS = int(os.getenv("ARCHIVE_SEGMENT_ROWS", "50000"))
+# Startup warm-up and /readyz: connections opened per request pool before reporting ready,
+# and whether readiness also waits for the first sync cycle to finish
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", "4"))
+READY_REQUIRE_FIRST_SYNC = os.getenv("READY_REQUIRE_FIRST_SYNC", "true").lower() == "true"
+
 def get_allowed_origins():
     return [o.strip() for o in FRONTEND_URLS.split(',') if o.strip()]
 
@@ -0,0 +1,316 @@
+import asyncio
+import itertools
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+import jwt
+from .config import (
+    JWT_SECRET,
+    PROFILER_HEADER,
+    PROFILER_SLOW_REQUEST_MS,
+    PROFILER_SAMPLE_INTERVAL_MS,
+    PROFILER_RING_SIZE,
+    PROFILER_MAX_SAMPLES,
+)
+from ..database.database import SessionLocal, current_query_stats
+from ..database.models import Profile
+
+_MAX_STACK_DEPTH = 64
+_MAX_SQL_STATEMENTS = 25
+_NO_SQL = {"queries": 0, "total_ms": 0.0, "slow": 0, "statements": []}
+
+
+class _Capture:
+    """Stack samples collected for one request while it is being profiled."""
+
+    def __init__(self, trigger: str, started_at: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.trigger = trigger  # "header" | "slow"
+        self.sampling_from = time.perf_counter()
+        self.offset_ms = (self.sampling_from - started_at) * 1000
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def add_stack(self, frame, root=None):
+        """Record the stack above ``frame``. With ``root``, only if that frame is on it (and cut there)."""
+        stack = []
+        while frame is not None:
+            if len(stack) < _MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            if frame is root:
+                break
+            frame = frame.f_back
+        else:
+            if root is not None:
+                # The loop thread is running some other task right now
+                return
+        with self._lock:
+            self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+
+class _InFlight:
+    __slots__ = ("started_at", "thread_id", "frame", "workers", "capture")
+
+    def __init__(self, started_at: float, thread_id: int, frame, capture: Optional[_Capture]):
+        self.started_at = started_at
+        # Event-loop thread and the request's outermost coroutine frame on it
+        self.thread_id = thread_id
+        self.frame = frame
+        # Executor threads currently running work handed off by this request
+        self.workers: Set[int] = set()
+        self.capture = capture
+
+
+# The profiled request of the current task; copied into the threads it hands work to
+_current_request: ContextVar[Optional[_InFlight]] = ContextVar("profiled_request", default=None)
+
+
+def _run_for(request: _InFlight, fn, *args, **kwargs):
+    thread_id = threading.get_ident()
+    request.workers.add(thread_id)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        request.workers.discard(thread_id)
+
+
+class _RequestExecutor(ThreadPoolExecutor):
+    """Default executor that tells the profiler which worker thread runs which request's work.
+
+    ``submit`` runs on the loop thread, inside the submitting request's context
+    (asyncio.to_thread / run_in_executor), so the request can be read there.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        request = _current_request.get()
+        if request is None:
+            return super().submit(fn, *args, **kwargs)
+        return super().submit(_run_for, request, fn, *args, **kwargs)
+
+
+class Profiler:
+    """Sampling profiler for individual requests.
+
+    A request is profiled when a superadmin sends the profiling header, or
+    once it has been running longer than ``slow_ms`` (a watchdog thread
+    notices it and starts sampling from that point on). A single sampler
+    thread walks the stacks of the threads serving profiled requests every
+    ``interval`` seconds. With slow capture off (``slow_ms`` 0) requests
+    without the header skip the profiler entirely. With it on, every request
+    takes the lock to enter and leave the in-flight table, and the watchdog
+    polls every ``slow_ms / 4`` while any request is in flight (it sleeps
+    when none is). Finished profiles are kept in a ring buffer of the last
+    ``ring_size``.
+
+    Requests share the event-loop thread, so a loop-thread sample only counts
+    when the request's own coroutine is on the stack. Work it hands to the
+    loop's default executor (asyncio.to_thread) is sampled in the worker
+    thread once ``install()`` has replaced that executor. Work run through
+    Starlette's threadpool (sync ``def`` endpoints and dependencies) is not
+    attributed.
+    """
+
+    def __init__(self, slow_ms: float, interval: float, ring_size: int, max_samples: int):
+        self.slow_ms = slow_ms
+        self.interval = interval
+        self.max_samples = max_samples
+        self.profiles: Deque[Dict[str, Any]] = deque(maxlen=ring_size)
+        self._in_flight: Dict[int, _InFlight] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def install(self, loop: asyncio.AbstractEventLoop):
+        """Route the loop's default executor through the profiler (call once on startup)."""
+        loop.set_default_executor(_RequestExecutor(thread_name_prefix="asyncio"))
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                requests = list(self._in_flight.values())
+            if not requests:
+                # Nothing in flight: sleep until the next request arrives
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            now = time.perf_counter()
+            sampling = False
+            frames = None
+            for request in requests:
+                if request.capture is None and self.slow_ms > 0 and (now - request.started_at) * 1000 >= self.slow_ms:
+                    request.capture = _Capture("slow", request.started_at)
+                capture = request.capture
+                if capture is None or capture.samples >= self.max_samples:
+                    continue
+                sampling = True
+                if frames is None:
+                    frames = sys._current_frames()
+                frame = frames.get(request.thread_id)
+                if frame is not None:
+                    capture.add_stack(frame, root=request.frame)
+                for thread_id in tuple(request.workers):
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        capture.add_stack(frame)
+            frames = None
+            # Sample quickly while profiling; otherwise only watch for slow requests
+            time.sleep(self.interval if sampling else max(self.slow_ms / 4000, self.interval))
+
+    def begin(self, profile_now: bool, frame) -> Tuple[int, _InFlight]:
+        started_at = time.perf_counter()
+        request = _InFlight(
+            started_at, threading.get_ident(), frame, _Capture("header", started_at) if profile_now else None
+        )
+        key = next(self._ids)
+        if profile_now or self.slow_ms > 0:
+            with self._lock:
+                idle = not self._in_flight
+                self._in_flight[key] = request
+            self._ensure_thread()
+            # The watchdog only sleeps on the event when nothing is in flight
+            if idle:
+                self._wakeup.set()
+        return key, request
+
+    def end(self, key: int, request: _InFlight, scope: Dict[str, Any], status: Optional[int]) -> Optional[str]:
+        with self._lock:
+            self._in_flight.pop(key, None)
+        capture = request.capture
+        if capture is None:
+            return None
+        duration_ms = (time.perf_counter() - request.started_at) * 1000
+        # SQL comes from the request's query accounting (QueryAccountingMiddleware), which covers the whole request
+        stats = current_query_stats()
+        sql = stats.summary(_MAX_SQL_STATEMENTS) if stats is not None else _NO_SQL
+        self.profiles.append(_summarize(capture, scope, status, duration_ms, self.interval, sql))
+        return capture.id
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        return next((p for p in self.profiles if p["id"] == profile_id), None)
+
+
+def _summarize(capture: _Capture, scope: Dict[str, Any], status: Optional[int], duration_ms: float,
+               interval: float, sql: Dict[str, Any]) -> Dict[str, Any]:
+    with capture._lock:
+        stacks = dict(capture.stacks)
+    self_counts: Counter = Counter()
+    total_counts: Counter = Counter()
+    for stack, count in stacks.items():
+        self_counts[stack[-1]] += count
+        for func in set(stack):
+            total_counts[func] += count
+    samples = sum(stacks.values()) or 1
+    return {
+        "id": capture.id,
+        "captured_at": datetime.now(timezone.utc).isoformat(),
+        "trigger": capture.trigger,
+        "method": scope.get("method"),
+        "path": scope.get("path"),
+        "query": scope.get("query_string", b"").decode("latin-1"),
+        "status": status,
+        "duration_ms": round(duration_ms, 1),
+        "sampled_from_ms": round(capture.offset_ms, 1),
+        "sample_interval_ms": round(interval * 1000, 2),
+        "samples": sum(stacks.values()),
+        "top_self": [
+            {"function": func, "samples": count, "percent": round(100 * count / samples, 1)}
+            for func, count in self_counts.most_common(20)
+        ],
+        "top_total": [
+            {"function": func, "samples": count, "percent": round(100 * count / samples, 1)}
+            for func, count in total_counts.most_common(20)
+        ],
+        "sql": sql,
+        # Brendan Gregg's folded-stack format, loadable by flamegraph.pl / speedscope
+        "folded": "\n".join(f"{';'.join(stack)} {count}" for stack, count in stacks.items()),
+    }
+
+
+def _is_superadmin_token(token: Optional[str]) -> bool:
+    if not token:
+        return False
+    try:
+        user_id = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])["id"]
+    except Exception:
+        return False
+    db = SessionLocal()
+    try:
+        profile = db.query(Profile).filter(Profile.id == user_id).first()
+        return bool(profile and profile.role == "superadmin")
+    except Exception:
+        return False
+    finally:
+        db.close()
+
+
+def _cookie(scope: Dict[str, Any], name: str) -> Optional[str]:
+    for key, value in scope.get("headers") or ():
+        if key == b"cookie":
+            for part in value.decode("latin-1").split(";"):
+                cookie_name, _, cookie_value = part.strip().partition("=")
+                if cookie_name == name:
+                    return cookie_value
+    return None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware feeding requests to the profiler; adds X-Profile-Id to profiled responses."""
+
+    def __init__(self, app, profiler: Optional[Profiler] = None):
+        self.app = app
+        self.profiler = profiler or request_profiler
+        self._header = PROFILER_HEADER.lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = any(key == self._header for key, _ in scope.get("headers") or ())
+        if requested:
+            requested = await asyncio.to_thread(_is_superadmin_token, _cookie(scope, "token"))
+        if not requested and self.profiler.slow_ms <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        key, request = self.profiler.begin(requested, sys._getframe())
+        token = _current_request.set(request)
+        status: List[Optional[int]] = [None]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if request.capture is not None:
+                    message = {**message, "headers": list(message.get("headers", [])) + [
+                        (b"x-profile-id", request.capture.id.encode("latin-1"))
+                    ]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+            self.profiler.end(key, request, scope, status[0])
+
+
+request_profiler = Profiler(
+    PROFILER_SLOW_REQUEST_MS,
+    PROFILER_SAMPLE_INTERVAL_MS / 1000,
+    PROFILER_RING_SIZE,
+    PROFILER_MAX_SAMPLES,
+)
@@ -0,0 +1,35 @@
+from typing import Any, Dict
+from ..database.database import track_queries
+
+
+def _route_label(scope: Dict[str, Any]) -> str:
+    # The route template ("/api/data/workflows/{workflow_id}") keeps the metrics keyed by endpoint, not by id
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return f"{scope.get('method')} {path}" if path else "unmatched"
+
+
+class QueryAccountingMiddleware:
+    """ASGI middleware counting each request's SQL; adds X-DB-Queries and X-DB-Time-Ms to the response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries("unmatched") as stats:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    # Routing has happened by now; label the stats with the matched route
+                    stats.label = _route_label(scope)
+                    message = {**message, "headers": list(message.get("headers", [])) + [
+                        (b"x-db-queries", str(stats.queries).encode("latin-1")),
+                        (b"x-db-time-ms", str(stats.total_ms).encode("latin-1")),
+                    ]}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+from .config import WARMUP_CONNECTIONS, READY_REQUIRE_FIRST_SYNC
+from ..database.database import engines, ReadSessionLocal
+from ..database.models import Profile, N8NWorkflow, N8NExecution
+from ..services.instance_registry import instance_registry
+
+# Pools that serve user requests; the sync/backfill pools warm up on their own first cycle
+_REQUEST_POOLS = ("api_read", "api_write")
+
+
+class Readiness:
+    """Startup warm-up and the state behind /readyz.
+
+    ``start()`` warms in the background so /healthz answers immediately:
+    it opens WARMUP_CONNECTIONS connections per request pool, loads the
+    instance registry and runs one small ORM query per hot model (mapper
+    configuration and statement compilation happen once, here, instead of
+    in the first user request). The process is ready once that has
+    succeeded and, with READY_REQUIRE_FIRST_SYNC, the sync loop has
+    finished its first cycle. Failures are retried with backoff.
+    """
+
+    def __init__(self, connections: int, require_first_sync: bool):
+        self._connections = connections
+        self._require_first_sync = require_first_sync
+        self._task: Optional[asyncio.Task] = None
+        self._started_at = time.monotonic()
+        self.pool_warm = False
+        self.first_sync_at: Optional[datetime] = None
+        self.stopping = False
+        self.warmup_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def _warm_pools(self):
+        for workload in _REQUEST_POOLS:
+            engine = engines[workload]
+            # Hold them all at once so the pool really creates that many connections
+            with ExitStack() as stack:
+                for _ in range(min(self._connections, engine.pool.size())):
+                    stack.enter_context(engine.connect()).execute(text("SELECT 1"))
+
+    def _warm_caches(self):
+        configure_mappers()
+        instance_registry.snapshot()
+        if not instance_registry.complete:
+            raise RuntimeError("Instance registry could not be loaded from the database")
+        db = ReadSessionLocal()
+        try:
+            for model in (Profile, N8NWorkflow, N8NExecution):
+                db.query(model).limit(1).all()
+        finally:
+            db.close()
+
+    def warm_up(self):
+        started = time.perf_counter()
+        self._warm_pools()
+        self._warm_caches()
+        self.warmup_seconds = round(time.perf_counter() - started, 3)
+        self.pool_warm = True
+        self.last_error = None
+
+    async def _run(self):
+        delay = 1.0
+        while not self.pool_warm:
+            try:
+                await asyncio.to_thread(self.warm_up)
+            except Exception as e:
+                self.last_error = str(e)[:1000]
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def mark_first_sync(self):
+        if self.first_sync_at is None:
+            self.first_sync_at = datetime.now(timezone.utc)
+
+    async def stop(self):
+        # Report not ready first so load balancers drain this process
+        self.stopping = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        checks = {
+            "pool_warm": self.pool_warm,
+            "instances_loaded": instance_registry.complete,
+            "first_sync": self.first_sync_at is not None or not self._require_first_sync,
+            "not_stopping": not self.stopping,
+        }
+        return {
+            "ready": all(checks.values()),
+            "checks": checks,
+            "uptime_seconds": round(time.monotonic() - self._started_at, 1),
+            "warmup_seconds": self.warmup_seconds,
+            "first_sync_at": self.first_sync_at.isoformat() if self.first_sync_at else None,
+            "last_error": self.last_error,
+        }
+
+
+readiness = Readiness(WARMUP_CONNECTIONS, READY_REQUIRE_FIRST_SYNC)
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Boolean, Text, ForeignKey, DateTime, CheckConstraint, Index
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Boolean, Text, ForeignKey, DateTime, CheckConstraint, Index, Integer, BigInteger, LargeBinary, UniqueConstraint
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import uuid
@@ -33,6 +33,14 @@ class ActionLog(Base):
     action = Column(Text, nullable=False)
     timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
+    __table_args__ = (
+        # Keyset pagination on (timestamp, id), optionally scoped to one user
+        Index("ix_action_logs_timestamp_id", timestamp.desc(), id.desc()),
+        Index("ix_action_logs_user_id_timestamp_id", user_id, timestamp.desc(), id.desc()),
+        # Substring search on action (pg_trgm)
+        Index("ix_action_logs_action_trgm", action, postgresql_using="gin", postgresql_ops={"action": "gin_trgm_ops"}),
+    )
+
     # Relationships
     user = relationship("Profile", back_populates="action_logs")
 
@@ -40,35 +48,77 @@ class ActionLog(Base):
 class N8NWorkflow(Base):
     __tablename__ = "n8n_workflows"
 
-    id = Column(Text, primary_key=True)
+    id = Column(Text, primary_key=True)  # "<instance prefix>:<n8n id>", kept as the public id
+    # Owning instance: n8n_instances.id, or a stable uuid5 for env-configured instances
+    instance_id = Column(UUID(as_uuid=True), nullable=False)
+    n8n_id = Column(Text, nullable=False)
     name = Column(Text, nullable=False)
     active = Column(Boolean, default=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    n8n_updated_at = Column(DateTime(timezone=True))  # updatedAt reported by n8n
+    definition_hash = Column(Text)  # sha256 of the canonical nodes/connections/settings JSON (n8n_workflow_blobs)
+
+    __table_args__ = (
+        UniqueConstraint("instance_id", "n8n_id", name="uq_n8n_workflows_instance_id_n8n_id"),
+        # Name search (/workflows/search): ILIKE substring and word_similarity (<%) matches
+        Index("ix_n8n_workflows_name_trgm", name, postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
 
     # Relationships
     executions = relationship("N8NExecution", back_populates="workflow", cascade="all, delete-orphan")
     user_access = relationship("UserWorkflowAccess", back_populates="workflow", cascade="all, delete-orphan")
+    summary = relationship("N8NWorkflowSummary", back_populates="workflow", uselist=False, cascade="all, delete-orphan")
+    versions = relationship("N8NWorkflowVersion", back_populates="workflow", cascade="all, delete-orphan")
 
 
 class N8NExecution(Base):
     __tablename__ = "n8n_executions"
 
-    id = Column(Text, primary_key=True)
-    workflow_id = Column(Text, ForeignKey("n8n_workflows.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(Text, primary_key=True)  # "<instance prefix>:<n8n id>", kept as the public id
+    instance_id = Column(UUID(as_uuid=True), nullable=False)
+    n8n_id = Column(Text, nullable=False)
+    workflow_id = Column(Text, ForeignKey("n8n_workflows.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False, index=True)
     status = Column(Text, nullable=False)
     finished = Column(Boolean, default=False)
     started_at = Column(DateTime(timezone=True), index=True)
     stopped_at = Column(DateTime(timezone=True))
 
+    __table_args__ = (
+        UniqueConstraint("instance_id", "n8n_id", name="uq_n8n_executions_instance_id_n8n_id"),
+        # Latest execution per workflow (workflow summaries)
+        Index("ix_n8n_executions_workflow_id_started_at", workflow_id, started_at.desc()),
+        # Per-instance listing / reconciliation
+        Index("ix_n8n_executions_instance_id_started_at", instance_id, started_at.desc()),
+    )
+
     # Relationships
     workflow = relationship("N8NWorkflow", back_populates="executions")
 
 
+class N8NWorkflowSummary(Base):
+    """Per-workflow execution rollup maintained by the sync upsert path."""
+    __tablename__ = "n8n_workflow_summaries"
+
+    workflow_id = Column(Text, ForeignKey("n8n_workflows.id", ondelete="CASCADE", onupdate="CASCADE"), primary_key=True)
+    last_execution_id = Column(Text)
+    last_status = Column(Text)
+    last_started_at = Column(DateTime(timezone=True))
+    execution_count = Column(Integer, nullable=False, default=0)
+    running_count = Column(Integer, nullable=False, default=0)
+    success_24h = Column(Integer, nullable=False, default=0)
+    error_24h = Column(Integer, nullable=False, default=0)
+    archived_count = Column(Integer, nullable=False, server_default="0")  # executions moved to cold storage
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    # Relationships
+    workflow = relationship("N8NWorkflow", back_populates="summary")
+
+
 class UserWorkflowAccess(Base):
     __tablename__ = "user_workflow_access"
 
     user_id = Column(UUID(as_uuid=True), ForeignKey("profiles.id", ondelete="CASCADE"), primary_key=True, index=True)
-    workflow_id = Column(Text, ForeignKey("n8n_workflows.id", ondelete="CASCADE"), primary_key=True, index=True)
+    workflow_id = Column(Text, ForeignKey("n8n_workflows.id", ondelete="CASCADE", onupdate="CASCADE"), primary_key=True, index=True)
 
     # Relationships
     user = relationship("Profile", back_populates="workflow_access")
@@ -87,3 +137,117 @@ class N8NInstance(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+
+
+class N8NExecutionDetail(Base):
+    __tablename__ = "n8n_execution_details"
+
+    execution_id = Column(Text, ForeignKey("n8n_executions.id", ondelete="CASCADE", onupdate="CASCADE"), primary_key=True)
+    payload = Column(LargeBinary, nullable=False)  # zlib-compressed JSON from n8n (includeData=true)
+    size_bytes = Column(Integer, nullable=False)
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_accessed_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class N8NBackfillJob(Base):
+    __tablename__ = "n8n_backfill_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    instance_id = Column(UUID(as_uuid=True), ForeignKey("n8n_instances.id", ondelete="CASCADE"), nullable=False, unique=True)
+    status = Column(Text, nullable=False, default="pending")
+    cursor = Column(Text)  # n8n nextCursor of the next page to fetch; NULL before the first page
+    pages_fetched = Column(Integer, nullable=False, default=0)
+    executions_loaded = Column(BigInteger, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)  # consecutive failures of the current page
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        CheckConstraint("status IN ('pending', 'running', 'completed', 'failed')", name="check_backfill_status"),
+    )
+
+
+class N8NChangeJournal(Base):
+    __tablename__ = "n8n_change_journal"
+
+    version = Column(BigInteger, primary_key=True, autoincrement=True)  # bigserial; journal writers serialize, so versions commit in order
+    entity = Column(Text, nullable=False)  # 'workflow' | 'execution'
+    entity_id = Column(Text, nullable=False)
+    workflow_id = Column(Text, nullable=False)  # owning workflow, for access filtering
+    op = Column(Text, nullable=False)  # 'upsert' | 'delete'
+    # Workflow tombstones: users granted the workflow when it was deleted (the grants go with it)
+    audience = Column(ARRAY(UUID(as_uuid=True)))
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    __table_args__ = (
+        CheckConstraint("entity IN ('workflow', 'execution')", name="check_change_entity"),
+        CheckConstraint("op IN ('upsert', 'delete')", name="check_change_op"),
+        Index("ix_n8n_change_journal_workflow_id_version", "workflow_id", "version"),
+    )
+
+
+class N8NWorkflowBlob(Base):
+    __tablename__ = "n8n_workflow_blobs"
+
+    hash = Column(Text, primary_key=True)  # sha256 hex of the canonical definition JSON
+    definition = Column(LargeBinary, nullable=False)  # zlib-compressed canonical JSON
+    size_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class N8NWorkflowVersion(Base):
+    __tablename__ = "n8n_workflow_versions"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    workflow_id = Column(Text, ForeignKey("n8n_workflows.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
+    definition_hash = Column(Text, ForeignKey("n8n_workflow_blobs.hash"), nullable=False)
+    n8n_updated_at = Column(DateTime(timezone=True))
+    recorded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_n8n_workflow_versions_workflow_id_id", "workflow_id", "id"),
+    )
+
+    workflow = relationship("N8NWorkflow", back_populates="versions")
+
+
+class N8NExecutionArchiveSegment(Base):
+    """Index of cold-storage segment files (gzip JSONL, one execution per line, newest first)."""
+    __tablename__ = "n8n_execution_archive_segments"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    instance_id = Column(UUID(as_uuid=True), nullable=False)
+    month = Column(Text, nullable=False)  # "YYYY-MM" (UTC) of started_at
+    path = Column(Text, nullable=False)  # relative to ARCHIVE_DIR
+    row_count = Column(Integer, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    min_started_at = Column(DateTime(timezone=True), nullable=False)
+    max_started_at = Column(DateTime(timezone=True), nullable=False)
+    workflow_ids = Column(ARRAY(Text), nullable=False)  # lets readers skip segments without visible workflows
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_n8n_execution_archive_segments_instance_id_month", "instance_id", "month"),
+        Index("ix_n8n_execution_archive_segments_max_started_at", "max_started_at"),
+    )
+
+
+class N8NSyncCheckpoint(Base):
+    """Per-instance sync state, so a restarted process resumes incrementally."""
+    __tablename__ = "n8n_sync_checkpoints"
+
+    instance_id = Column(UUID(as_uuid=True), primary_key=True)  # no FK: env-configured instances have no row
+    workflows_etag = Column(Text)  # ETag of the last /workflows response that was stored
+    workflows_digest = Column(Text)  # sha256 over the normalized workflow list (id, name, active, updatedAt, definition hash)
+    executions_etag = Column(Text)  # ETag of the last /executions head page that was stored
+    last_execution_id = Column(Text)  # watermark: every execution up to this n8n id has been ingested
+    catchup_cursor = Column(Text)  # n8n cursor of the next older page while closing a gap behind the head page
+    catchup_high_id = Column(Text)  # watermark to set once that gap is closed
+    consecutive_failures = Column(Integer, nullable=False, server_default="0")
+    next_attempt_at = Column(DateTime(timezone=True))  # backoff: the instance is skipped until then
+    last_success_at = Column(DateTime(timezone=True))
+    last_error = Column(Text)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,14 +1,31 @@
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Request, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import Text, bindparam, desc, func, text, true, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import Any, Dict, List, Optional
+import asyncio
+import base64
+import csv
+import io
+import json
 import uuid
 import secrets
 import bcrypt
 from datetime import datetime
 from ..core.deps import require_superadmin
-from ..database.database import get_db
-from ..database.models import Profile, ActionLog, UserWorkflowAccess, N8NInstance
+from ..core.admission import admission
+from ..core.profiling import request_profiler
+from ..database.database import get_db, get_read_db, query_metrics
+from ..database.models import Profile, ActionLog, UserWorkflowAccess, N8NInstance, N8NBackfillJob, N8NWorkflow
+from ..services.n8n_client import n8n_clients
+from ..services.instance_registry import instance_registry
+from ..services.audit_log import audit_log
+from ..services.backfill import backfill, job_payload
+from ..services.archive import archiver
+from ..services import sync_checkpoints
+from .ws import broadcaster
 
 router = APIRouter(prefix="/admin")
 
@@ -43,18 +60,12 @@ async def create_user(request: Request, _=Depends(require_superadmin), db: Sessi
             pass_hash=hashed
         )
         db.add(profile)
-        
-        # Log the action
-        action_log = ActionLog(
-            user_id=user_id,
-            action=f"User created by superadmin: {email}",
-            timestamp=datetime.utcnow()
-        )
-        db.add(action_log)
-        
         db.commit()
         db.refresh(profile)
         
+        # Log the action
+        audit_log.log(user_id, f"User created by superadmin: {email}")
+        
         return {
             "id": str(profile.id),
             "email": profile.email,
@@ -64,8 +75,112 @@ async def create_user(request: Request, _=Depends(require_superadmin), db: Sessi
         db.rollback()
         return JSONResponse({"error": str(e)}, status_code=500)
 
+# Upper bound on emails per /admin/users/bulk call
+_BULK_USERS_MAX = 5000
+
+# New profiles and their audit rows in one statement; emails taken meanwhile are skipped
+_BULK_USERS_SQL = text("""
+    WITH input AS (
+        SELECT * FROM unnest(:ids, :emails) AS t(id, email)
+    ), created AS (
+        INSERT INTO profiles (id, email, role)
+        SELECT id, email, 'user' FROM input
+        ON CONFLICT (email) DO NOTHING
+        RETURNING id, email
+    ), logged AS (
+        INSERT INTO action_logs (id, user_id, action, timestamp)
+        SELECT gen_random_uuid(), id, 'User created by superadmin: ' || email, now() FROM created
+    )
+    SELECT id, email FROM created
+""").bindparams(
+    bindparam("ids", type_=ARRAY(UUID(as_uuid=True))),
+    bindparam("emails", type_=ARRAY(Text)),
+)
+
+def _bulk_user_emails(content_type: str, raw: bytes) -> List[str]:
+    """Emails of a bulk provisioning body, in order.
+
+    CSV (text/csv): the "email" column if there is a header row, else the first column.
+    JSON: a list of emails or of { email } objects, or { emails: [...] }.
+    """
+    if "csv" in content_type:
+        rows = [row for row in csv.reader(io.StringIO(raw.decode("utf-8-sig"))) if row]
+        column = 0
+        if rows and "@" not in rows[0][0]:
+            header = [cell.strip().lower() for cell in rows.pop(0)]
+            column = header.index("email") if "email" in header else 0
+        return [row[column] if column < len(row) else "" for row in rows]
+    body = json.loads(raw or b"null")
+    if isinstance(body, dict):
+        body = body.get("emails")
+    if not isinstance(body, list):
+        raise ValueError("Expected a list of emails")
+    return [item.get("email") if isinstance(item, dict) else item for item in body]
+
+@router.post("/users/bulk")
+async def create_users_bulk(request: Request, _=Depends(require_superadmin), db: Session = Depends(get_db)):
+    """Provision many @khalti.com users (role 'user') from a CSV or JSON list.
+
+    Existing emails are found in one query and all new profiles plus their
+    action_logs rows are inserted in one statement. Returns a result per
+    input email: created, exists, duplicate (repeated in the input) or invalid.
+    """
+    try:
+        emails = _bulk_user_emails(request.headers.get("content-type", ""), await request.body())
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return JSONResponse({"error": f"Invalid body: {e}"}, status_code=400)
+    if not emails:
+        return JSONResponse({"error": "No emails given"}, status_code=400)
+    if len(emails) > _BULK_USERS_MAX:
+        return JSONResponse({"error": f"At most {_BULK_USERS_MAX} emails per request"}, status_code=400)
+
+    results: List[Dict[str, Any]] = []
+    pending: Dict[str, Dict[str, Any]] = {}
+    for value in emails:
+        # Google hands out lowercase addresses; compare and store them that way
+        email = value.strip().lower() if isinstance(value, str) else ""
+        result: Dict[str, Any] = {"email": email or value}
+        if not email:
+            result.update(status="invalid", error="Email is required")
+        elif not email.endswith("@khalti.com") or email.count("@") != 1 or email.startswith("@"):
+            result.update(status="invalid", error="Only @khalti.com email addresses are allowed")
+        elif email in pending:
+            result["status"] = "duplicate"
+        else:
+            pending[email] = result
+        results.append(result)
+
+    try:
+        if pending:
+            existing = {
+                email: user_id for email, user_id in db.query(func.lower(Profile.email), Profile.id)
+                .filter(func.lower(Profile.email).in_(list(pending)))
+            }
+            for email, user_id in existing.items():
+                pending.pop(email).update(status="exists", id=str(user_id))
+        if pending:
+            ids = [uuid.uuid4() for _ in pending]
+            created = {
+                email: user_id
+                for user_id, email in db.execute(_BULK_USERS_SQL, {"ids": ids, "emails": list(pending)})
+            }
+            db.commit()
+            for email, result in pending.items():
+                if email in created:
+                    result.update(status="created", id=str(created[email]))
+                else:
+                    result["status"] = "exists"
+    except Exception as e:
+        db.rollback()
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return {"counts": counts, "results": results}
+
 @router.get("/users")
-async def list_users(_=Depends(require_superadmin), db: Session = Depends(get_db)):
+async def list_users(_=Depends(require_superadmin), db: Session = Depends(get_read_db)):
     try:
         profiles = db.query(Profile).order_by(Profile.email).all()
         return [
@@ -99,6 +214,7 @@ async def set_role(request: Request, current_user=Depends(require_superadmin), d
             return JSONResponse({"error": "User not found"}, status_code=404)
         profile.role = role
         db.commit()
+        await _access_changed([user_id])
         return {"success": True}
     except ValueError:
         return JSONResponse({"error": "Invalid user_id format"}, status_code=400)
@@ -106,11 +222,54 @@ async def set_role(request: Request, current_user=Depends(require_superadmin), d
         db.rollback()
         return JSONResponse({"error": str(e)}, status_code=500)
 
-@router.get("/action-logs")
-async def action_logs(_=Depends(require_superadmin), db: Session = Depends(get_db)):
+def _encode_log_cursor(log: ActionLog) -> str:
+    raw = f"{log.timestamp.isoformat()}|{log.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode_log_cursor(cursor: str):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    ts, log_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+    return datetime.fromisoformat(ts), uuid.UUID(log_id)
+
+@router.get("/action-logs", dependencies=[Depends(admission.dependency("admin"))])
+async def action_logs(
+    limit: int = Query(500, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    user_id: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    _=Depends(require_superadmin),
+    db: Session = Depends(get_read_db)
+):
+    """Newest-first action logs with keyset pagination on (timestamp, id).
+
+    Filters: user_id, action (case-insensitive substring), since/until (ISO timestamps).
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
+    """
     try:
-        logs = db.query(ActionLog).order_by(desc(ActionLog.timestamp)).limit(500).all()
-        return [
+        query = db.query(ActionLog)
+        if user_id:
+            query = query.filter(ActionLog.user_id == uuid.UUID(user_id))
+        if action:
+            escaped = action.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+            query = query.filter(ActionLog.action.ilike(f"%{escaped}%", escape="!"))
+        if since:
+            query = query.filter(ActionLog.timestamp >= since)
+        if until:
+            query = query.filter(ActionLog.timestamp < until)
+        if cursor:
+            try:
+                cursor_ts, cursor_id = _decode_log_cursor(cursor)
+            except ValueError:
+                return JSONResponse({"error": "Invalid cursor"}, status_code=400)
+            query = query.filter(tuple_(ActionLog.timestamp, ActionLog.id) < tuple_(cursor_ts, cursor_id))
+
+        logs = query.order_by(desc(ActionLog.timestamp), desc(ActionLog.id)).limit(limit + 1).all()
+        has_more = len(logs) > limit
+        logs = logs[:limit]
+
+        response = JSONResponse([
             {
                 "id": str(log.id),
                 "user_id": str(log.user_id),
@@ -118,12 +277,79 @@ async def action_logs(_=Depends(require_superadmin), db: Session = Depends(get_d
                 "timestamp": log.timestamp.isoformat() if log.timestamp else None
             }
             for log in logs
-        ]
+        ])
+        if has_more and logs[-1].timestamp:
+            response.headers["X-Next-Cursor"] = _encode_log_cursor(logs[-1])
+        return response
+    except ValueError:
+        return JSONResponse({"error": "Invalid user_id format"}, status_code=400)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@router.get("/action-logs/stats")
+async def action_logs_stats(_=Depends(require_superadmin)):
+    """Write-behind action log buffer metrics (pending, flushed, dropped, delay)."""
+    return audit_log.stats()
+
+@router.get("/admission/stats")
+async def admission_stats(_=Depends(require_superadmin)):
+    """Per route class: concurrency limiter (in flight, queued, rejections) and per-user rate limit counters."""
+    return admission.stats()
+
+@router.get("/ws/stats")
+async def ws_stats(_=Depends(require_superadmin)):
+    """/ws/n8n fan-out counters: live connections, coalesced messages, reaped sockets, cap rejections."""
+    return broadcaster.stats()
+
+@router.get("/archive/stats")
+async def archive_stats(_=Depends(require_superadmin), db: Session = Depends(get_read_db)):
+    """Cold-storage archiver: settings, run counters and segments/executions/bytes per instance."""
+    try:
+        return archiver.stats(db)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
+@router.post("/archive/run")
+async def run_archive(_=Depends(require_superadmin)):
+    """Archive now instead of waiting for the next interval; returns the number of executions moved."""
+    if not archiver.enabled:
+        return JSONResponse({"error": "Archiving is disabled (ARCHIVE_AFTER_DAYS=0)"}, status_code=400)
+    archived = await asyncio.to_thread(archiver.run_once)
+    return {"archived": archived, "last_error": archiver.last_error}
+
+@router.get("/db/query-stats")
+async def db_query_stats(_=Depends(require_superadmin)):
+    """SQL totals per route and background cycle, and the latest repeated-statement (N+1) reports."""
+    return query_metrics.stats()
+
+@router.get("/profiles")
+async def list_profiles(_=Depends(require_superadmin)):
+    """Captured request profiles, newest first (without the folded stacks)."""
+    return [
+        {key: value for key, value in profile.items() if key not in ("folded", "top_total")}
+        for profile in reversed(request_profiler.profiles)
+    ]
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, _=Depends(require_superadmin)):
+    profile = request_profiler.get(profile_id)
+    if not profile:
+        return JSONResponse({"error": "Profile not found"}, status_code=404)
+    return {key: value for key, value in profile.items() if key != "folded"}
+
+@router.get("/profiles/{profile_id}/download")
+async def download_profile(profile_id: str, _=Depends(require_superadmin)):
+    """Folded stacks (one "frame;frame;... count" line per stack) for flamegraph.pl or speedscope."""
+    profile = request_profiler.get(profile_id)
+    if not profile:
+        return JSONResponse({"error": "Profile not found"}, status_code=404)
+    return PlainTextResponse(
+        profile["folded"],
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'}
+    )
+
 @router.get("/workflow-access")
-async def workflow_access(_=Depends(require_superadmin), db: Session = Depends(get_db)):
+async def workflow_access(_=Depends(require_superadmin), db: Session = Depends(get_read_db)):
     try:
         access_records = db.query(UserWorkflowAccess).all()
         return [
@@ -136,6 +362,54 @@ async def workflow_access(_=Depends(require_superadmin), db: Session = Depends(g
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
+def _access_bitset(indexes: List[int], size: int) -> str:
+    """Bit i (byte i // 8, least significant bit first) set for every workflow index i; base64."""
+    mask = 0
+    for i in indexes:
+        mask |= 1 << i
+    return base64.b64encode(mask.to_bytes((size + 7) // 8, "little")).decode()
+
+@router.get("/workflow-access/matrix")
+async def workflow_access_matrix(
+    encoding: str = Query("bitset", pattern="^(bitset|list)$"),
+    _=Depends(require_superadmin),
+    db: Session = Depends(get_read_db)
+):
+    """All grants as one user x workflow matrix instead of one object per grant.
+
+    ``users`` and ``workflows`` map indexes to ids; ``access[i]`` holds the workflows
+    of users[i], as a base64 bitset over ``workflows`` or as a list of indexes.
+    """
+    try:
+        user_ids = [str(uid) for (uid,) in db.query(Profile.id).order_by(Profile.email)]
+        workflow_ids = [wid for (wid,) in db.query(N8NWorkflow.id).order_by(N8NWorkflow.id)]
+        # One row per user with grants, aggregated in the database
+        granted = dict(
+            db.query(UserWorkflowAccess.user_id, func.array_agg(UserWorkflowAccess.workflow_id))
+            .group_by(UserWorkflowAccess.user_id)
+            .all()
+        )
+        workflow_index = {wid: i for i, wid in enumerate(workflow_ids)}
+        access: List[Any] = []
+        for uid in user_ids:
+            indexes = sorted(workflow_index[wid] for wid in granted.get(uuid.UUID(uid), ()) if wid in workflow_index)
+            access.append(_access_bitset(indexes, len(workflow_ids)) if encoding == "bitset" else indexes)
+        return {
+            "encoding": encoding,
+            "users": user_ids,
+            "workflows": workflow_ids,
+            "access": access
+        }
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def _access_changed(user_ids):
+    """Reload the grants of these users' open /ws/n8n sockets; on failure the heartbeat catches up."""
+    try:
+        await broadcaster.refresh_access(user_ids)
+    except Exception:
+        pass
+
 @router.post("/workflow-access/grant")
 async def grant_workflow_access(request: Request, _=Depends(require_superadmin), db: Session = Depends(get_db)):
     body = await request.json()
@@ -155,6 +429,7 @@ async def grant_workflow_access(request: Request, _=Depends(require_superadmin),
         access = UserWorkflowAccess(user_id=user_id, workflow_id=workflow_id)
         db.add(access)
         db.commit()
+        await _access_changed([user_id])
         return {"success": True}
     except ValueError:
         return JSONResponse({"error": "Invalid user_id format"}, status_code=400)
@@ -163,39 +438,47 @@ async def grant_workflow_access(request: Request, _=Depends(require_superadmin),
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
+def _bulk_access_ids(body: dict):
+    """(user ids, workflow ids) of a bulk grant/revoke body; ``user_ids`` or a single ``user_id``."""
+    user_ids = body.get("user_ids") or ([body["user_id"]] if body.get("user_id") else [])
+    workflow_ids = body.get("workflow_ids") or []
+    return {uuid.UUID(str(u)) for u in user_ids if u}, {str(wf_id) for wf_id in workflow_ids if wf_id}
+
 @router.post("/workflow-access/grant-bulk")
 async def grant_workflow_access_bulk(request: Request, _=Depends(require_superadmin), db: Session = Depends(get_db)):
-    """Grant workflow access to a user for multiple workflows in one call (idempotent)."""
+    """Grant every listed user access to every listed workflow in one INSERT ... SELECT (idempotent).
+
+    Body: { user_ids | user_id, workflow_ids }. Unknown users/workflows and existing
+    grants are skipped.
+    """
     body = await request.json()
-    user_id_str = body.get("user_id")
-    workflow_ids = body.get("workflow_ids") or []
-    if not user_id_str or not workflow_ids:
-        return JSONResponse({"error": "Missing user_id or workflow_ids"}, status_code=400)
     try:
-        user_id = uuid.UUID(user_id_str)
-        workflow_id_set = {str(wf_id) for wf_id in workflow_ids if wf_id}
-        if not workflow_id_set:
-            return JSONResponse({"error": "workflow_ids is empty"}, status_code=400)
-
-        # Find existing to keep operation idempotent
-        existing_rows = db.query(UserWorkflowAccess.workflow_id).filter(
-            UserWorkflowAccess.user_id == user_id,
-            UserWorkflowAccess.workflow_id.in_(workflow_id_set)
-        ).all()
-        existing_ids = {row[0] for row in existing_rows}
-
-        to_create = workflow_id_set - existing_ids
-        for wf_id in to_create:
-            db.add(UserWorkflowAccess(user_id=user_id, workflow_id=wf_id))
+        user_id_set, workflow_id_set = _bulk_access_ids(body)
+    except ValueError:
+        return JSONResponse({"error": "Invalid user_id format"}, status_code=400)
+    if not user_id_set or not workflow_id_set:
+        return JSONResponse({"error": "Missing user_ids or workflow_ids"}, status_code=400)
+    try:
+        # Cross product of the ids that exist; the primary key makes re-grants no-ops
+        pairs = (
+            db.query(Profile.id, N8NWorkflow.id)
+            .join(N8NWorkflow, true())
+            .filter(Profile.id.in_(user_id_set), N8NWorkflow.id.in_(workflow_id_set))
+        )
+        granted = db.execute(
+            pg_insert(UserWorkflowAccess)
+            .from_select(["user_id", "workflow_id"], pairs.statement)
+            .on_conflict_do_nothing()
+        ).rowcount
         db.commit()
+        await _access_changed(user_id_set)
 
+        total = len(user_id_set) * len(workflow_id_set)
         return {
-            "granted": len(to_create),
-            "skipped": len(existing_ids),
-            "total_requested": len(workflow_id_set)
+            "granted": granted,
+            "skipped": total - granted,
+            "total_requested": total
         }
-    except ValueError:
-        return JSONResponse({"error": "Invalid user_id format"}, status_code=400)
     except Exception as e:
         db.rollback()
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -217,6 +500,7 @@ async def revoke_workflow_access(request: Request, _=Depends(require_superadmin)
         if access:
             db.delete(access)
             db.commit()
+            await _access_changed([user_id])
         return {"success": True}
     except ValueError:
         return JSONResponse({"error": "Invalid user_id format"}, status_code=400)
@@ -227,30 +511,29 @@ async def revoke_workflow_access(request: Request, _=Depends(require_superadmin)
 
 @router.post("/workflow-access/revoke-bulk")
 async def revoke_workflow_access_bulk(request: Request, _=Depends(require_superadmin), db: Session = Depends(get_db)):
-    """Revoke workflow access for multiple workflows in one call (idempotent)."""
+    """Revoke every listed user's access to every listed workflow in one DELETE (idempotent).
+
+    Body: { user_ids | user_id, workflow_ids }.
+    """
     body = await request.json()
-    user_id_str = body.get("user_id")
-    workflow_ids = body.get("workflow_ids") or []
-    if not user_id_str or not workflow_ids:
-        return JSONResponse({"error": "Missing user_id or workflow_ids"}, status_code=400)
     try:
-        user_id = uuid.UUID(user_id_str)
-        workflow_id_set = {str(wf_id) for wf_id in workflow_ids if wf_id}
-        if not workflow_id_set:
-            return JSONResponse({"error": "workflow_ids is empty"}, status_code=400)
-
+        user_id_set, workflow_id_set = _bulk_access_ids(body)
+    except ValueError:
+        return JSONResponse({"error": "Invalid user_id format"}, status_code=400)
+    if not user_id_set or not workflow_id_set:
+        return JSONResponse({"error": "Missing user_ids or workflow_ids"}, status_code=400)
+    try:
         deleted = db.query(UserWorkflowAccess).filter(
-            UserWorkflowAccess.user_id == user_id,
+            UserWorkflowAccess.user_id.in_(user_id_set),
             UserWorkflowAccess.workflow_id.in_(workflow_id_set)
         ).delete(synchronize_session=False)
         db.commit()
+        await _access_changed(user_id_set)
 
         return {
             "revoked": deleted,
-            "total_requested": len(workflow_id_set)
+            "total_requested": len(user_id_set) * len(workflow_id_set)
         }
-    except ValueError:
-        return JSONResponse({"error": "Invalid user_id format"}, status_code=400)
     except Exception as e:
         db.rollback()
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -258,7 +541,7 @@ async def revoke_workflow_access_bulk(request: Request, _=Depends(require_supera
 # ---- n8n instances management ----
 
 @router.get("/instances")
-async def admin_instances_list(_=Depends(require_superadmin), db: Session = Depends(get_db)):
+async def admin_instances_list(_=Depends(require_superadmin), db: Session = Depends(get_read_db)):
     try:
         instances = db.query(N8NInstance).order_by(N8NInstance.name).all()
         return [
@@ -274,6 +557,86 @@ async def admin_instances_list(_=Depends(require_superadmin), db: Session = Depe
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
+@router.get("/instances/http-stats")
+async def admin_instances_http_stats(_=Depends(require_superadmin)):
+    """Per-instance HTTP client counters: requests vs. new TCP connections / TLS handshakes."""
+    return n8n_clients.stats()
+
+@router.get("/instances/sync-state")
+async def admin_instances_sync_state(_=Depends(require_superadmin), db: Session = Depends(get_read_db)):
+    """Persisted sync checkpoint per configured instance: execution watermark, catch-up and backoff."""
+    try:
+        states = sync_checkpoints.load(db)
+        return [
+            sync_checkpoints.payload(inst, states.get(inst["instance_id"]) or sync_checkpoints.empty())
+            for inst in instance_registry.snapshot()
+        ]
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@router.get("/instances/backfill")
+async def admin_instances_backfill_list(_=Depends(require_superadmin), db: Session = Depends(get_read_db)):
+    """Progress of every history backfill job."""
+    try:
+        jobs = db.query(N8NBackfillJob).order_by(desc(N8NBackfillJob.created_at)).all()
+        return [job_payload(job, backfill.is_running(job.id)) for job in jobs]
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@router.get("/instances/{instance_id}/backfill")
+async def admin_instances_backfill_get(instance_id: str, _=Depends(require_superadmin), db: Session = Depends(get_db)):
+    try:
+        job = db.query(N8NBackfillJob).filter(N8NBackfillJob.instance_id == uuid.UUID(instance_id)).first()
+        if not job:
+            return JSONResponse({"error": "No backfill job for this instance"}, status_code=404)
+        return job_payload(job, backfill.is_running(job.id))
+    except ValueError:
+        return JSONResponse({"error": "Invalid instance_id format"}, status_code=400)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@router.post("/instances/{instance_id}/backfill")
+async def admin_instances_backfill_start(instance_id: str, _=Depends(require_superadmin), db: Session = Depends(get_db)):
+    """Retry a failed backfill from its checkpoint, or re-run a completed one from the start."""
+    try:
+        instance_uuid = uuid.UUID(instance_id)
+        if not db.query(N8NInstance).filter(N8NInstance.id == instance_uuid).first():
+            return JSONResponse({"error": "Instance not found"}, status_code=404)
+        job = db.query(N8NBackfillJob).filter(N8NBackfillJob.instance_id == instance_uuid).first()
+        if not job:
+            job = N8NBackfillJob(instance_id=instance_uuid)
+            db.add(job)
+        elif job.status in ("pending", "running"):
+            return JSONResponse({"error": "Backfill already in progress"}, status_code=409)
+        else:
+            if job.status == "completed":
+                job.cursor = None
+                job.pages_fetched = 0
+                job.executions_loaded = 0
+                job.started_at = None
+            job.status = "pending"
+            job.attempts = 0
+            job.last_error = None
+            job.finished_at = None
+        db.commit()
+        await backfill.kick()
+        db.refresh(job)
+        return job_payload(job, backfill.is_running(job.id))
+    except ValueError:
+        return JSONResponse({"error": "Invalid instance_id format"}, status_code=400)
+    except Exception as e:
+        db.rollback()
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+def _api_key_taken(db: Session, api_key: str, exclude_id: Optional[uuid.UUID] = None) -> bool:
+    """Whether another instance (stored or configured via env) uses this api key; /ingest identifies instances by it."""
+    query = db.query(N8NInstance.id).filter(N8NInstance.api_key == api_key)
+    if exclude_id is not None:
+        query = query.filter(N8NInstance.id != exclude_id)
+    if query.first() is not None:
+        return True
+    return any(inst["api_key"] == api_key and inst["instance_id"] != exclude_id for inst in instance_registry.snapshot())
+
 @router.post("/instances")
 async def admin_instances_create(request: Request, _=Depends(require_superadmin), db: Session = Depends(get_db)):
     body = await request.json()
@@ -291,6 +654,8 @@ async def admin_instances_create(request: Request, _=Depends(require_superadmin)
     if not api_key:
         return JSONResponse({"error": "API Key is required"}, status_code=400)
     try:
+        if _api_key_taken(db, api_key):
+            return JSONResponse({"error": "Another instance already uses this API key"}, status_code=409)
         instance = N8NInstance(
             identifier=identifier,
             name=name,
@@ -299,7 +664,12 @@ async def admin_instances_create(request: Request, _=Depends(require_superadmin)
             active=active
         )
         db.add(instance)
+        db.flush()
+        # Committed with the instance, so the history import resumes on restart even if it never started here
+        db.add(N8NBackfillJob(instance_id=instance.id))
         db.commit()
+        instance_registry.invalidate()
+        await backfill.kick()
         db.refresh(instance)
         return {
             "id": str(instance.id),
@@ -337,11 +707,15 @@ async def admin_instances_update(instance_id: str, request: Request, _=Depends(r
             api_key = (body["api_key"] or "").strip()
             if not api_key:
                 return JSONResponse({"error": "API Key is required"}, status_code=400)
+            if _api_key_taken(db, api_key, exclude_id=instance_uuid):
+                return JSONResponse({"error": "Another instance already uses this API key"}, status_code=409)
             instance.api_key = api_key
         if "active" in body:
             instance.active = bool(body["active"])
         
         db.commit()
+        instance_registry.invalidate()
+        await backfill.kick()  # a pending backfill waits for its instance to be active
         db.refresh(instance)
         return {
             "id": str(instance.id),
@@ -364,6 +738,7 @@ async def admin_instances_delete(instance_id: str, _=Depends(require_superadmin)
         if instance:
             db.delete(instance)
             db.commit()
+            instance_registry.invalidate()
         return {"success": True}
     except ValueError:
         return JSONResponse({"error": "Invalid instance_id format"}, status_code=400)
@@ -1,5 +1,4 @@
 import secrets
-from datetime import datetime
 import bcrypt
 import jwt
 from fastapi import APIRouter, Request, Depends, Query
@@ -7,7 +6,8 @@ from fastapi.responses import RedirectResponse, JSONResponse
 from sqlalchemy.orm import Session
 from ..core.config import JWT_SECRET, get_allowed_origins
 from ..database.database import get_db
-from ..database.models import Profile, ActionLog
+from ..database.models import Profile
+from ..services.audit_log import audit_log
 from ..services.auth_service import get_authorization_url, verify_google_token, exchange_code_for_token
 import uuid
 
@@ -90,9 +90,7 @@ async def auth_callback_get(
         token = jwt.encode(payload, JWT_SECRET, algorithm="HS256")
         
         # Log the action
-        action_log = ActionLog(user_id=user_id, action="Logged in via Google OAuth", timestamp=datetime.utcnow())
-        db.add(action_log)
-        db.commit()
+        audit_log.log(user_id, "Logged in via Google OAuth")
         
         # Redirect to frontend with cookie set
         primary_frontend = get_allowed_origins()[0] if get_allowed_origins() else "http://localhost:3000"
@@ -180,13 +178,7 @@ async def _process_user_login(user_info: dict, db: Session):
     token = jwt.encode(payload, JWT_SECRET, algorithm="HS256")
     
     # Log the action
-    action_log = ActionLog(
-        user_id=user_id,
-        action="Logged in via Google OAuth",
-        timestamp=datetime.utcnow()
-    )
-    db.add(action_log)
-    db.commit()
+    audit_log.log(user_id, "Logged in via Google OAuth")
     
     # Return response with cookie
     response = JSONResponse({"success": True})
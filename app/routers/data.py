@@ -1,12 +1,27 @@
-from fastapi import APIRouter, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, and_, or_, func, literal
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from datetime import datetime
+import asyncio
+import base64
+import csv
+import io
+import itertools
+import json
 import uuid
+import zlib
 from ..core.deps import get_current_user
-from ..database.database import get_db
-from ..database.models import Profile, N8NWorkflow, N8NExecution, UserWorkflowAccess
-from app.services.n8n_sync import _load_instances
+from ..core.admission import admission
+from ..database.database import get_db, get_read_db, ReadSessionLocal
+from ..database.models import (
+    Profile, N8NWorkflow, N8NExecution, N8NWorkflowSummary, N8NWorkflowBlob, N8NWorkflowVersion, UserWorkflowAccess
+)
+from app.services.instance_registry import instance_registry
+from app.services.execution_detail import get_execution_detail, ExecutionDetailError
+from app.services.change_journal import read_changes
+from app.services.archive import iter_execution_history, archiver
 
 router = APIRouter()
 
@@ -15,94 +30,467 @@ async def dashboard(user=Depends(get_current_user)):
     return {"message": f"Welcome {user['email']}", "workflows": []}
 
 @router.get("/me")
-async def me(user=Depends(get_current_user), db: Session = Depends(get_db)):
+async def me(user=Depends(get_current_user), db: Session = Depends(get_read_db)):
     """Return current user profile. Prefer DB values; fall back to JWT claim for role."""
     try:
         user_id = uuid.UUID(user["id"])
         profile = db.query(Profile).filter(Profile.id == user_id).first()
-        if not profile:
-            return {"id": user.get("id"), "email": user.get("email"), "role": user.get("role", "user")}
-        role = profile.role or user.get("role", "user")
-        return {
-            "id": str(profile.id),
-            "email": profile.email,
-            "role": role
-        }
+        return _profile_payload(profile, user)
     except Exception:
         return {"id": user.get("id"), "email": user.get("email"), "role": user.get("role", "user")}
 
-@router.get("/workflows")
-async def list_workflows(user=Depends(get_current_user), db: Session = Depends(get_db)):
+def _iso(value):
+    return value.isoformat() if value else None
+
+def _profile_payload(profile: Optional[Profile], user: Dict[str, Any]) -> Dict[str, Any]:
+    """Prefer DB values; fall back to JWT claims."""
+    if not profile:
+        return {"id": user.get("id"), "email": user.get("email"), "role": user.get("role", "user")}
+    return {"id": str(profile.id), "email": profile.email, "role": profile.role or user.get("role", "user")}
+
+def _query_workflows(db: Session, user_id: uuid.UUID, is_superadmin: bool,
+                     limit: Optional[int] = None, offset: int = 0,
+                     instance_id: Optional[uuid.UUID] = None) -> List[Dict[str, Any]]:
+    """Workflows visible to the user with their execution summary, newest first."""
+    query = db.query(N8NWorkflow, N8NWorkflowSummary).outerjoin(
+        N8NWorkflowSummary, N8NWorkflowSummary.workflow_id == N8NWorkflow.id
+    )
+    if not is_superadmin:
+        # Only workflows granted to this user
+        query = query.join(UserWorkflowAccess, and_(
+            UserWorkflowAccess.workflow_id == N8NWorkflow.id,
+            UserWorkflowAccess.user_id == user_id
+        ))
+    if instance_id is not None:
+        query = query.filter(N8NWorkflow.instance_id == instance_id)
+    query = query.order_by(desc(N8NWorkflow.updated_at), N8NWorkflow.id).offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    return [_workflow_payload(wf, summary) for wf, summary in query.all()]
+
+def _workflow_payload(wf: N8NWorkflow, summary: Optional[N8NWorkflowSummary]) -> Dict[str, Any]:
+    return {
+        "id": wf.id,
+        "instance_id": str(wf.instance_id),
+        "n8n_id": wf.n8n_id,
+        "name": wf.name,
+        "active": wf.active,
+        "updated_at": _iso(wf.updated_at),
+        "definition_hash": wf.definition_hash,
+        "last_execution_id": summary.last_execution_id if summary else None,
+        "last_status": summary.last_status if summary else None,
+        "last_started_at": _iso(summary.last_started_at) if summary else None,
+        "execution_count": summary.execution_count + summary.archived_count if summary else 0,
+        "archived_count": summary.archived_count if summary else 0,
+        "running_count": summary.running_count if summary else 0,
+        "success_24h": summary.success_24h if summary else 0,
+        "error_24h": summary.error_24h if summary else 0
+    }
+
+def _search_workflows(db: Session, user_id: uuid.UUID, is_superadmin: bool, q: str, limit: int,
+                      instance_id: Optional[uuid.UUID] = None) -> List[Dict[str, Any]]:
+    """Visible workflows whose name contains ``q`` or is word-similar to it (pg_trgm), best first.
+
+    Both predicates are served by the trigram GIN index on n8n_workflows.name. Names starting
+    with ``q`` rank first, then by word_similarity, then alphabetically.
+    """
+    escaped = q.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+    score = func.word_similarity(q, N8NWorkflow.name)
+    query = db.query(N8NWorkflow, N8NWorkflowSummary, score).outerjoin(
+        N8NWorkflowSummary, N8NWorkflowSummary.workflow_id == N8NWorkflow.id
+    )
+    if not is_superadmin:
+        query = query.join(UserWorkflowAccess, and_(
+            UserWorkflowAccess.workflow_id == N8NWorkflow.id,
+            UserWorkflowAccess.user_id == user_id
+        ))
+    if instance_id is not None:
+        query = query.filter(N8NWorkflow.instance_id == instance_id)
+    query = query.filter(or_(
+        N8NWorkflow.name.ilike(f"%{escaped}%", escape="!"),
+        literal(q).op("<%")(N8NWorkflow.name)
+    )).order_by(
+        N8NWorkflow.name.ilike(f"{escaped}%", escape="!").desc(), desc(score), N8NWorkflow.name, N8NWorkflow.id
+    ).limit(limit)
+    return [{**_workflow_payload(wf, summary), "score": round(float(rank), 3)} for wf, summary, rank in query.all()]
+
+def _query_executions(db: Session, user_id: uuid.UUID, is_superadmin: bool,
+                      limit: Optional[int] = None, offset: int = 0,
+                      instance_id: Optional[uuid.UUID] = None) -> List[Dict[str, Any]]:
+    """Executions of workflows visible to the user, newest first."""
+    query = db.query(N8NExecution)
+    if not is_superadmin:
+        query = query.join(UserWorkflowAccess, and_(
+            UserWorkflowAccess.workflow_id == N8NExecution.workflow_id,
+            UserWorkflowAccess.user_id == user_id
+        ))
+    if instance_id is not None:
+        query = query.filter(N8NExecution.instance_id == instance_id)
+    query = query.order_by(desc(N8NExecution.started_at), N8NExecution.id).offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    return [
+        {
+            "id": ex.id,
+            "instance_id": str(ex.instance_id),
+            "n8n_id": ex.n8n_id,
+            "workflow_id": ex.workflow_id,
+            "status": ex.status,
+            "finished": ex.finished,
+            "started_at": _iso(ex.started_at),
+            "stopped_at": _iso(ex.stopped_at)
+        }
+        for ex in query.all()
+    ]
+
+def _in_read_session(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a query helper on its own read session (for concurrent use from worker threads)."""
+    db = ReadSessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+def _page(items: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+    return {"items": items[:limit], "limit": limit, "offset": 0, "has_more": len(items) > limit}
+
+def _instance_filter(instance: Optional[str]) -> Optional[uuid.UUID]:
+    """Resolve an instance prefix query parameter to its instance_id (raises LookupError if unknown)."""
+    if not instance:
+        return None
+    inst = instance_registry.get(instance)
+    if not inst:
+        raise LookupError(f"Unknown instance '{instance}'")
+    return inst["instance_id"]
+
+@router.get("/workflows", dependencies=[Depends(admission.dependency("list"))])
+async def list_workflows(
+    instance: Optional[str] = Query(None, description="Only workflows of this instance (prefix)"),
+    user=Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Workflows visible to the user, with last-run status and execution counts from the summary table."""
+    try:
+        instance_id = _instance_filter(instance)
+    except LookupError as e:
+        return JSONResponse({"error": str(e)}, status_code=404)
     try:
         user_id = uuid.UUID(user["id"])
         profile = db.query(Profile).filter(Profile.id == user_id).first()
         role = profile.role if profile else None
-        
-        if role == "superadmin":
-            workflows = db.query(N8NWorkflow).order_by(desc(N8NWorkflow.updated_at)).all()
-        else:
-            # Get allowed workflow IDs for this user
-            access_records = db.query(UserWorkflowAccess).filter(
-                UserWorkflowAccess.user_id == user_id
-            ).all()
-            allowed_ids = [str(acc.workflow_id) for acc in access_records]
-            if not allowed_ids:
-                return []
-            workflows = db.query(N8NWorkflow).filter(
-                N8NWorkflow.id.in_(allowed_ids)
-            ).order_by(desc(N8NWorkflow.updated_at)).all()
-        
-        return [
-            {
-                "id": wf.id,
-                "name": wf.name,
-                "active": wf.active,
-                "updated_at": wf.updated_at.isoformat() if wf.updated_at else None
-            }
-            for wf in workflows
-        ]
+        return _query_workflows(db, user_id, role == "superadmin", instance_id=instance_id)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@router.get("/workflows/search", dependencies=[Depends(admission.dependency("search"))])
+async def search_workflows(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=200),
+    instance: Optional[str] = Query(None, description="Only workflows of this instance (prefix)"),
+    user=Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Typeahead search over workflow names, ranked and access-filtered; same rows as /workflows plus score."""
+    try:
+        instance_id = _instance_filter(instance)
+    except LookupError as e:
+        return JSONResponse({"error": str(e)}, status_code=404)
+    query = q.strip()
+    if not query:
+        return []
+    try:
+        user_id = uuid.UUID(user["id"])
+        profile = db.query(Profile).filter(Profile.id == user_id).first()
+        role = profile.role if profile else None
+        return _search_workflows(db, user_id, role == "superadmin", query, limit, instance_id=instance_id)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
-@router.get("/executions")
-async def list_executions(user=Depends(get_current_user), db: Session = Depends(get_db)):
+@router.get("/executions", dependencies=[Depends(admission.dependency("list"))])
+async def list_executions(
+    instance: Optional[str] = Query(None, description="Only executions of this instance (prefix)"),
+    user=Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    try:
+        instance_id = _instance_filter(instance)
+    except LookupError as e:
+        return JSONResponse({"error": str(e)}, status_code=404)
     try:
         user_id = uuid.UUID(user["id"])
         profile = db.query(Profile).filter(Profile.id == user_id).first()
         role = profile.role if profile else None
-        
-        if role == "superadmin":
-            executions = db.query(N8NExecution).order_by(desc(N8NExecution.started_at)).all()
-        else:
-            # Get allowed workflow IDs for this user
-            access_records = db.query(UserWorkflowAccess).filter(
-                UserWorkflowAccess.user_id == user_id
-            ).all()
-            allowed_ids = [str(acc.workflow_id) for acc in access_records]
-            if not allowed_ids:
-                return []
-            executions = db.query(N8NExecution).filter(
-                N8NExecution.workflow_id.in_(allowed_ids)
-            ).order_by(desc(N8NExecution.started_at)).all()
-        
+        return _query_executions(db, user_id, role == "superadmin", instance_id=instance_id)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@router.get("/bootstrap", dependencies=[Depends(admission.dependency("list"))])
+async def bootstrap(
+    workflows_limit: int = Query(50, ge=1, le=500),
+    executions_limit: int = Query(50, ge=1, le=500),
+    user=Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Initial dashboard data in one round trip: profile, instances, first workflows and executions pages.
+
+    The user and access scope are resolved once; the workflow and execution queries run concurrently
+    on separate read sessions.
+    """
+    try:
+        user_id = uuid.UUID(user["id"])
+        profile = db.query(Profile).filter(Profile.id == user_id).first()
+        db.close()  # release the connection before fanning out
+        is_superadmin = bool(profile and profile.role == "superadmin")
+
+        workflows, executions = await asyncio.gather(
+            asyncio.to_thread(_in_read_session, _query_workflows, user_id, is_superadmin, workflows_limit + 1),
+            asyncio.to_thread(_in_read_session, _query_executions, user_id, is_superadmin, executions_limit + 1),
+        )
+        return {
+            "profile": _profile_payload(profile, user),
+            "instances": [
+                {"prefix": i["prefix"], "name": i["name"], "base_url": i.get("base_url")}
+                for i in instance_registry.snapshot()
+            ],
+            "workflows": _page(workflows, workflows_limit),
+            "executions": _page(executions, executions_limit)
+        }
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+def _can_see_workflow(db: Session, user_id: uuid.UUID, workflow_id: str) -> bool:
+    """Superadmins see everything; users only workflows granted in user_workflow_access."""
+    profile = db.query(Profile).filter(Profile.id == user_id).first()
+    if profile and profile.role == "superadmin":
+        return True
+    return db.query(UserWorkflowAccess).filter(
+        UserWorkflowAccess.user_id == user_id,
+        UserWorkflowAccess.workflow_id == workflow_id
+    ).first() is not None
+
+@router.get("/workflows/{workflow_id}/versions")
+async def list_workflow_versions(workflow_id: str, user=Depends(get_current_user), db: Session = Depends(get_read_db)):
+    """Definition history of a workflow, newest first (a version is recorded when the definition hash changes)."""
+    try:
+        if not _can_see_workflow(db, uuid.UUID(user["id"]), workflow_id):
+            return JSONResponse({"error": "Workflow not found"}, status_code=404)
+        rows = db.query(N8NWorkflowVersion, N8NWorkflowBlob.size_bytes).join(
+            N8NWorkflowBlob, N8NWorkflowBlob.hash == N8NWorkflowVersion.definition_hash
+        ).filter(N8NWorkflowVersion.workflow_id == workflow_id).order_by(desc(N8NWorkflowVersion.id)).all()
         return [
             {
-                "id": ex.id,
-                "workflow_id": ex.workflow_id,
-                "status": ex.status,
-                "finished": ex.finished,
-                "started_at": ex.started_at.isoformat() if ex.started_at else None,
-                "stopped_at": ex.stopped_at.isoformat() if ex.stopped_at else None
+                "id": version.id,
+                "definition_hash": version.definition_hash,
+                "n8n_updated_at": _iso(version.n8n_updated_at),
+                "recorded_at": _iso(version.recorded_at),
+                "size_bytes": size_bytes
             }
-            for ex in executions
+            for version, size_bytes in rows
         ]
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
+@router.get("/workflows/{workflow_id}/versions/{version_id}")
+async def get_workflow_version(workflow_id: str, version_id: int, user=Depends(get_current_user), db: Session = Depends(get_read_db)):
+    """One version with its definition (nodes, connections, settings)."""
+    try:
+        if not _can_see_workflow(db, uuid.UUID(user["id"]), workflow_id):
+            return JSONResponse({"error": "Workflow not found"}, status_code=404)
+        row = db.query(N8NWorkflowVersion, N8NWorkflowBlob).join(
+            N8NWorkflowBlob, N8NWorkflowBlob.hash == N8NWorkflowVersion.definition_hash
+        ).filter(N8NWorkflowVersion.workflow_id == workflow_id, N8NWorkflowVersion.id == version_id).first()
+        if not row:
+            return JSONResponse({"error": "Version not found"}, status_code=404)
+        version, blob = row
+        return {
+            "id": version.id,
+            "workflow_id": version.workflow_id,
+            "definition_hash": version.definition_hash,
+            "n8n_updated_at": _iso(version.n8n_updated_at),
+            "recorded_at": _iso(version.recorded_at),
+            "definition": json.loads(zlib.decompress(blob.definition))
+        }
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+def _encode_history_cursor(row: Dict[str, Any]) -> str:
+    raw = f"{row['started_at']}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode_history_cursor(cursor: str):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    ts, execution_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+    return datetime.fromisoformat(ts), execution_id
+
+def _history_page(db: Session, user_id: uuid.UUID, is_superadmin: bool, filters: Dict[str, Any], limit: int):
+    """(up to limit + 1 rows, number of archive segments skipped because their file is missing)."""
+    missing: List[str] = []
+    rows = list(itertools.islice(iter_execution_history(db, user_id, is_superadmin, missing=missing, **filters), limit + 1))
+    return rows, len(missing)
+
+def _history_filters(instance: Optional[str], workflow_id: Optional[str], since: Optional[datetime],
+                     until: Optional[datetime], cursor: Optional[str]) -> Dict[str, Any]:
+    """Keyword arguments for iter_execution_history (raises LookupError / ValueError on bad input)."""
+    return {
+        "instance_id": _instance_filter(instance),
+        "workflow_id": workflow_id,
+        "since": since,
+        "until": until,
+        "before": _decode_history_cursor(cursor) if cursor else None,
+    }
+
+@router.get("/executions/history", dependencies=[Depends(admission.dependency("list"))])
+async def execution_history(
+    instance: Optional[str] = Query(None, description="Only executions of this instance (prefix)"),
+    workflow_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Newest-first execution history across the hot table and archived segments.
+
+    Keyset pagination on (started_at, id): pass the X-Next-Cursor response header back as `cursor`.
+    """
+    try:
+        filters = _history_filters(instance, workflow_id, since, until, cursor)
+    except LookupError as e:
+        return JSONResponse({"error": str(e)}, status_code=404)
+    except ValueError:
+        return JSONResponse({"error": "Invalid cursor"}, status_code=400)
+    try:
+        user_id = uuid.UUID(user["id"])
+        profile = db.query(Profile).filter(Profile.id == user_id).first()
+        db.close()  # segment files are read off the event loop on a session of their own
+        is_superadmin = bool(profile and profile.role == "superadmin")
+        rows, missing_segments = await asyncio.to_thread(_in_read_session, _history_page, user_id, is_superadmin, filters, limit)
+        response = JSONResponse(rows[:limit])
+        if len(rows) > limit:
+            response.headers["X-Next-Cursor"] = _encode_history_cursor(rows[limit - 1])
+        if missing_segments:
+            response.headers["X-Missing-Segments"] = str(missing_segments)
+        return response
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+_EXPORT_COLUMNS = ["id", "instance_id", "n8n_id", "workflow_id", "status", "finished", "started_at", "stopped_at", "archived"]
+
+def _open_export(user_id: uuid.UUID, is_superadmin: bool, filters: Dict[str, Any]):
+    """Start the history merge before the response headers go out, so missing segments can be reported.
+
+    Returns (session, rows, missing segment count); the session is closed by _export_lines.
+    """
+    db = ReadSessionLocal()
+    try:
+        missing: List[str] = []
+        rows = iter_execution_history(db, user_id, is_superadmin, missing=missing, **filters)
+        first = list(itertools.islice(rows, 1))
+        return db, itertools.chain(first, rows), len(missing)
+    except Exception:
+        db.close()
+        raise
+
+def _export_lines(db: Session, rows: Iterator[Dict[str, Any]], fmt: str) -> Iterator[str]:
+    try:
+        if fmt == "jsonl":
+            for row in rows:
+                yield json.dumps(row, separators=(",", ":")) + "\n"
+            return
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=_EXPORT_COLUMNS)
+        writer.writeheader()
+        for batch in iter(lambda: list(itertools.islice(rows, 500)), []):
+            writer.writerows(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    finally:
+        db.close()
+
+@router.get("/executions/export", dependencies=[Depends(admission.dependency("list"))])
+async def export_executions(
+    instance: Optional[str] = Query(None, description="Only executions of this instance (prefix)"),
+    workflow_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    format: str = Query("jsonl", pattern="^(jsonl|csv)$"),
+    user=Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Stream the execution history (hot and archived, newest first) as JSON lines or CSV."""
+    try:
+        filters = _history_filters(instance, workflow_id, since, until, None)
+    except LookupError as e:
+        return JSONResponse({"error": str(e)}, status_code=404)
+    try:
+        user_id = uuid.UUID(user["id"])
+        profile = db.query(Profile).filter(Profile.id == user_id).first()
+        is_superadmin = bool(profile and profile.role == "superadmin")
+        db.close()
+        export_db, rows, missing_segments = await asyncio.to_thread(_open_export, user_id, is_superadmin, filters)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+    media_type = "application/x-ndjson" if format == "jsonl" else "text/csv"
+    headers = {"Content-Disposition": f'attachment; filename="executions.{format}"'}
+    if missing_segments:
+        headers["X-Missing-Segments"] = str(missing_segments)
+    return StreamingResponse(_export_lines(export_db, rows, format), media_type=media_type, headers=headers)
+
+@router.get("/executions/{execution_id}", dependencies=[Depends(admission.dependency("upstream"))])
+async def get_execution(execution_id: str, user=Depends(get_current_user), db: Session = Depends(get_db)):
+    """Full execution detail (including run data), fetched lazily from the owning instance and cached."""
+    try:
+        user_id = uuid.UUID(user["id"])
+        execution = db.query(N8NExecution).filter(N8NExecution.id == execution_id).first()
+        if not execution:
+            if archiver.enabled:
+                # Archive segments hold list columns only; finding the id would mean scanning them
+                return JSONResponse({
+                    "error": "Execution not found. Executions that started more than "
+                             f"{archiver.after_days:g} days ago are archived and have no detail",
+                    "archive_after_days": archiver.after_days,
+                }, status_code=404)
+            return JSONResponse({"error": "Execution not found"}, status_code=404)
+
+        if not _can_see_workflow(db, user_id, execution.workflow_id):
+            return JSONResponse({"error": "Execution not found"}, status_code=404)
+
+        # A cache miss is a blocking HTTP call of up to 30s; keep it off the event loop
+        detail, cached = await asyncio.to_thread(get_execution_detail, db, execution)
+        return {
+            "id": execution.id,
+            "workflow_id": execution.workflow_id,
+            "cached": cached,
+            "data": detail
+        }
+    except ExecutionDetailError as e:
+        return JSONResponse({"error": str(e)}, status_code=502)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@router.get("/changes", dependencies=[Depends(admission.dependency("list"))])
+async def list_changes(
+    since: int = Query(0, ge=0, description="Last version the client has applied (0 for none)"),
+    limit: int = Query(500, ge=1, le=5000),
+    user=Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Workflows and executions changed after ``since``, oldest first; pass the returned version back next time."""
+    try:
+        user_id = uuid.UUID(user["id"])
+        profile = db.query(Profile).filter(Profile.id == user_id).first()
+        role = profile.role if profile else None
+        return read_changes(db, user_id, role == "superadmin", since, limit)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
 @router.get("/instances")
 async def list_instances(user=Depends(get_current_user)):
     try:
-        insts = _load_instances()
+        insts = instance_registry.snapshot()
         return [{"prefix": i["prefix"], "name": i["name"], "base_url": i.get("base_url")} for i in insts]
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from ..core.readiness import readiness
+
+router = APIRouter()
+
+@router.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving the event loop. No DB access."""
+    return {"status": "ok"}
+
+@router.get("/readyz")
+async def readyz():
+    """Readiness: 200 once pools and caches are warm (and the first sync ran), otherwise 503."""
+    status = readiness.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
@@ -0,0 +1,74 @@
+import hmac
+from datetime import datetime
+from typing import Any, List, Mapping, Set
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from ..database.database import get_db
+from ..services.n8n_sync import _normalize_executions, _upsert_executions
+from ..services.instance_registry import instance_registry
+from .ws import broadcast_to_clients
+
+router = APIRouter(prefix="/ingest")
+
+def _instances_for_key(api_key: str) -> List[Mapping[str, Any]]:
+    """The instances configured with this api key (constant-time compare); more than one is ambiguous."""
+    if not api_key:
+        return []
+    matches = []
+    for inst in instance_registry.snapshot():
+        inst_key = inst.get("api_key") or ""
+        if inst_key and hmac.compare_digest(inst_key.encode(), api_key.encode()):
+            matches.append(inst)
+    return matches
+
+@router.post("/executions")
+async def ingest_executions(request: Request, db: Session = Depends(get_db)):
+    """Accept execution start/finish events pushed by n8n.
+
+    Authenticated with the instance's own api key in X-N8N-API-KEY (or a Bearer token).
+    Body is a single execution object, a list of them, or {"data": [...]}.
+    """
+    api_key = request.headers.get("X-N8N-API-KEY") or ""
+    auth_header = request.headers.get("Authorization") or ""
+    if not api_key and auth_header.startswith("Bearer "):
+        api_key = auth_header.split(" ", 1)[1]
+    matches = _instances_for_key(api_key.strip())
+    if not matches:
+        return JSONResponse({"error": "Unknown or missing instance api key"}, status_code=401)
+    if len(matches) > 1:
+        # Attributing the rows to either instance could be wrong
+        return JSONResponse(
+            {"error": f"API key is shared by instances {', '.join(sorted(m['prefix'] for m in matches))}"},
+            status_code=409
+        )
+    inst = matches[0]
+
+    try:
+        body = await request.json()
+    except ValueError:
+        return JSONResponse({"error": "Invalid JSON body"}, status_code=400)
+    if isinstance(body, dict) and "data" not in body:
+        body = [body]
+
+    try:
+        executions = _normalize_executions(body, id_prefix=f"{inst['prefix']}:", instance_id=inst["instance_id"])
+        changed: Set[str] = set()
+        written = _upsert_executions(db, executions, changed_workflow_ids=changed)
+    except Exception as e:
+        db.rollback()
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+    if changed:
+        await broadcast_to_clients({
+            "type": "n8n_sync",
+            "source": "push",
+            "instance": inst["prefix"],
+            "workflow_ids": sorted(changed),
+            "counts": {"workflows": 0, "executions": len(written)},
+            "timestamp": datetime.utcnow().isoformat()
+        })
+    return {
+        "accepted": len(written),
+        "skipped": len(executions) - len(written)
+    }
@@ -1,34 +1,420 @@
-from typing import Dict, Any, List, Set
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+import jwt
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from ..core.config import (
+    JWT_SECRET,
+    WS_HEARTBEAT_INTERVAL_SECONDS,
+    WS_IDLE_TIMEOUT_SECONDS,
+    WS_MAX_CONNECTIONS,
+    WS_COALESCE_WINDOW_MS,
+    WS_SEND_TIMEOUT_SECONDS,
+    WS_ACCESS_REFRESH_SECONDS,
+)
+from ..database.database import ReadSessionLocal
+from ..database.models import Profile, UserWorkflowAccess
+from ..services.instance_registry import instance_registry
 
 router = APIRouter()
 
-active_websocket_connections: Set[WebSocket] = set()
+# Event types a client can subscribe to
+EVENT_TYPES = frozenset({"n8n_sync"})
 
-async def broadcast_to_clients(message: Dict[str, Any]):
-    disconnected: List[WebSocket] = []
-    for ws in active_websocket_connections:
+
+class Connection:
+    """One /ws/n8n socket: who it belongs to and what it subscribed to."""
+
+    __slots__ = ("websocket", "user_id", "is_superadmin", "granted", "instances", "workflows", "events", "last_seen")
+
+    def __init__(self, websocket: WebSocket, user_id: uuid.UUID, is_superadmin: bool, granted: FrozenSet[str]):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.is_superadmin = is_superadmin
+        self.granted = granted  # workflow ids the user may see (unused for superadmins)
+        self.instances: Set[str] = set()
+        self.workflows: Set[str] = set()
+        self.events: Set[str] = set()
+        self.last_seen = time.monotonic()  # last message received from the client
+
+
+class SubscriptionTable:
+    """Routing tables from topics to connections.
+
+    A connection with no instance/workflow subscriptions gets messages for
+    every instance and workflow it may see, and one with no event
+    subscriptions gets every event type, so clients that never subscribe
+    behave as before. Messages carry their routing keys in "type",
+    "instance" and "workflow_ids"; a message with neither instance nor
+    workflow ids is global.
+    """
+
+    def __init__(self):
+        self.connections: Set[Connection] = set()
+        self._any_scope: Set[Connection] = set()
+        self._any_event: Set[Connection] = set()
+        self._by_instance: Dict[str, Set[Connection]] = {}
+        self._by_workflow: Dict[str, Set[Connection]] = {}
+        self._by_event: Dict[str, Set[Connection]] = {}
+
+    def add(self, conn: Connection):
+        self.connections.add(conn)
+        self._index(conn)
+
+    def remove(self, conn: Connection):
+        if conn in self.connections:
+            self._unindex(conn)
+            self.connections.discard(conn)
+
+    def update(self, conn: Connection, instances: Iterable[str] = (), workflows: Iterable[str] = (),
+               events: Iterable[str] = (), subscribe: bool = True):
+        self._unindex(conn)
+        for current, changes in ((conn.instances, instances), (conn.workflows, workflows), (conn.events, events)):
+            if subscribe:
+                current.update(changes)
+            else:
+                current.difference_update(changes)
+        self._index(conn)
+
+    def _index(self, conn: Connection):
+        if conn.instances or conn.workflows:
+            for prefix in conn.instances:
+                self._by_instance.setdefault(prefix, set()).add(conn)
+            for workflow_id in conn.workflows:
+                self._by_workflow.setdefault(workflow_id, set()).add(conn)
+        else:
+            self._any_scope.add(conn)
+        if conn.events:
+            for event in conn.events:
+                self._by_event.setdefault(event, set()).add(conn)
+        else:
+            self._any_event.add(conn)
+
+    def _unindex(self, conn: Connection):
+        self._any_scope.discard(conn)
+        self._any_event.discard(conn)
+        for table, keys in ((self._by_instance, conn.instances), (self._by_workflow, conn.workflows),
+                            (self._by_event, conn.events)):
+            for key in keys:
+                subscribers = table.get(key)
+                if subscribers is not None:
+                    subscribers.discard(conn)
+                    if not subscribers:
+                        del table[key]
+
+    def recipients(self, message: Dict[str, Any]) -> Set[Connection]:
+        instance = message.get("instance")
+        workflow_ids = message.get("workflow_ids") or ()
+        if instance is None and not workflow_ids:
+            scoped = self.connections
+        else:
+            scoped = set(self._any_scope)
+            scoped |= self._by_instance.get(instance, set())
+            for workflow_id in workflow_ids:
+                scoped |= self._by_workflow.get(workflow_id, set())
+        return scoped & (self._any_event | self._by_event.get(message.get("type"), set()))
+
+
+subscriptions = SubscriptionTable()
+
+
+def _payload_for(conn: Connection, message: Dict[str, Any], encoded: str) -> Optional[str]:
+    """The message as this connection may see it: workflow ids limited to its grants (None to skip)."""
+    workflow_ids = message.get("workflow_ids")
+    if conn.is_superadmin or not workflow_ids:
+        return encoded
+    visible = [workflow_id for workflow_id in workflow_ids if workflow_id in conn.granted]
+    if not visible:
+        return None
+    if len(visible) == len(workflow_ids):
+        return encoded
+    return json.dumps({**message, "workflow_ids": visible})
+
+
+class Broadcaster:
+    """Fan-out for /ws/n8n with liveness tracking.
+
+    ``publish()`` only queues a message; after ``coalesce_window`` seconds the
+    queued messages are merged per (type, instance), with the workflow ids of
+    merged messages unioned, and each result is sent to its recipients
+    concurrently with a per-send timeout. A heartbeat task pings every
+    socket and reaps the ones that have been silent for longer than
+    ``idle_timeout`` (clients answer {"type": "ping"} with {"action": "pong"};
+    any message counts) or whose sends fail or stall. The heartbeat also
+    reloads every socket's grants once they are ``access_ttl`` old;
+    ``refresh_access()`` does so at once after an admin changes grants.
+    """
+
+    def __init__(self, heartbeat_interval: float, idle_timeout: float, max_connections: int,
+                 coalesce_window: float, send_timeout: float, access_ttl: float):
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
+        self.max_connections = max_connections
+        self.coalesce_window = coalesce_window
+        self.send_timeout = send_timeout
+        self.access_ttl = access_ttl
+        self._access_loaded_at = time.monotonic()
+        self._pending: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.reaped = 0
+        self.rejected_over_cap = 0
+        self.access_refreshes = 0
+
+    def has_capacity(self) -> bool:
+        if len(subscriptions.connections) < self.max_connections:
+            return True
+        self.rejected_over_cap += 1
+        return False
+
+    async def publish(self, message: Dict[str, Any]):
+        self.published += 1
+        key = (message.get("type"), message.get("instance"))
+        queued = self._pending.get(key)
+        if queued is not None:
+            self.coalesced += 1
+            workflow_ids = set(queued.get("workflow_ids") or ()) | set(message.get("workflow_ids") or ())
+            message = {**message, "workflow_ids": sorted(workflow_ids)} if workflow_ids else message
+        self._pending[key] = message
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
         try:
-            await ws.send_json(message)
-        except Exception:
-            disconnected.append(ws)
-    for ws in disconnected:
+            await asyncio.sleep(self.coalesce_window)
+        finally:
+            self._flush_task = None
+        pending, self._pending = list(self._pending.values()), {}
+        for message in pending:
+            await self._deliver(message)
+
+    async def _send(self, conn: Connection, payload: str) -> bool:
         try:
-            active_websocket_connections.remove(ws)
-        except KeyError:
-            pass
+            await asyncio.wait_for(conn.websocket.send_text(payload), timeout=self.send_timeout)
+            return True
+        except Exception:
+            return False
+
+    async def _deliver(self, message: Dict[str, Any]):
+        encoded = json.dumps(message)
+        targets: List[Tuple[Connection, str]] = []
+        for conn in subscriptions.recipients(message):
+            payload = _payload_for(conn, message, encoded)
+            if payload is not None:
+                targets.append((conn, payload))
+        await self._send_all(targets)
+
+    async def _send_all(self, targets: List[Tuple[Connection, str]]):
+        results = await asyncio.gather(*(self._send(conn, payload) for conn, payload in targets))
+        for (conn, _), ok in zip(targets, results):
+            if ok:
+                self.sent += 1
+            else:
+                self.reap(conn)
+
+    def reap(self, conn: Connection):
+        """Drop a dead or stalled socket from the routing tables and close it in the background."""
+        if conn not in subscriptions.connections:
+            return
+        subscriptions.remove(conn)
+        self.reaped += 1
+        asyncio.create_task(_close_quietly(conn.websocket))
+
+    async def refresh_access(self, user_ids: Optional[Iterable[uuid.UUID]] = None):
+        """Reload the grants of the connected sockets of ``user_ids`` (all sockets if None).
+
+        Workflow subscriptions that are no longer granted are dropped.
+        """
+        wanted = None if user_ids is None else set(user_ids)
+        conns = [conn for conn in subscriptions.connections if wanted is None or conn.user_id in wanted]
+        if wanted is None:
+            self._access_loaded_at = time.monotonic()
+        if not conns:
+            return
+        access = await asyncio.to_thread(_load_access_many, {conn.user_id for conn in conns})
+        self.access_refreshes += 1
+        for conn in conns:
+            conn.is_superadmin, conn.granted = access[conn.user_id]
+            revoked = [wf for wf in conn.workflows if not conn.is_superadmin and wf not in conn.granted]
+            # The socket may have closed while the grants were loading
+            if revoked and conn in subscriptions.connections:
+                subscriptions.update(conn, workflows=revoked, subscribe=False)
+
+    async def _heartbeat(self):
+        ping = json.dumps({"type": "ping"})
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if time.monotonic() - self._access_loaded_at >= self.access_ttl:
+                try:
+                    await self.refresh_access()
+                except Exception:
+                    pass  # Keep the old grants; retried on the next heartbeat
+            now = time.monotonic()
+            alive: List[Tuple[Connection, str]] = []
+            for conn in list(subscriptions.connections):
+                if now - conn.last_seen > self.idle_timeout:
+                    self.reap(conn)
+                else:
+                    alive.append((conn, ping))
+            await self._send_all(alive)
+
+    def start(self):
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self):
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(subscriptions.connections),
+            "max_connections": self.max_connections,
+            "pending_messages": len(self._pending),
+            "published": self.published,
+            "coalesced": self.coalesced,
+            "sent": self.sent,
+            "reaped": self.reaped,
+            "rejected_over_cap": self.rejected_over_cap,
+            "access_refreshes": self.access_refreshes,
+        }
+
+
+async def _close_quietly(websocket: WebSocket):
+    try:
+        await asyncio.wait_for(websocket.close(code=1001), timeout=5)
+    except Exception:
+        pass
+
+
+broadcaster = Broadcaster(
+    WS_HEARTBEAT_INTERVAL_SECONDS,
+    WS_IDLE_TIMEOUT_SECONDS,
+    WS_MAX_CONNECTIONS,
+    WS_COALESCE_WINDOW_MS / 1000,
+    WS_SEND_TIMEOUT_SECONDS,
+    WS_ACCESS_REFRESH_SECONDS,
+)
+
+
+async def broadcast_to_clients(message: Dict[str, Any]):
+    await broadcaster.publish(message)
+
+
+def _load_access_many(user_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, Tuple[bool, FrozenSet[str]]]:
+    """(is_superadmin, granted workflow ids) per user, in two queries for any number of users."""
+    user_ids = set(user_ids)
+    db = ReadSessionLocal()
+    try:
+        superadmins = {
+            profile_id for (profile_id,) in
+            db.query(Profile.id).filter(Profile.id.in_(user_ids), Profile.role == "superadmin")
+        }
+        granted: Dict[uuid.UUID, Set[str]] = {user_id: set() for user_id in user_ids - superadmins}
+        if granted:
+            for user_id, workflow_id in db.query(UserWorkflowAccess.user_id, UserWorkflowAccess.workflow_id).filter(
+                UserWorkflowAccess.user_id.in_(list(granted))
+            ):
+                granted[user_id].add(workflow_id)
+        return {
+            user_id: (True, frozenset()) if user_id in superadmins else (False, frozenset(granted[user_id]))
+            for user_id in user_ids
+        }
+    finally:
+        db.close()
+
+
+def _load_access(user_id: uuid.UUID) -> Tuple[bool, FrozenSet[str]]:
+    return _load_access_many([user_id])[user_id]
+
+
+def _user_from_cookie(websocket: WebSocket) -> Optional[uuid.UUID]:
+    token = websocket.cookies.get("token")
+    if not token:
+        return None
+    try:
+        return uuid.UUID(jwt.decode(token, JWT_SECRET, algorithms=["HS256"])["id"])
+    except Exception:
+        return None
+
+
+def _str_list(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [item for item in value if isinstance(item, str)]
+    return []
+
+
+async def _handle_client_message(conn: Connection, text: str):
+    """subscribe / unsubscribe: {"action": ..., "instances": [...], "workflows": [...], "events": [...]}"""
+    try:
+        request = json.loads(text)
+        action = request.get("action")
+    except (ValueError, AttributeError):
+        await conn.websocket.send_json({"type": "error", "error": "Invalid JSON message"})
+        return
+    if action == "pong":
+        return
+    if action not in ("subscribe", "unsubscribe"):
+        await conn.websocket.send_json({"type": "error", "error": f"Unknown action: {action}"})
+        return
+
+    instances = _str_list(request.get("instances"))
+    workflows = _str_list(request.get("workflows"))
+    events = _str_list(request.get("events"))
+    rejected: Dict[str, List[str]] = {}
+    if action == "subscribe":
+        # Pick up grants changed since the socket connected
+        conn.is_superadmin, conn.granted = await asyncio.to_thread(_load_access, conn.user_id)
+        rejected = {
+            "instances": [prefix for prefix in instances if instance_registry.get(prefix) is None],
+            "workflows": [wf for wf in workflows if not conn.is_superadmin and wf not in conn.granted],
+            "events": [event for event in events if event not in EVENT_TYPES],
+        }
+        instances = [prefix for prefix in instances if prefix not in rejected["instances"]]
+        workflows = [wf for wf in workflows if wf not in rejected["workflows"]]
+        events = [event for event in events if event not in rejected["events"]]
+    subscriptions.update(conn, instances, workflows, events, subscribe=(action == "subscribe"))
+    await conn.websocket.send_json({
+        "type": "subscriptions",
+        "instances": sorted(conn.instances),
+        "workflows": sorted(conn.workflows),
+        "events": sorted(conn.events),
+        "rejected": {key: values for key, values in rejected.items() if values},
+    })
+
 
 @router.websocket("/ws/n8n")
 async def websocket_n8n(websocket: WebSocket):
+    user_id = _user_from_cookie(websocket)
+    if user_id is None:
+        await websocket.close(code=1008)  # policy violation: not authenticated
+        return
+    if not broadcaster.has_capacity():
+        await websocket.close(code=1013)  # try again later
+        return
+    is_superadmin, granted = await asyncio.to_thread(_load_access, user_id)
     await websocket.accept()
-    active_websocket_connections.add(websocket)
+    conn = Connection(websocket, user_id, is_superadmin, granted)
+    subscriptions.add(conn)
     try:
         while True:
-            await websocket.receive_text()
+            text = await websocket.receive_text()
+            conn.last_seen = time.monotonic()
+            await _handle_client_message(conn, text)
     except WebSocketDisconnect:
-        try:
-            active_websocket_connections.remove(websocket)
-        except KeyError:
-            pass
-
-
+        pass
+    finally:
+        # Any exit (disconnect, error, cancellation) releases the socket's routing entries
+        subscriptions.remove(conn)
@@ -0,0 +1,413 @@
+import asyncio
+import gzip
+import heapq
+import json
+import logging
+import os
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import desc, and_, text, tuple_
+from sqlalchemy.orm import Session
+from ..core.config import (
+    ARCHIVE_DIR,
+    ARCHIVE_AFTER_DAYS,
+    ARCHIVE_RETENTION_DAYS,
+    ARCHIVE_INTERVAL_SECONDS,
+    ARCHIVE_SEGMENT_ROWS,
+)
+from ..database.database import BackfillSessionLocal, track_queries
+from ..database.models import N8NExecution, N8NExecutionArchiveSegment, UserWorkflowAccess
+
+logger = logging.getLogger(__name__)
+
+# Only one process archives at a time; the others skip the cycle.
+ARCHIVE_LOCK_KEY = 0x6E38_6E61  # "n8na"
+
+# Moves one batch of an instance's month out of the hot table. Archived executions
+# leave execution_count and are added to archived_count in the same statement, so
+# the workflow totals stay right without a summary refresh. This is not a logical
+# delete, so nothing is written to the change journal.
+_MOVE_SQL = text("""
+    WITH moved AS (
+        DELETE FROM n8n_executions
+        WHERE id IN (
+            SELECT id FROM n8n_executions
+            WHERE instance_id = :instance_id AND started_at >= :month_start AND started_at < :until
+            ORDER BY started_at
+            LIMIT :limit
+        )
+        RETURNING id, instance_id, n8n_id, workflow_id, status, finished, started_at, stopped_at
+    ), counted AS (
+        UPDATE n8n_workflow_summaries s
+        SET execution_count = GREATEST(s.execution_count - m.n, 0),
+            archived_count = s.archived_count + m.n
+        FROM (SELECT workflow_id, count(*) AS n FROM moved GROUP BY workflow_id) m
+        WHERE s.workflow_id = m.workflow_id
+    )
+    SELECT * FROM moved ORDER BY started_at DESC, id DESC
+""")
+
+_OLDEST_SQL = text("""
+    SELECT instance_id, started_at FROM n8n_executions
+    WHERE started_at < :cutoff
+    ORDER BY started_at
+    LIMIT 1
+""")
+
+
+def _month_bounds(value: datetime) -> Tuple[str, datetime, datetime]:
+    start = value.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start.strftime("%Y-%m"), start, end
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _row_payload(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "instance_id": str(row.instance_id),
+        "n8n_id": row.n8n_id,
+        "workflow_id": row.workflow_id,
+        "status": row.status,
+        "finished": row.finished,
+        "started_at": _iso(row.started_at),
+        "stopped_at": _iso(row.stopped_at),
+    }
+
+
+def _write_segment(relative_path: str, rows: List[Dict[str, Any]]) -> int:
+    """Write rows as gzip JSONL via a temp file + rename; returns the file size."""
+    path = os.path.join(ARCHIVE_DIR, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + ".part"
+    with open(partial, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as gz:
+            for row in rows:
+                gz.write(json.dumps(row, separators=(",", ":")).encode())
+                gz.write(b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(partial, path)
+    return os.path.getsize(path)
+
+
+def _remove_file(relative_path: str):
+    try:
+        os.remove(os.path.join(ARCHIVE_DIR, relative_path))
+    except FileNotFoundError:
+        pass
+
+
+class ExecutionArchiver:
+    """Moves executions older than ``after_days`` from n8n_executions into segment files.
+
+    Segments are gzip JSONL files under ARCHIVE_DIR/<instance_id>/<YYYY-MM>/, at
+    most ``segment_rows`` executions each, sorted newest first, and indexed in
+    n8n_execution_archive_segments (time range and workflow ids per file). A
+    batch is deleted from the hot table in the same transaction that records its
+    segment, and the file is written before that commits, so an execution is
+    never in neither place. Segments whose newest execution is older than
+    ``retention_days`` are dropped (0 keeps them forever).
+    """
+
+    def __init__(self, after_days: float, retention_days: float, interval: float, segment_rows: int):
+        self._after_days = after_days
+        self._retention_days = retention_days
+        self._interval = interval
+        self._segment_rows = segment_rows
+        self._task: Optional[asyncio.Task] = None
+        self.archived = 0
+        self.segments_written = 0
+        self.segments_expired = 0
+        self.failed_runs = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._after_days > 0
+
+    @property
+    def after_days(self) -> float:
+        return self._after_days
+
+    def _archive_batch(self, db: Session, cutoff: datetime) -> int:
+        oldest = db.execute(_OLDEST_SQL, {"cutoff": cutoff}).first()
+        if oldest is None:
+            return 0
+        month, month_start, month_end = _month_bounds(oldest.started_at)
+        rows = [_row_payload(row) for row in db.execute(_MOVE_SQL, {
+            "instance_id": oldest.instance_id,
+            "month_start": month_start,
+            "until": min(month_end, cutoff),
+            "limit": self._segment_rows,
+        })]
+        if not rows:
+            return 0
+        segment_id = uuid.uuid4()
+        relative_path = os.path.join(str(oldest.instance_id), month, f"{segment_id}.jsonl.gz")
+        size = _write_segment(relative_path, rows)
+        try:
+            db.add(N8NExecutionArchiveSegment(
+                id=segment_id,
+                instance_id=oldest.instance_id,
+                month=month,
+                path=relative_path,
+                row_count=len(rows),
+                size_bytes=size,
+                min_started_at=datetime.fromisoformat(rows[-1]["started_at"]),
+                max_started_at=datetime.fromisoformat(rows[0]["started_at"]),
+                workflow_ids=sorted({row["workflow_id"] for row in rows}),
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            _remove_file(relative_path)
+            raise
+        self.segments_written += 1
+        self.archived += len(rows)
+        return len(rows)
+
+    def _expire_segments(self, db: Session):
+        if self._retention_days <= 0:
+            return
+        horizon = datetime.now(timezone.utc) - timedelta(days=self._retention_days)
+        expired = db.query(N8NExecutionArchiveSegment).filter(N8NExecutionArchiveSegment.max_started_at < horizon).all()
+        if not expired:
+            return
+        paths = [segment.path for segment in expired]
+        for segment in expired:
+            db.delete(segment)
+        db.commit()
+        for path in paths:
+            _remove_file(path)
+        self.segments_expired += len(paths)
+
+    def run_once(self) -> int:
+        """Archive everything past the cutoff and drop expired segments; returns executions archived."""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self._after_days)
+        archived = 0
+        db = BackfillSessionLocal()
+        try:
+            while True:
+                if not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ARCHIVE_LOCK_KEY}).scalar():
+                    db.rollback()
+                    break
+                moved = self._archive_batch(db, cutoff)
+                if not moved:
+                    db.rollback()
+                    break
+                archived += moved
+            self._expire_segments(db)
+            self.last_error = None
+        except Exception as e:
+            db.rollback()
+            self.failed_runs += 1
+            self.last_error = str(e)[:1000]
+        finally:
+            db.close()
+            self.last_run_at = datetime.now(timezone.utc)
+        return archived
+
+    async def _run(self):
+        while True:
+            with track_queries("archive_cycle"):
+                await asyncio.to_thread(self.run_once)
+            await asyncio.sleep(self._interval)
+
+    def start(self):
+        if self._task is None and self.enabled:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self, db: Session) -> Dict[str, Any]:
+        rows = db.execute(text("""
+            SELECT instance_id, count(*) AS segments, sum(row_count) AS executions, sum(size_bytes) AS size_bytes,
+                   min(min_started_at) AS oldest, max(max_started_at) AS newest
+            FROM n8n_execution_archive_segments
+            GROUP BY instance_id
+        """)).all()
+        return {
+            "enabled": self.enabled,
+            "archive_after_days": self._after_days,
+            "retention_days": self._retention_days,
+            "archived": self.archived,
+            "segments_written": self.segments_written,
+            "segments_expired": self.segments_expired,
+            "failed_runs": self.failed_runs,
+            "last_run_at": _iso(self.last_run_at),
+            "last_error": self.last_error,
+            "instances": [
+                {
+                    "instance_id": str(row.instance_id),
+                    "segments": row.segments,
+                    "executions": int(row.executions or 0),
+                    "size_bytes": int(row.size_bytes or 0),
+                    "oldest_started_at": _iso(row.oldest),
+                    "newest_started_at": _iso(row.newest),
+                }
+                for row in rows
+            ],
+        }
+
+
+# --- Reading across the hot table and the archive ----------------------------
+
+HistoryKey = Tuple[datetime, str]
+
+
+class _Newest:
+    """Heap entry ordering: the newest (started_at, id) pops first."""
+    __slots__ = ("key",)
+
+    def __init__(self, key: HistoryKey):
+        self.key = key
+
+    def __lt__(self, other: "_Newest") -> bool:
+        return self.key > other.key
+
+
+def _byte_order(column):
+    # Tie-break ids the way Python compares strings, so the SQL side merges with segment rows
+    return column.collate("C")
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Query parameters may come without an offset; segment timestamps always carry one
+    return value.replace(tzinfo=timezone.utc) if value is not None and value.tzinfo is None else value
+
+
+def _history_key(row: Dict[str, Any]) -> HistoryKey:
+    return datetime.fromisoformat(row["started_at"]), row["id"]
+
+
+def _segment_missing(relative_path: str, error: Exception, missing: Optional[List[str]]):
+    logger.warning("Skipping archive segment %s: %s", relative_path, error)
+    if missing is not None:
+        missing.append(relative_path)
+
+
+def _read_segment(relative_path: str, missing: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Rows of one segment; a missing or unreadable file is skipped (and recorded), not raised.
+
+    ARCHIVE_DIR is local to the pod that wrote it, so a segment can be gone after a
+    redeploy or when another pod serves the request.
+    """
+    try:
+        with gzip.open(os.path.join(ARCHIVE_DIR, relative_path), "rt") as f:
+            for line in f:
+                row = json.loads(line)
+                row["archived"] = True
+                yield row
+    except (OSError, EOFError, zlib.error, ValueError) as e:
+        _segment_missing(relative_path, e, missing)
+
+
+def iter_execution_history(db: Session, user_id: uuid.UUID, is_superadmin: bool,
+                           instance_id: Optional[uuid.UUID] = None, workflow_id: Optional[str] = None,
+                           since: Optional[datetime] = None, until: Optional[datetime] = None,
+                           before: Optional[HistoryKey] = None,
+                           missing: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Started executions visible to the user, newest first by (started_at, id), from both the
+    hot table and archive segments. ``before`` is a keyset position to continue after.
+
+    Segment files are opened lazily, only once the merge reaches their time range, so a
+    page near the top of the history reads few or none of them. Segments whose file is
+    not on this pod are skipped; their paths are appended to ``missing``. Files absent
+    up front are detected on the first ``next()``.
+    """
+    since, until = _utc(since), _utc(until)
+    if before is not None:
+        before = (_utc(before[0]), before[1])
+    allowed: Optional[Set[str]] = None
+    if not is_superadmin:
+        allowed = {wid for (wid,) in db.query(UserWorkflowAccess.workflow_id).filter(UserWorkflowAccess.user_id == user_id)}
+
+    hot = db.query(N8NExecution).filter(N8NExecution.started_at.isnot(None))
+    segments = db.query(N8NExecutionArchiveSegment)
+    if allowed is not None:
+        hot = hot.join(UserWorkflowAccess, and_(
+            UserWorkflowAccess.workflow_id == N8NExecution.workflow_id,
+            UserWorkflowAccess.user_id == user_id
+        ))
+        segments = segments.filter(N8NExecutionArchiveSegment.workflow_ids.overlap(sorted(allowed)))
+    if instance_id is not None:
+        hot = hot.filter(N8NExecution.instance_id == instance_id)
+        segments = segments.filter(N8NExecutionArchiveSegment.instance_id == instance_id)
+    if workflow_id is not None:
+        hot = hot.filter(N8NExecution.workflow_id == workflow_id)
+        segments = segments.filter(N8NExecutionArchiveSegment.workflow_ids.any(workflow_id))
+    if since is not None:
+        hot = hot.filter(N8NExecution.started_at >= since)
+        segments = segments.filter(N8NExecutionArchiveSegment.max_started_at >= since)
+    if until is not None:
+        hot = hot.filter(N8NExecution.started_at < until)
+        segments = segments.filter(N8NExecutionArchiveSegment.min_started_at < until)
+    if before is not None:
+        hot = hot.filter(tuple_(N8NExecution.started_at, _byte_order(N8NExecution.id)) < tuple_(*before))
+        segments = segments.filter(N8NExecutionArchiveSegment.min_started_at <= before[0])
+    pending = []
+    for segment in segments.order_by(desc(N8NExecutionArchiveSegment.max_started_at)).all():
+        if os.path.exists(os.path.join(ARCHIVE_DIR, segment.path)):
+            pending.append((segment.max_started_at, segment.path))
+        else:
+            _segment_missing(segment.path, FileNotFoundError("file not found"), missing)
+    hot_rows = (
+        {**_row_payload(ex), "archived": False}
+        for ex in hot.order_by(desc(N8NExecution.started_at), desc(_byte_order(N8NExecution.id)))
+        .execution_options(stream_results=True).yield_per(500)
+    )
+
+    def wanted(row: Dict[str, Any], key: HistoryKey) -> bool:
+        if allowed is not None and row["workflow_id"] not in allowed:
+            return False
+        if workflow_id is not None and row["workflow_id"] != workflow_id:
+            return False
+        if since is not None and key[0] < since:
+            return False
+        if until is not None and key[0] >= until:
+            return False
+        return before is None or key < before
+
+    heap: List[Tuple[_Newest, int, Dict[str, Any], Iterator[Dict[str, Any]]]] = []
+    sequence = 0
+
+    def push(source: Iterator[Dict[str, Any]], archived: bool):
+        nonlocal sequence
+        for row in source:
+            key = _history_key(row)
+            # Hot rows are filtered in SQL; segment rows here
+            if not archived or wanted(row, key):
+                heapq.heappush(heap, (_Newest(key), sequence, row, source))
+                sequence += 1
+                return
+
+    push(hot_rows, False)
+    last_id = None
+    while heap or pending:
+        while pending and (not heap or pending[0][0] >= heap[0][0].key[0]):
+            push(_read_segment(pending.pop(0)[1], missing), True)
+        if not heap:
+            break
+        _, _, row, source = heapq.heappop(heap)
+        push(source, row["archived"])
+        # An execution re-imported after it was archived is in both places; return it once
+        if row["id"] != last_id:
+            last_id = row["id"]
+            yield row
+
+
+archiver = ExecutionArchiver(ARCHIVE_AFTER_DAYS, ARCHIVE_RETENTION_DAYS, ARCHIVE_INTERVAL_SECONDS, ARCHIVE_SEGMENT_ROWS)
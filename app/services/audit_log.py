@@ -0,0 +1,169 @@
+import asyncio
+import io
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from ..core.config import AUDIT_LOG_QUEUE_MAX, AUDIT_LOG_BATCH_SIZE, AUDIT_LOG_FLUSH_INTERVAL_SECONDS
+from ..database.database import engine
+
+# (id, user_id, action, timestamp, enqueued_at monotonic, attempts)
+_Entry = Tuple[uuid.UUID, uuid.UUID, str, datetime, float, int]
+
+_MAX_ATTEMPTS = 3
+
+
+def _copy_field(value: str) -> str:
+    """Escape a value for COPY ... FROM STDIN text format."""
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class AuditLogWriter:
+    """Write-behind buffer for action_logs.
+
+    ``log()`` only appends to a bounded in-memory queue; a background task
+    flushes it with COPY in batches when ``batch_size`` entries are pending or
+    every ``flush_interval`` seconds, and once more on shutdown. When the queue
+    is full new entries are dropped and counted rather than blocking requests.
+    """
+
+    def __init__(self, max_queue: int, batch_size: int, flush_interval: float):
+        self._max_queue = max_queue
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue: Deque[_Entry] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+        self.max_delay_seconds = 0.0
+        self.last_flush_at: Optional[datetime] = None
+
+    def log(self, user_id: uuid.UUID, action: str, timestamp: Optional[datetime] = None) -> bool:
+        """Queue an action log entry; returns False if it was dropped because the queue is full."""
+        entry = (uuid.uuid4(), user_id, action, timestamp or datetime.now(timezone.utc), time.monotonic(), 0)
+        with self._lock:
+            if len(self._queue) >= self._max_queue:
+                self.dropped += 1
+                return False
+            self._queue.append(entry)
+            self.enqueued += 1
+            pending = len(self._queue)
+        if pending >= self._batch_size and self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return True
+
+    def _take_batch(self) -> List[_Entry]:
+        with self._lock:
+            return [self._queue.popleft() for _ in range(min(self._batch_size, len(self._queue)))]
+
+    def _requeue(self, batch: List[_Entry]):
+        retry = [entry[:5] + (entry[5] + 1,) for entry in batch if entry[5] + 1 < _MAX_ATTEMPTS]
+        with self._lock:
+            room = self._max_queue - len(self._queue)
+            self.dropped += len(batch) - min(len(retry), room)
+            self._queue.extendleft(reversed(retry[:room]))
+
+    def _write_copy(self, batch: List[_Entry]):
+        buf = io.StringIO()
+        for log_id, user_id, action, ts, _, _ in batch:
+            buf.write(f"{log_id}\t{user_id}\t{_copy_field(action)}\t{ts.isoformat()}\n")
+        buf.seek(0)
+        raw = engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            cursor.copy_expert("COPY action_logs (id, user_id, action, timestamp) FROM STDIN", buf)
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+
+    def _write_insert(self, batch: List[_Entry]):
+        """Multi-row INSERT that skips entries whose user has since been deleted."""
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO action_logs (id, user_id, action, timestamp) "
+                    "SELECT :id, :user_id, :action, :timestamp "
+                    "WHERE EXISTS (SELECT 1 FROM profiles WHERE id = :user_id)"
+                ),
+                [{"id": e[0], "user_id": e[1], "action": e[2], "timestamp": e[3]} for e in batch],
+            )
+
+    def flush(self) -> int:
+        """Write everything currently queued; returns the number of entries written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    return written
+                now = time.monotonic()
+                try:
+                    try:
+                        self._write_copy(batch)
+                    except Exception:
+                        # COPY is all-or-nothing (e.g. one entry for a deleted user); fall back to filtered INSERT.
+                        self._write_insert(batch)
+                except Exception:
+                    self.failed_flushes += 1
+                    self._requeue(batch)
+                    return written
+                written += len(batch)
+                self.flushed += len(batch)
+                self.max_delay_seconds = max(self.max_delay_seconds, now - min(e[4] for e in batch))
+                self.last_flush_at = datetime.now(timezone.utc)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await asyncio.to_thread(self.flush)
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._queue)
+            oldest = self._queue[0][4] if self._queue else None
+        return {
+            "pending": pending,
+            "queue_capacity": self._max_queue,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+            "oldest_pending_seconds": round(time.monotonic() - oldest, 3) if oldest is not None else None,
+            "max_delay_seconds": round(self.max_delay_seconds, 3),
+            "last_flush_at": self.last_flush_at.isoformat() if self.last_flush_at else None,
+        }
+
+
+audit_log = AuditLogWriter(AUDIT_LOG_QUEUE_MAX, AUDIT_LOG_BATCH_SIZE, AUDIT_LOG_FLUSH_INTERVAL_SECONDS)
@@ -1,14 +1,16 @@
-from google.auth.transport.requests import Request
-from google.oauth2 import id_token
-from google_auth_oauthlib.flow import Flow
 import os
 from ..core.config import GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, GOOGLE_REDIRECT_URI
 
+# The google-auth / oauthlib stack (and requests under it) is imported inside the functions
+# that use it: it is the slowest part of importing the app and only the login flow needs it.
+
 # Google OAuth scopes
 SCOPES = ['openid', 'https://www.googleapis.com/auth/userinfo.email', 'https://www.googleapis.com/auth/userinfo.profile']
 
 def get_google_oauth_flow():
     """Create and return Google OAuth flow"""
+    from google_auth_oauthlib.flow import Flow
+
     if not GOOGLE_CLIENT_ID or GOOGLE_CLIENT_ID.startswith("your-google"):
         raise ValueError("GOOGLE_CLIENT_ID is not configured. Please set it in your .env file.")
     if not GOOGLE_CLIENT_SECRET or GOOGLE_CLIENT_SECRET.startswith("your-google"):
@@ -43,6 +45,9 @@ def get_authorization_url():
 
 def verify_google_token(token: str):
     """Verify Google OAuth token and return user info"""
+    from google.auth.transport.requests import Request
+    from google.oauth2 import id_token
+
     try:
         # Verify the token with clock skew tolerance (120 seconds)
         idinfo = id_token.verify_oauth2_token(
@@ -70,6 +75,9 @@ def verify_google_token(token: str):
 
 def exchange_code_for_token(code: str):
     """Exchange authorization code for tokens"""
+    from google.auth.transport.requests import Request
+    from google.oauth2 import id_token
+
     flow = get_google_oauth_flow()
     flow.fetch_token(code=code)
     
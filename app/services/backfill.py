@@ -0,0 +1,257 @@
+import asyncio
+import io
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from ..core.config import (
+    BACKFILL_PAGE_SIZE,
+    BACKFILL_PAGE_INTERVAL_SECONDS,
+    BACKFILL_MAX_ATTEMPTS,
+    BACKFILL_MAX_CONCURRENT_JOBS,
+)
+from ..database.database import BackfillSessionLocal, engines, track_queries
+from ..database.models import N8NBackfillJob, N8NWorkflow
+from .instance_registry import instance_registry
+from .n8n_client import n8n_clients
+from .change_journal import JOURNAL_LOCK_KEY
+from .n8n_sync import (
+    _normalize_executions,
+    _normalize_workflows,
+    _read_page,
+    _refresh_workflow_summaries,
+    _stream_rows,
+    _upsert_workflows,
+)
+
+_COPY_COLUMNS = ("id", "instance_id", "n8n_id", "workflow_id", "status", "finished", "started_at", "stopped_at")
+
+_STAGE_SQL = """
+    CREATE TEMP TABLE _backfill_executions (
+        id text, instance_id uuid, n8n_id text, workflow_id text,
+        status text, finished boolean, started_at timestamptz, stopped_at timestamptz
+    ) ON COMMIT DROP
+"""
+
+# Rows already written by the live sync are at least as fresh as history, so they win.
+# Inserted rows are journaled for GET /changes in the same statement.
+_MERGE_SQL = """
+    WITH inserted AS (
+        INSERT INTO n8n_executions (id, instance_id, n8n_id, workflow_id, status, finished, started_at, stopped_at)
+        SELECT DISTINCT ON (b.instance_id, b.n8n_id)
+               b.id, b.instance_id, b.n8n_id, b.workflow_id, b.status, b.finished, b.started_at, b.stopped_at
+        FROM _backfill_executions b
+        JOIN n8n_workflows w ON w.id = b.workflow_id
+        ORDER BY b.instance_id, b.n8n_id
+        ON CONFLICT DO NOTHING
+        RETURNING id, workflow_id
+    )
+    INSERT INTO n8n_change_journal (entity, entity_id, workflow_id, op)
+    SELECT 'execution', id, workflow_id, 'upsert' FROM inserted
+"""
+
+_CHECKPOINT_SQL = """
+    UPDATE n8n_backfill_jobs
+    SET cursor = %(cursor)s,
+        pages_fetched = pages_fetched + 1,
+        executions_loaded = executions_loaded + %(loaded)s,
+        attempts = 0,
+        last_error = NULL,
+        status = CASE WHEN %(done)s THEN 'completed' ELSE status END,
+        finished_at = CASE WHEN %(done)s THEN now() ELSE finished_at END,
+        updated_at = now()
+    WHERE id = %(job_id)s
+"""
+
+
+def _copy_value(value: Any) -> str:
+    """Format a value for COPY ... FROM STDIN text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _load_page(job_id: uuid.UUID, executions: List[Dict[str, Any]], next_cursor: Optional[str]) -> int:
+    """COPY one page into a temp table, merge it into n8n_executions and advance the checkpoint atomically."""
+    buf = io.StringIO()
+    for ex in executions:
+        if ex["workflow_id"] is not None:
+            buf.write("\t".join(_copy_value(ex[col]) for col in _COPY_COLUMNS))
+            buf.write("\n")
+    buf.seek(0)
+    raw = engines["backfill"].raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(_STAGE_SQL)
+        cursor.copy_expert(f"COPY _backfill_executions ({', '.join(_COPY_COLUMNS)}) FROM STDIN", buf)
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (JOURNAL_LOCK_KEY,))
+        cursor.execute(_MERGE_SQL)
+        loaded = max(cursor.rowcount, 0)
+        cursor.execute(_CHECKPOINT_SQL, {
+            "cursor": next_cursor,
+            "loaded": loaded,
+            "done": next_cursor is None,
+            "job_id": str(job_id),
+        })
+        raw.commit()
+        return loaded
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+
+def job_payload(job: N8NBackfillJob, running: bool = False) -> Dict[str, Any]:
+    elapsed = None
+    if job.started_at:
+        end = job.finished_at or datetime.now(timezone.utc)
+        elapsed = max((end - job.started_at).total_seconds(), 0.0)
+    return {
+        "id": str(job.id),
+        "instance_id": str(job.instance_id),
+        "status": job.status,
+        "running": running,
+        "pages_fetched": job.pages_fetched,
+        "executions_loaded": job.executions_loaded,
+        "executions_per_second": round(job.executions_loaded / elapsed, 1) if elapsed else None,
+        "has_checkpoint": job.cursor is not None,
+        "attempts": job.attempts,
+        "last_error": job.last_error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+class BackfillManager:
+    """Imports the execution history of newly registered instances in the background.
+
+    Each job pages through ``/executions`` of one instance at most once per
+    ``page_interval`` seconds, on its own DB pool, bulk-loading every page with
+    COPY and storing n8n's ``nextCursor`` in the same transaction, so a job
+    resumes from its last completed page after a restart. The regular sync
+    loop is not involved and keeps polling the other instances as usual.
+    """
+
+    def __init__(self, page_size: int, page_interval: float, max_attempts: int, max_concurrent: int):
+        self._page_size = page_size
+        self._page_interval = page_interval
+        self._max_attempts = max_attempts
+        self._max_concurrent = max_concurrent
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[uuid.UUID, asyncio.Task] = {}
+
+    def is_running(self, job_id: uuid.UUID) -> bool:
+        return job_id in self._tasks
+
+    def _step(self, job_id: uuid.UUID) -> str:
+        """Fetch and load one page. Returns "more", "retry", "idle" or "done"."""
+        db = BackfillSessionLocal()
+        try:
+            job = db.get(N8NBackfillJob, job_id)
+            if job is None or job.status in ("completed", "failed"):
+                return "done"
+            inst = instance_registry.get_by_id(job.instance_id)
+            if inst is None:
+                # Inactive or removed; picked up again by kick() once it is active
+                return "idle"
+            prefix = f"{inst['prefix']}:"
+            if job.status == "pending":
+                # Executions reference workflows, so load those first
+                definitions: Dict[str, bytes] = {}
+                with n8n_clients.stream(inst, "/workflows") as w:
+                    workflows = _normalize_workflows(_stream_rows(w), prefix, inst["instance_id"], definitions)
+                _upsert_workflows(db, workflows, definitions)
+                job = db.get(N8NBackfillJob, job_id)
+                job.status = "running"
+                job.started_at = job.started_at or datetime.now(timezone.utc)
+                db.commit()
+
+            params: Dict[str, Any] = {"limit": self._page_size}
+            if job.cursor:
+                params["cursor"] = job.cursor
+            instance_id = job.instance_id
+            db.rollback()  # don't hold a transaction open across the HTTP request
+            with n8n_clients.stream(inst, "/executions", params=params) as r:
+                body, next_cursor = _read_page(r)
+                executions = _normalize_executions(body, prefix, inst["instance_id"])
+            _load_page(job_id, executions, next_cursor)
+            if next_cursor is not None:
+                return "more"
+
+            workflow_ids = [row[0] for row in db.query(N8NWorkflow.id).filter(N8NWorkflow.instance_id == instance_id).all()]
+            _refresh_workflow_summaries(db, workflow_ids)
+            db.commit()
+            return "done"
+        except Exception as e:
+            db.rollback()
+            job = db.get(N8NBackfillJob, job_id)
+            if job is None:
+                return "done"
+            job.attempts += 1
+            job.last_error = str(e)[:1000]
+            if job.attempts >= self._max_attempts:
+                job.status = "failed"
+                job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+            return "done" if job.status == "failed" else "retry"
+        finally:
+            db.close()
+
+    async def _run(self, job_id: uuid.UUID):
+        try:
+            async with self._semaphore:
+                failures = 0
+                while True:
+                    with track_queries("backfill_page"):
+                        state = await asyncio.to_thread(self._step, job_id)
+                    if state in ("done", "idle"):
+                        return
+                    failures = failures + 1 if state == "retry" else 0
+                    await asyncio.sleep(min(self._page_interval * (2 ** failures), 60.0))
+        finally:
+            self._tasks.pop(job_id, None)
+
+    def _unfinished_job_ids(self) -> List[uuid.UUID]:
+        db = BackfillSessionLocal()
+        try:
+            return [row[0] for row in db.query(N8NBackfillJob.id).filter(
+                N8NBackfillJob.status.in_(("pending", "running"))
+            ).all()]
+        finally:
+            db.close()
+
+    async def kick(self):
+        """Start tasks for every pending or interrupted job that is not already running."""
+        if self._semaphore is None:
+            return
+        try:
+            job_ids = await asyncio.to_thread(self._unfinished_job_ids)
+        except Exception:
+            return
+        for job_id in job_ids:
+            if job_id not in self._tasks:
+                self._tasks[job_id] = asyncio.create_task(self._run(job_id))
+
+    def start(self):
+        """Resume unfinished jobs (called on startup)."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrent)
+            asyncio.create_task(self.kick())
+
+    async def stop(self):
+        # Progress is checkpointed per page, so cancelling only loses the page in flight.
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+backfill = BackfillManager(
+    BACKFILL_PAGE_SIZE, BACKFILL_PAGE_INTERVAL_SECONDS, BACKFILL_MAX_ATTEMPTS, BACKFILL_MAX_CONCURRENT_JOBS
+)
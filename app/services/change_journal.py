@@ -0,0 +1,118 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import and_, func, insert, literal, or_, select, text
+from sqlalchemy.orm import Session
+from ..core.config import CHANGE_JOURNAL_RETENTION_HOURS
+from ..database.models import N8NChangeJournal, N8NExecution, N8NWorkflow, UserWorkflowAccess
+
+# Journal writers take this transaction-level advisory lock before drawing
+# versions, so versions become visible in commit order and a reader that has
+# seen version N can never later miss a smaller one.
+JOURNAL_LOCK_KEY = 0x6E38_6E6A  # "n8nj"
+
+
+def lock_journal(db: Session):
+    db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": JOURNAL_LOCK_KEY})
+
+
+def record_changes(db: Session, dml, entity: str, op: str, with_audience: bool = False) -> List[str]:
+    """Run an INSERT/UPDATE/DELETE ... RETURNING (id, workflow_id) and journal every row it touched.
+
+    Both happen in one statement; returns the workflow ids of the journaled rows.
+    With ``with_audience`` each entry also stores the users granted its workflow
+    (the statement's snapshot, so still visible while the workflow is deleted).
+    """
+    changed = dml.cte("changed")
+    columns = [literal(entity), changed.c.id, changed.c.workflow_id, literal(op)]
+    if with_audience:
+        columns.append(
+            select(func.array_agg(UserWorkflowAccess.user_id))
+            .where(UserWorkflowAccess.workflow_id == changed.c.workflow_id)
+            .scalar_subquery()
+        )
+    stmt = insert(N8NChangeJournal).from_select(
+        ["entity", "entity_id", "workflow_id", "op", "audience"][:len(columns)],
+        select(*columns),
+    ).returning(N8NChangeJournal.workflow_id)
+    lock_journal(db)
+    return db.execute(stmt).scalars().all()
+
+
+def prune(db: Session):
+    """Drop journal entries older than the retention window."""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=CHANGE_JOURNAL_RETENTION_HOURS)
+    db.query(N8NChangeJournal).filter(N8NChangeJournal.changed_at < cutoff).delete(synchronize_session=False)
+
+
+def _floor_version(db: Session) -> int:
+    """Highest version a client may hold and still receive a complete delta."""
+    oldest = db.query(N8NChangeJournal.version).order_by(N8NChangeJournal.version).limit(1).scalar()
+    if oldest is not None:
+        return oldest - 1
+    # Empty journal: everything up to the last drawn version has been pruned (or never existed)
+    last_value, is_called = db.execute(text("SELECT last_value, is_called FROM n8n_change_journal_version_seq")).one()
+    return last_value if is_called else 0
+
+
+def _current_version(db: Session) -> int:
+    latest = db.query(N8NChangeJournal.version).order_by(N8NChangeJournal.version.desc()).limit(1).scalar()
+    return latest if latest is not None else _floor_version(db)
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def read_changes(db: Session, user_id: uuid.UUID, is_superadmin: bool, since: int, limit: int) -> Dict[str, Any]:
+    """Journal entries after ``since`` that the user may see, with the current row for upserts."""
+    current = _current_version(db)
+    if since > current or since < _floor_version(db):
+        # Pruned past the client's version (or the journal was reset): it must reload everything.
+        return {"reset": True, "version": current, "has_more": False, "changes": []}
+
+    query = db.query(N8NChangeJournal).filter(N8NChangeJournal.version > since)
+    if not is_superadmin:
+        granted = select(UserWorkflowAccess.workflow_id).where(UserWorkflowAccess.user_id == user_id)
+        # Execution tombstones keep their workflow id; a deleted workflow's grants are gone,
+        # so its tombstone goes to the users recorded in its audience
+        query = query.filter(or_(
+            N8NChangeJournal.workflow_id.in_(granted),
+            and_(N8NChangeJournal.op == "delete", N8NChangeJournal.audience.any(user_id))
+        ))
+    entries = query.order_by(N8NChangeJournal.version).limit(limit + 1).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    workflow_ids = {e.entity_id for e in entries if e.entity == "workflow" and e.op == "upsert"}
+    execution_ids = {e.entity_id for e in entries if e.entity == "execution" and e.op == "upsert"}
+    workflows = {
+        wf.id: {"id": wf.id, "instance_id": str(wf.instance_id), "n8n_id": wf.n8n_id, "name": wf.name,
+                "active": wf.active, "updated_at": _iso(wf.updated_at)}
+        for wf in db.query(N8NWorkflow).filter(N8NWorkflow.id.in_(workflow_ids)).all()
+    } if workflow_ids else {}
+    executions = {
+        ex.id: {"id": ex.id, "instance_id": str(ex.instance_id), "n8n_id": ex.n8n_id, "workflow_id": ex.workflow_id,
+                "status": ex.status, "finished": ex.finished, "started_at": _iso(ex.started_at),
+                "stopped_at": _iso(ex.stopped_at)}
+        for ex in db.query(N8NExecution).filter(N8NExecution.id.in_(execution_ids)).all()
+    } if execution_ids else {}
+
+    changes = []
+    for e in entries:
+        data: Optional[Dict[str, Any]] = None
+        if e.op == "upsert":
+            # None if the row has been deleted since; its tombstone follows later in the feed
+            data = (workflows if e.entity == "workflow" else executions).get(e.entity_id)
+        changes.append({
+            "version": e.version,
+            "entity": e.entity,
+            "id": e.entity_id,
+            "workflow_id": e.workflow_id,
+            "op": e.op,
+            "changed_at": _iso(e.changed_at),
+            "data": data,
+        })
+    # When this page is the tail, hand back the journal head so filtered-out entries are skipped too
+    version = entries[-1].version if has_more else max(current, entries[-1].version if entries else since)
+    return {"reset": False, "version": version, "has_more": has_more, "changes": changes}
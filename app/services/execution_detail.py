@@ -0,0 +1,103 @@
+import json
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+import httpx
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from ..core.config import (
+    EXECUTION_DETAIL_CACHE_MAX_ENTRIES,
+    EXECUTION_DETAIL_CACHE_MAX_BYTES,
+    EXECUTION_DETAIL_MAX_ENTRY_BYTES,
+)
+from ..database.models import N8NExecution, N8NExecutionDetail
+from .instance_registry import instance_registry
+from .n8n_client import n8n_clients
+
+# Only bump last_accessed_at when it is older than this, so a cache hit
+# is normally a single read instead of a read plus an UPDATE.
+_TOUCH_INTERVAL = timedelta(seconds=60)
+
+# Executions in these states can still change, so they are never cached.
+_UNFINISHED_STATUSES = {"running", "waiting", "new", "unknown"}
+
+
+class ExecutionDetailError(Exception):
+    """Raised when an execution's detail cannot be fetched from its n8n instance."""
+
+
+def _is_cacheable(detail: Dict[str, Any]) -> bool:
+    status = detail.get("status")
+    if status is not None:
+        return status not in _UNFINISHED_STATUSES
+    return bool(detail.get("finished", False))
+
+
+def _fetch_from_instance(execution: N8NExecution) -> Dict[str, Any]:
+    inst = instance_registry.get_by_id(execution.instance_id)
+    if not inst:
+        raise ExecutionDetailError("The n8n instance for this execution is not active")
+    try:
+        return n8n_clients.get(inst, f"/executions/{execution.n8n_id}", params={"includeData": "true"}, timeout=30).json()
+    except (httpx.HTTPError, ValueError) as e:
+        raise ExecutionDetailError(f"Failed to fetch execution from n8n: {e}")
+
+
+def _evict(db: Session):
+    """Drop least recently accessed entries beyond the entry and byte budgets."""
+    db.execute(
+        text(
+            """
+            DELETE FROM n8n_execution_details
+            WHERE execution_id IN (
+                SELECT execution_id FROM (
+                    SELECT execution_id,
+                           row_number() OVER w AS rn,
+                           sum(size_bytes) OVER w AS running_bytes
+                    FROM n8n_execution_details
+                    WINDOW w AS (ORDER BY last_accessed_at DESC, execution_id)
+                ) ranked
+                WHERE rn > :max_entries OR running_bytes > :max_bytes
+            )
+            """
+        ),
+        {"max_entries": EXECUTION_DETAIL_CACHE_MAX_ENTRIES, "max_bytes": EXECUTION_DETAIL_CACHE_MAX_BYTES},
+    )
+
+
+def get_execution_detail(db: Session, execution: N8NExecution) -> Tuple[Dict[str, Any], bool]:
+    """Return (detail, cached) for an execution, fetching from n8n on a cache miss."""
+    execution_id = execution.id
+    now = datetime.now(timezone.utc)
+    entry: Optional[N8NExecutionDetail] = db.query(N8NExecutionDetail).filter(
+        N8NExecutionDetail.execution_id == execution_id
+    ).first()
+    if entry:
+        detail = json.loads(zlib.decompress(entry.payload))
+        if not entry.last_accessed_at or now - entry.last_accessed_at > _TOUCH_INTERVAL:
+            entry.last_accessed_at = now
+            db.commit()
+        return detail, True
+
+    detail = _fetch_from_instance(execution)
+    if not _is_cacheable(detail):
+        return detail, False
+
+    payload = zlib.compress(json.dumps(detail, separators=(",", ":")).encode(), 6)
+    if len(payload) > EXECUTION_DETAIL_MAX_ENTRY_BYTES:
+        return detail, False
+    try:
+        db.add(N8NExecutionDetail(
+            execution_id=execution_id,
+            payload=payload,
+            size_bytes=len(payload),
+            fetched_at=now,
+            last_accessed_at=now,
+        ))
+        db.flush()
+        _evict(db)
+        db.commit()
+    except Exception:
+        # A concurrent request may have cached it first; serving the detail matters more.
+        db.rollback()
+    return detail, False
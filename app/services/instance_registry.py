@@ -0,0 +1,124 @@
+import threading
+import time
+import uuid
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+from ..core.config import N8N_URL, N8N_API_KEY, LOCAL_N8N_URL, LOCAL_N8N_API_KEY, INSTANCE_REGISTRY_TTL_SECONDS
+from ..database.database import SessionLocal
+from ..database.models import N8NInstance
+
+InstanceSnapshot = Tuple[Mapping[str, Any], ...]
+
+_RETRY_SECONDS = 5.0
+
+
+def env_instance_id(prefix: str) -> uuid.UUID:
+    """Stable instance_id for instances configured through environment variables (no n8n_instances row).
+
+    Matches uuid_generate_v5(uuid_ns_url(), 'n8n-env:' || prefix) used by migration 006.
+    """
+    return uuid.uuid5(uuid.NAMESPACE_URL, f"n8n-env:{prefix}")
+
+
+def _env_instances() -> List[Dict[str, Any]]:
+    instances: List[Dict[str, Any]] = []
+    if N8N_URL:
+        instances.append({"prefix": "env", "name": "Primary", "base_url": N8N_URL, "api_key": N8N_API_KEY,
+                          "instance_id": env_instance_id("env")})
+    if LOCAL_N8N_URL:
+        instances.append({"prefix": "local", "name": "Local", "base_url": LOCAL_N8N_URL, "api_key": LOCAL_N8N_API_KEY,
+                          "instance_id": env_instance_id("local")})
+    return instances
+
+
+def _read_instances() -> List[Dict[str, Any]]:
+    """Load n8n instances from environment and database (raises if the DB read fails)"""
+    instances = _env_instances()
+
+    # Load from database
+    db = SessionLocal()
+    try:
+        db_instances = db.query(N8NInstance).filter(N8NInstance.active == True).all()
+        for inst in db_instances:
+            prefix = (inst.identifier or "").strip() if inst.identifier else f"inst_{inst.id}"
+            prefix = prefix.replace(":", "-")  # avoid colon in prefix
+            instances.append({
+                "prefix": prefix,
+                "name": inst.name or "instance",
+                "base_url": inst.base_url,
+                "api_key": inst.api_key or "",
+                "instance_id": inst.id,
+            })
+    finally:
+        db.close()
+
+    # Deduplicate by prefix
+    seen: Set[str] = set()
+    unique: List[Dict[str, Any]] = []
+    for inst in instances:
+        if not inst.get("base_url") or inst["prefix"] in seen:
+            continue
+        seen.add(inst["prefix"])
+        unique.append(inst)
+    return unique
+
+
+class InstanceRegistry:
+    """Process-wide cache of the configured n8n instances.
+
+    Readers get an immutable snapshot (a tuple of read-only mappings) without
+    touching the DB. The snapshot is reloaded after ``invalidate()`` (called by
+    the admin instance endpoints) or once it is older than the TTL, which also
+    covers changes made through another process. If a reload fails the
+    previous snapshot is kept.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._snapshot: Optional[InstanceSnapshot] = None
+        self._loaded_at = 0.0
+        # Bumped by invalidate(); a reload that started before the bump does not satisfy it.
+        self._generation = 0
+        self._loaded_generation = -1
+        # False while the snapshot lacks DB-registered instances (DB unreachable on first load)
+        self.complete = False
+
+    def _needs_reload(self) -> bool:
+        return (
+            self._loaded_generation != self._generation
+            or self._snapshot is None
+            or time.monotonic() - self._loaded_at > self._ttl
+        )
+
+    def snapshot(self) -> InstanceSnapshot:
+        if not self._needs_reload():
+            return self._snapshot
+        with self._lock:
+            if self._needs_reload():
+                generation = self._generation
+                try:
+                    self._snapshot = tuple(MappingProxyType(inst) for inst in _read_instances())
+                    self._loaded_at = time.monotonic()
+                    self.complete = True
+                except Exception:
+                    if self._snapshot is None:
+                        # First load with the DB unavailable: serve env-defined instances only.
+                        self._snapshot = tuple(MappingProxyType(inst) for inst in _env_instances())
+                        self.complete = False
+                    # Retry shortly rather than on every read while the DB is down.
+                    self._loaded_at = time.monotonic() - self._ttl + _RETRY_SECONDS
+                self._loaded_generation = generation
+            return self._snapshot
+
+    def get(self, prefix: str) -> Optional[Mapping[str, Any]]:
+        return next((inst for inst in self.snapshot() if inst["prefix"] == prefix), None)
+
+    def get_by_id(self, instance_id: uuid.UUID) -> Optional[Mapping[str, Any]]:
+        return next((inst for inst in self.snapshot() if inst["instance_id"] == instance_id), None)
+
+    def invalidate(self):
+        self._generation += 1
+
+
+instance_registry = InstanceRegistry(INSTANCE_REGISTRY_TTL_SECONDS)
@@ -0,0 +1,124 @@
+import codecs
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+_WS = " \t\n\r"
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+class JsonArrayStream:
+    """Incrementally decode the items of a JSON array from a stream of byte chunks.
+
+    Accepts either a top-level array or an object whose ``key`` member is the
+    array (n8n returns ``{"data": [...], "nextCursor": ...}``). Items are yielded
+    as soon as they are complete, so only one item plus a read-ahead chunk is
+    held in memory. Once iteration finishes, the other top-level members of the
+    object are available in ``extra``.
+
+    This is a memory bound, not a speedup: decoding costs about 1.5x the CPU of
+    json.loads on the whole body (scripts/bench_normalize.py), so use it for
+    responses whose size is not bounded.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], key: str = "data"):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.key = key
+        self.extra: Dict[str, Any] = {}
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer; False once the stream is exhausted."""
+        if self._eof:
+            return False
+        # Drop the consumed prefix so the buffer stays around one item in size.
+        if self._pos > 65536:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self._buf += self._utf8.decode(chunk)
+                return True
+        self._buf += self._utf8.decode(b"", final=True)
+        self._eof = True
+        return False
+
+    def _peek(self) -> Optional[str]:
+        """Skip whitespace and return the next significant character (None at EOF)."""
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in _WS:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return None
+
+    def _expect(self, chars: str) -> str:
+        ch = self._peek()
+        if ch is None or ch not in chars:
+            raise ValueError(f"Expected one of {chars!r} at offset {self._pos}, got {ch!r}")
+        self._pos += 1
+        return ch
+
+    def _value(self) -> Any:
+        """Decode one complete JSON value starting at the current position."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number ending at the buffer edge, or followed by a number character
+            # (the decoder stops early at e.g. "1." or "1e"), may continue in the next chunk.
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and (end >= len(self._buf) or self._buf[end] in _NUMBER_CHARS)
+                    and self._fill()):
+                continue
+            self._pos = end
+            return value
+
+    def _members(self) -> Iterator[str]:
+        """Yield top-level object keys, leaving the position at each member's value."""
+        first = True
+        while True:
+            if self._peek() == "}":
+                self._pos += 1
+                return
+            if not first:
+                self._expect(",")
+            first = False
+            key = self._value()
+            self._expect(":")
+            yield key
+
+    def _array_items(self) -> Iterator[Any]:
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(",]") == "]":
+                return
+
+    def __iter__(self) -> Iterator[Any]:
+        ch = self._peek()
+        if ch == "[":
+            yield from self._array_items()
+            return
+        if ch != "{":
+            raise ValueError("Expected a JSON array or object")
+        self._pos += 1
+        members = self._members()
+        for member in members:
+            if member == self.key and self._peek() == "[":
+                yield from self._array_items()
+            else:
+                self.extra[member] = self._value()
@@ -0,0 +1,146 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import httpx
+from ..core.config import (
+    N8N_HTTP2,
+    N8N_HTTP_MAX_CONNECTIONS,
+    N8N_HTTP_MAX_KEEPALIVE,
+    N8N_HTTP_KEEPALIVE_EXPIRY,
+    N8N_HTTP_TIMEOUT,
+)
+
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+
+class _ClientStats:
+    """Request/connection counters fed by httpcore trace events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.transport_errors = 0
+        self.http_versions: Counter = Counter()
+
+    def trace(self, event_name: str, info: Dict[str, Any]):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    def record(self, response: Optional[httpx.Response]):
+        with self._lock:
+            self.requests += 1
+            if response is None:
+                self.transport_errors += 1
+            else:
+                self.http_versions[response.http_version] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            reused = max(self.requests - self.connections_opened, 0)
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "tls_handshakes": self.tls_handshakes,
+                "transport_errors": self.transport_errors,
+                "reuse_ratio": round(reused / self.requests, 3) if self.requests else None,
+                "http_versions": dict(self.http_versions),
+            }
+
+
+class N8NClientPool:
+    """One long-lived keep-alive httpx client per n8n instance (base_url + api key)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Tuple[httpx.Client, _ClientStats]] = {}
+
+    def _key(self, inst: Dict[str, Any]) -> Tuple[str, str]:
+        return (inst["base_url"].rstrip("/"), inst.get("api_key") or "")
+
+    def _client(self, inst: Dict[str, Any]) -> Tuple[httpx.Client, _ClientStats]:
+        key = self._key(inst)
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+        with self._lock:
+            if key not in self._entries:
+                headers = {"Accept": "application/json", "Accept-Encoding": "gzip"}
+                if key[1]:
+                    headers["X-N8N-API-KEY"] = key[1]
+                client = httpx.Client(
+                    base_url=key[0],
+                    headers=headers,
+                    http2=N8N_HTTP2 and _HTTP2_AVAILABLE,
+                    timeout=N8N_HTTP_TIMEOUT,
+                    limits=httpx.Limits(
+                        max_connections=N8N_HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=N8N_HTTP_MAX_KEEPALIVE,
+                        keepalive_expiry=N8N_HTTP_KEEPALIVE_EXPIRY,
+                    ),
+                )
+                self._entries[key] = (client, _ClientStats())
+            return self._entries[key]
+
+    def get(self, inst: Dict[str, Any], path: str, params: Optional[Dict[str, Any]] = None,
+            timeout: Optional[float] = None) -> httpx.Response:
+        """GET ``path`` from the instance and return the fully read response (raises on HTTP errors)."""
+        client, stats = self._client(inst)
+        response = None
+        try:
+            response = client.get(path, params=params, timeout=timeout or N8N_HTTP_TIMEOUT,
+                                  extensions={"trace": stats.trace})
+            response.raise_for_status()
+            return response
+        finally:
+            stats.record(response)
+
+    @contextmanager
+    def stream(self, inst: Dict[str, Any], path: str, params: Optional[Dict[str, Any]] = None,
+               headers: Optional[Dict[str, str]] = None) -> Iterator[httpx.Response]:
+        """Streaming GET; the body is read (and gunzipped) incrementally via ``iter_bytes()``.
+
+        A 304 answer to a conditional request (If-None-Match in ``headers``) is yielded, not raised.
+        """
+        client, stats = self._client(inst)
+        response = None
+        try:
+            with client.stream("GET", path, params=params, headers=headers, extensions={"trace": stats.trace}) as response:
+                if not (headers and response.status_code == 304):
+                    response.raise_for_status()
+                yield response
+        finally:
+            stats.record(response)
+
+    def prune(self, instances: Iterable[Dict[str, Any]]):
+        """Close clients for instances that are no longer configured (or whose url/key changed)."""
+        keep = {self._key(inst) for inst in instances if inst.get("base_url")}
+        with self._lock:
+            stale = [self._entries.pop(key) for key in list(self._entries) if key not in keep]
+        for client, _ in stale:
+            client.close()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._entries.items())
+        return [{"base_url": base_url, **stats.snapshot()} for (base_url, _), (_, stats) in items]
+
+    def close(self):
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for client, _ in entries:
+            client.close()
+
+
+n8n_clients = N8NClientPool()
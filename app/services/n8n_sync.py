@@ -1,217 +1,527 @@
-from datetime import datetime
-from typing import Any, Dict, List, Set
+import hashlib
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+import uuid
 from dateutil import parser as date_parser
-import requests
+import httpx
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from ..core.config import N8N_URL, N8N_API_KEY, LOCAL_N8N_URL, LOCAL_N8N_API_KEY
-from ..database.database import SessionLocal
-from ..database.models import N8NWorkflow, N8NExecution, N8NInstance, UserWorkflowAccess
+from sqlalchemy import and_, delete, func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from ..core.config import N8N_SYNC_EXECUTIONS_PAGE_SIZE, N8N_SYNC_CATCHUP_MAX_PAGES
+from ..database.database import SyncSessionLocal
+from ..database.models import N8NWorkflow, N8NWorkflowBlob, N8NWorkflowVersion, N8NExecution, UserWorkflowAccess
+from .json_stream import JsonArrayStream
+from .n8n_client import n8n_clients
+from .instance_registry import instance_registry
+from . import change_journal, sync_checkpoints
 
 def n8n_headers(api_key: str):
     return {"X-N8N-API-KEY": api_key} if api_key else {}
 
-def _normalize_workflows(payload: Any, id_prefix: str = "") -> List[Dict[str, Any]]:
-    data = payload.get("data") if isinstance(payload, dict) else payload
-    if not isinstance(data, list):
-        return []
+_fromisoformat = datetime.fromisoformat
+
+def _parse_ts(value: Any) -> Optional[datetime]:
+    """Parse an n8n timestamp. ISO-8601 takes the C fast path; anything else falls back to dateutil."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return _fromisoformat(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return date_parser.parse(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+def _payload_rows(payload: Any) -> Iterable[Any]:
+    """Rows of an n8n list response: {"data": [...]}, a bare list, or a JsonArrayStream."""
+    if isinstance(payload, dict):
+        data = payload.get("data")
+        return data if isinstance(data, list) else ()
+    if isinstance(payload, (list, tuple, JsonArrayStream)):
+        return payload
+    return ()
+
+# Parts of an n8n workflow that make up its definition. staticData (trigger
+# state) and pinData change without the workflow being edited, so they are left out.
+_DEFINITION_KEYS = ("nodes", "connections", "settings")
+
+def _canonical_definition(wf: Dict[str, Any]) -> Optional[bytes]:
+    if wf.get("nodes") is None:
+        return None  # list response without definitions
+    definition = {key: wf.get(key) for key in _DEFINITION_KEYS}
+    return json.dumps(definition, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+def _normalize_workflows(payload: Any, id_prefix: str = "", instance_id: Optional[uuid.UUID] = None,
+                         definitions: Optional[Dict[str, bytes]] = None) -> List[Dict[str, Any]]:
+    """Normalize n8n workflows. Canonical definition JSON is collected into ``definitions`` by hash."""
+    now = datetime.now(timezone.utc)
+    parse_ts = _parse_ts
     normalized: List[Dict[str, Any]] = []
-    for wf in data:
-        if not isinstance(wf, dict):
+    append = normalized.append
+    for wf in _payload_rows(payload):
+        if type(wf) is not dict:
             continue
         raw_id = wf.get("id")
-        normalized.append({
-            "id": f"{id_prefix}{raw_id}" if id_prefix else str(raw_id),
+        definition = _canonical_definition(wf)
+        definition_hash = hashlib.sha256(definition).hexdigest() if definition is not None else None
+        if definitions is not None and definition_hash is not None:
+            definitions[definition_hash] = definition
+        n8n_updated_at = parse_ts(wf.get("updatedAt"))
+        append({
+            "id": f"{id_prefix}{raw_id}",
+            "instance_id": instance_id,
+            "n8n_id": str(raw_id),
             "name": wf.get("name"),
             "active": bool(wf.get("active", False)),
-            "updated_at": datetime.utcnow()
+            "updated_at": n8n_updated_at or now,
+            "n8n_updated_at": n8n_updated_at,
+            "definition_hash": definition_hash,
         })
     return normalized
 
-def _normalize_executions(payload: Any, id_prefix: str = "") -> List[Dict[str, Any]]:
-    data = payload.get("data") if isinstance(payload, dict) else payload
-    if not isinstance(data, list):
-        return []
+def _normalize_executions(payload: Any, id_prefix: str = "", instance_id: Optional[uuid.UUID] = None) -> List[Dict[str, Any]]:
+    parse_ts = _parse_ts
     normalized: List[Dict[str, Any]] = []
-    for ex in data:
-        if not isinstance(ex, dict):
+    append = normalized.append
+    for ex in _payload_rows(payload):
+        if type(ex) is not dict:
             continue
-        ex_id = ex.get("id") or ex.get("executionId")
-        wf_id = ex.get("workflowId") or ex.get("workflow_id")
-        finished = bool(ex.get("finished", False))
-        status = ex.get("status")
+        get = ex.get
+        ex_id = get("id") or get("executionId")
+        if ex_id is None:
+            continue
+        wf_id = get("workflowId") or get("workflow_id")
+        finished = bool(get("finished", False))
+        status = get("status")
         if status is None:
             status = "finished" if finished else "running"
-        started_at = ex.get("startedAt") or ex.get("started_at")
-        stopped_at = ex.get("stoppedAt") or ex.get("stopped_at")
-        
-        # Parse datetime strings if they exist
-        started_at_dt = None
-        stopped_at_dt = None
-        if started_at:
-            try:
-                started_at_dt = date_parser.parse(started_at) if isinstance(started_at, str) else started_at
-            except:
-                pass
-        if stopped_at:
-            try:
-                stopped_at_dt = date_parser.parse(stopped_at) if isinstance(stopped_at, str) else stopped_at
-            except:
-                pass
-        
-        normalized.append({
-            "id": (f"{id_prefix}{ex_id}" if id_prefix else str(ex_id)) if ex_id is not None else None,
-            "workflow_id": (f"{id_prefix}{wf_id}" if id_prefix else str(wf_id)) if wf_id is not None else None,
+        append({
+            "id": f"{id_prefix}{ex_id}",
+            "instance_id": instance_id,
+            "n8n_id": str(ex_id),
+            "workflow_id": f"{id_prefix}{wf_id}" if wf_id is not None else None,
             "status": status,
             "finished": finished,
-            "started_at": started_at_dt,
-            "stopped_at": stopped_at_dt,
+            "started_at": parse_ts(get("startedAt") or get("started_at")),
+            "stopped_at": parse_ts(get("stoppedAt") or get("stopped_at")),
         })
-    return [row for row in normalized if row.get("id") is not None]
+    return normalized
 
-def _upsert_workflows(db: Session, workflows: List[Dict[str, Any]]):
-    """Upsert workflows into database"""
+def _stream_rows(response: httpx.Response) -> JsonArrayStream:
+    """Decode list items straight off a streamed response instead of materializing response.json().
+
+    For unbounded lists (/workflows, with full definitions): memory stays at one
+    item plus a read-ahead chunk. It costs more CPU than json.loads, so
+    limit-bounded pages use _read_page instead.
+    """
+    return JsonArrayStream(response.iter_bytes(chunk_size=65536))
+
+def _read_page(response: httpx.Response) -> Tuple[Any, Optional[str]]:
+    """(payload, nextCursor) of one page of a paginated list; its size is bounded by ``limit``, so json.loads."""
+    body = json.loads(response.read())
+    cursor = body.get("nextCursor") if isinstance(body, dict) else None
+    return body, cursor or None
+
+def _dedupe_by_id(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep the last row per id; a single ON CONFLICT statement cannot touch a row twice."""
+    return list({row["id"]: row for row in rows}.values())
+
+def _upsert_workflows(db: Session, workflows: List[Dict[str, Any]],
+                      definitions: Optional[Dict[str, bytes]] = None) -> List[str]:
+    """Upsert workflows into database; unchanged rows are left alone. Returns the ids that changed.
+
+    A workflow whose definition hash differs from the stored one gets a new
+    n8n_workflow_versions row; its definition is stored once per hash in
+    n8n_workflow_blobs, however many workflows or versions share it.
+    """
     if not workflows:
-        return
-    for wf_data in workflows:
-        workflow = db.query(N8NWorkflow).filter(N8NWorkflow.id == wf_data["id"]).first()
-        if workflow:
-            workflow.name = wf_data["name"]
-            workflow.active = wf_data["active"]
-            workflow.updated_at = wf_data["updated_at"]
-        else:
-            workflow = N8NWorkflow(**wf_data)
-            db.add(workflow)
+        return []
+    rows = _dedupe_by_id(workflows)
+    stored = dict(
+        db.query(N8NWorkflow.id, N8NWorkflow.definition_hash)
+        .filter(N8NWorkflow.id.in_([wf["id"] for wf in rows]))
+        .all()
+    )
+    new_versions = [
+        wf for wf in rows
+        if wf["definition_hash"] is not None and stored.get(wf["id"]) != wf["definition_hash"]
+    ]
+    if new_versions and definitions:
+        blobs = {}
+        for wf in new_versions:
+            definition = definitions.get(wf["definition_hash"])
+            if definition is not None and wf["definition_hash"] not in blobs:
+                compressed = zlib.compress(definition, 6)
+                blobs[wf["definition_hash"]] = {"hash": wf["definition_hash"], "definition": compressed, "size_bytes": len(compressed)}
+        if blobs:
+            db.execute(pg_insert(N8NWorkflowBlob).values(list(blobs.values())).on_conflict_do_nothing())
+        new_versions = [wf for wf in new_versions if wf["definition_hash"] in blobs]
+    elif new_versions:
+        new_versions = []
+
+    stmt = pg_insert(N8NWorkflow).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[N8NWorkflow.instance_id, N8NWorkflow.n8n_id],
+        set_={
+            # Re-keys the row (and, via ON UPDATE CASCADE, its executions and grants) if the prefix changed
+            "id": stmt.excluded.id,
+            "name": stmt.excluded.name,
+            "active": stmt.excluded.active,
+            "updated_at": stmt.excluded.updated_at,
+            "n8n_updated_at": stmt.excluded.n8n_updated_at,
+            "definition_hash": func.coalesce(stmt.excluded.definition_hash, N8NWorkflow.definition_hash),
+        },
+        where=tuple_(
+            N8NWorkflow.id, N8NWorkflow.name, N8NWorkflow.active, N8NWorkflow.n8n_updated_at
+        ).is_distinct_from(tuple_(
+            stmt.excluded.id, stmt.excluded.name, stmt.excluded.active, stmt.excluded.n8n_updated_at
+        )) | and_(
+            stmt.excluded.definition_hash.isnot(None),
+            N8NWorkflow.definition_hash.is_distinct_from(stmt.excluded.definition_hash)
+        ),
+    )
+    changed = change_journal.record_changes(
+        db, stmt.returning(N8NWorkflow.id, N8NWorkflow.id.label("workflow_id")), "workflow", "upsert"
+    )
+    if new_versions:
+        db.execute(pg_insert(N8NWorkflowVersion).values([
+            {"workflow_id": wf["id"], "definition_hash": wf["definition_hash"], "n8n_updated_at": wf["n8n_updated_at"]}
+            for wf in new_versions
+        ]))
     db.commit()
+    return changed
 
-def _upsert_executions(db: Session, executions: List[Dict[str, Any]]):
-    """Upsert executions into database"""
-    if not executions:
+# Recompute summaries for the given workflows, plus ones that have never been
+# summarized and ones whose 24h/running counts may have aged out since the
+# last refresh.
+_REFRESH_SUMMARIES_SQL = text("""
+    INSERT INTO n8n_workflow_summaries (
+        workflow_id, last_execution_id, last_status, last_started_at,
+        execution_count, running_count, success_24h, error_24h, refreshed_at
+    )
+    SELECT w.id, last.id, last.status, last.started_at,
+           COALESCE(counts.total, 0), COALESCE(counts.running, 0),
+           COALESCE(counts.success_24h, 0), COALESCE(counts.error_24h, 0), now()
+    FROM n8n_workflows w
+    LEFT JOIN LATERAL (
+        SELECT e.id, e.status, e.started_at
+        FROM n8n_executions e
+        WHERE e.workflow_id = w.id
+        ORDER BY e.started_at DESC NULLS LAST
+        LIMIT 1
+    ) last ON true
+    LEFT JOIN LATERAL (
+        SELECT count(*) AS total,
+               count(*) FILTER (WHERE e.status IN ('running', 'new', 'waiting')) AS running,
+               count(*) FILTER (WHERE e.started_at >= now() - interval '24 hours'
+                                  AND e.status IN ('success', 'finished')) AS success_24h,
+               count(*) FILTER (WHERE e.started_at >= now() - interval '24 hours'
+                                  AND e.status IN ('error', 'crashed', 'failed')) AS error_24h
+        FROM n8n_executions e
+        WHERE e.workflow_id = w.id
+    ) counts ON true
+    WHERE w.id = ANY(:workflow_ids)
+       OR (:include_stale AND (
+            NOT EXISTS (SELECT 1 FROM n8n_workflow_summaries s WHERE s.workflow_id = w.id)
+            OR w.id IN (
+                SELECT s.workflow_id FROM n8n_workflow_summaries s
+                WHERE s.refreshed_at < now() - interval '10 minutes'
+                  AND (s.running_count > 0 OR s.success_24h > 0 OR s.error_24h > 0)
+            )
+       ))
+    ON CONFLICT (workflow_id) DO UPDATE SET
+        last_execution_id = excluded.last_execution_id,
+        last_status = excluded.last_status,
+        last_started_at = excluded.last_started_at,
+        execution_count = excluded.execution_count,
+        running_count = excluded.running_count,
+        success_24h = excluded.success_24h,
+        error_24h = excluded.error_24h,
+        refreshed_at = excluded.refreshed_at
+""")
+
+def _refresh_workflow_summaries(db: Session, workflow_ids: Iterable[str], include_stale: bool = False):
+    """Incrementally maintain n8n_workflow_summaries for the workflows whose executions changed."""
+    ids = list(set(workflow_ids))
+    if not ids and not include_stale:
         return
-    for ex_data in executions:
-        execution = db.query(N8NExecution).filter(N8NExecution.id == ex_data["id"]).first()
-        if execution:
-            execution.workflow_id = ex_data["workflow_id"]
-            execution.status = ex_data["status"]
-            execution.finished = ex_data["finished"]
-            execution.started_at = ex_data.get("started_at")
-            execution.stopped_at = ex_data.get("stopped_at")
-        else:
-            execution = N8NExecution(**ex_data)
-            db.add(execution)
+    db.execute(_REFRESH_SUMMARIES_SQL, {"workflow_ids": ids, "include_stale": include_stale})
+
+def _upsert_executions(db: Session, executions: List[Dict[str, Any]], refresh_stale_summaries: bool = False,
+                       changed_workflow_ids: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+    """Upsert executions into database; rows whose workflow is unknown are skipped and unchanged
+    rows are not rewritten. Returns the accepted rows; workflows whose executions actually changed
+    are added to ``changed_workflow_ids``."""
+    if not executions:
+        if refresh_stale_summaries:
+            _refresh_workflow_summaries(db, [], include_stale=True)
+            db.commit()
+        return []
+    rows = [ex for ex in _dedupe_by_id(executions) if ex.get("workflow_id") is not None]
+    wf_ids = {ex["workflow_id"] for ex in rows}
+    known = {row[0] for row in db.query(N8NWorkflow.id).filter(N8NWorkflow.id.in_(wf_ids)).all()} if wf_ids else set()
+    rows = [ex for ex in rows if ex["workflow_id"] in known]
+    if not rows:
+        if refresh_stale_summaries:
+            _refresh_workflow_summaries(db, [], include_stale=True)
+            db.commit()
+        return []
+    stmt = pg_insert(N8NExecution).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[N8NExecution.instance_id, N8NExecution.n8n_id],
+        set_={
+            "id": stmt.excluded.id,
+            "workflow_id": stmt.excluded.workflow_id,
+            "status": stmt.excluded.status,
+            "finished": stmt.excluded.finished,
+            "started_at": stmt.excluded.started_at,
+            "stopped_at": stmt.excluded.stopped_at,
+        },
+        where=tuple_(
+            N8NExecution.id, N8NExecution.workflow_id, N8NExecution.status,
+            N8NExecution.finished, N8NExecution.started_at, N8NExecution.stopped_at
+        ).is_distinct_from(tuple_(
+            stmt.excluded.id, stmt.excluded.workflow_id, stmt.excluded.status,
+            stmt.excluded.finished, stmt.excluded.started_at, stmt.excluded.stopped_at
+        )),
+    )
+    changed = change_journal.record_changes(
+        db, stmt.returning(N8NExecution.id, N8NExecution.workflow_id), "execution", "upsert"
+    )
+    _refresh_workflow_summaries(db, changed, include_stale=refresh_stale_summaries)
+    if changed_workflow_ids is not None:
+        changed_workflow_ids.update(changed)
     db.commit()
+    return rows
 
-def _load_instances() -> List[Dict[str, Any]]:
-    """Load n8n instances from environment and database"""
-    instances: List[Dict[str, Any]] = []
-    if N8N_URL:
-        instances.append({"prefix": "env", "name": "Primary", "base_url": N8N_URL, "api_key": N8N_API_KEY})
-    if LOCAL_N8N_URL:
-        instances.append({"prefix": "local", "name": "Local", "base_url": LOCAL_N8N_URL, "api_key": LOCAL_N8N_API_KEY})
-    
-    # Load from database
-    db = SessionLocal()
-    try:
-        db_instances = db.query(N8NInstance).filter(N8NInstance.active == True).all()
-        for inst in db_instances:
-            prefix = (inst.identifier or "").strip() if inst.identifier else f"inst_{inst.id}"
-            prefix = prefix.replace(":", "-")  # avoid colon in prefix
-            instances.append({
-                "prefix": prefix,
-                "name": inst.name or "instance",
-                "base_url": inst.base_url,
-                "api_key": inst.api_key or "",
-            })
-    except Exception:
-        pass
-    finally:
-        db.close()
-    
-    # Deduplicate by prefix
-    seen: Set[str] = set()
-    unique: List[Dict[str, Any]] = []
-    for inst in instances:
-        if not inst.get("base_url") or inst["prefix"] in seen:
-            continue
-        seen.add(inst["prefix"])
-        unique.append(inst)
-    return unique
+def _delete_workflows(db: Session, condition) -> List[str]:
+    """Delete workflows matching ``condition`` together with their executions and access grants.
+    Returns the deleted workflow ids."""
+    stale_ids = select(N8NWorkflow.id).where(condition)
+    db.query(N8NExecution).filter(N8NExecution.workflow_id.in_(stale_ids)).delete(synchronize_session=False)
+    # One tombstone per workflow, addressed to the users granted it; clients drop its executions with it
+    deleted = change_journal.record_changes(
+        db, delete(N8NWorkflow).where(condition).returning(N8NWorkflow.id, N8NWorkflow.id.label("workflow_id")),
+        "workflow", "delete", with_audience=True
+    )
+    if deleted:
+        # Normally already removed by the ON DELETE CASCADE
+        db.query(UserWorkflowAccess).filter(UserWorkflowAccess.workflow_id.in_(deleted)).delete(synchronize_session=False)
+    return deleted
+
+def _group_by_instance(workflow_ids: Iterable[str]) -> Dict[str, List[str]]:
+    """Group "<prefix>:<n8n id>" workflow ids by instance prefix."""
+    grouped: Dict[str, List[str]] = {}
+    for workflow_id in set(workflow_ids):
+        grouped.setdefault(workflow_id.split(":", 1)[0], []).append(workflow_id)
+    return {prefix: sorted(ids) for prefix, ids in grouped.items()}
+
+def _fetch_executions(inst: Mapping[str, Any], state: Dict[str, Any]) -> Tuple[Optional[List[Dict[str, Any]]], List[Dict[str, Any]], Dict[str, Any]]:
+    """Fetch the newest page of executions, plus older pages when a gap opened behind it.
 
-def sync_once() -> Dict[str, int]:
-    """Sync workflows and executions from n8n instances to database"""
+    Returns (head page, older catch-up rows, checkpoint updates). The head page
+    is None when n8n answered 304 to the stored ETag. The checkpoint's
+    last_execution_id is a watermark below which everything was ingested; when
+    the head page does not reach down to it (more executions arrived since the
+    last cycle than fit in a page, typically across a restart), older pages are
+    followed from the head page's cursor, at most N8N_SYNC_CATCHUP_MAX_PAGES per
+    cycle, and the cursor is checkpointed so the next cycle (or process)
+    continues there. Without a watermark (first sync of an instance) no history
+    is fetched; that is the backfill job's work.
+    """
+    prefix = f"{inst['prefix']}:"
+    params: Dict[str, Any] = {"limit": N8N_SYNC_EXECUTIONS_PAGE_SIZE}
+    headers = {"If-None-Match": state["executions_etag"]} if state["executions_etag"] else None
+    head: Optional[List[Dict[str, Any]]] = None
+    next_cursor = None
+    update: Dict[str, Any] = {}
+    with n8n_clients.stream(inst, "/executions", params=params, headers=headers) as r:
+        if r.status_code != 304:
+            body, next_cursor = _read_page(r)
+            head = _normalize_executions(body, id_prefix=prefix, instance_id=inst["instance_id"])
+            update["executions_etag"] = r.headers.get("etag")
+
+    watermark = sync_checkpoints.id_key(state["last_execution_id"])
+    head_ids = [key for key in (sync_checkpoints.id_key(ex["n8n_id"]) for ex in head or ()) if key is not None]
+    cursor, target = state["catchup_cursor"], sync_checkpoints.id_key(state["catchup_high_id"])
+    if cursor is None and watermark is not None and head_ids and min(head_ids) > watermark and next_cursor:
+        cursor, target = next_cursor, max(head_ids)
+
+    older: List[Dict[str, Any]] = []
+    pages = 0
+    while cursor and pages < N8N_SYNC_CATCHUP_MAX_PAGES:
+        with n8n_clients.stream(inst, "/executions", params={**params, "cursor": cursor}) as r:
+            body, cursor = _read_page(r)
+            page = _normalize_executions(body, id_prefix=prefix, instance_id=inst["instance_id"])
+        pages += 1
+        older += page
+        page_ids = [key for key in (sync_checkpoints.id_key(ex["n8n_id"]) for ex in page) if key is not None]
+        if not page_ids or (watermark is not None and min(page_ids) <= watermark):
+            cursor = None
+
+    mark = watermark
+    if cursor is None and target is not None:
+        mark = target if mark is None else max(mark, target)
+    # The head page alone covers everything above the watermark: any gap is moot
+    if head_ids and (mark is None or not next_cursor or min(head_ids) <= mark):
+        mark = max(head_ids) if mark is None else max(mark, max(head_ids))
+        cursor = None
+    update.update(
+        last_execution_id=str(mark) if mark is not None else state["last_execution_id"],
+        catchup_cursor=cursor,
+        catchup_high_id=str(target) if cursor is not None and target is not None else None,
+    )
+    return head, older, update
+
+def sync_once() -> Dict[str, Any]:
+    """Sync workflows and executions from n8n instances to database.
+
+    Per-instance checkpoints (n8n_sync_checkpoints) make this incremental across
+    cycles and restarts: unchanged lists are skipped via ETag / content digest,
+    executions resume from a watermark, and failing instances back off.
+
+    Returns the fetched counts and, under "changed_workflows", the ids of
+    workflows that changed (or whose executions did) grouped by instance prefix.
+    """
     workflows_count = 0
     executions_count = 0
-    db = SessionLocal()
-    
+    changed: Set[str] = set()
+    db = SyncSessionLocal()
+    instances = instance_registry.snapshot()
+    n8n_clients.prune(instances)
+    now = datetime.now(timezone.utc)
     try:
-        # Sync workflows
-        instances = _load_instances()
-        all_workflows: List[Dict[str, Any]] = []
-        for inst in instances:
+        stored = sync_checkpoints.load(db)
+        db.rollback()
+    except Exception:
+        db.rollback()
+        stored = {}
+    states = {inst["instance_id"]: stored.get(inst["instance_id"]) or sync_checkpoints.empty() for inst in instances}
+    # Instances backing off after failures are not contacted (and so not reconciled) this cycle
+    due = [inst for inst in instances if not sync_checkpoints.in_backoff(states[inst["instance_id"]], now)]
+    failed: Set[uuid.UUID] = set()
+
+    try:
+        # Sync workflows; only instances that answered with a changed list are reconciled below
+        fetched_workflows: Dict[uuid.UUID, List[Dict[str, Any]]] = {}
+        workflow_updates: Dict[uuid.UUID, Dict[str, Any]] = {}
+        definitions: Dict[str, bytes] = {}
+        for inst in due:
+            state = states[inst["instance_id"]]
+            headers = {"If-None-Match": state["workflows_etag"]} if state["workflows_etag"] else None
             try:
-                w = requests.get(f"{inst['base_url']}/workflows", headers=n8n_headers(inst["api_key"]), timeout=15)
-                w.raise_for_status()
-                all_workflows += _normalize_workflows(w.json(), id_prefix=f"{inst['prefix']}:")
-            except Exception:
+                with n8n_clients.stream(inst, "/workflows", headers=headers) as w:
+                    if w.status_code == 304:
+                        continue
+                    rows = _normalize_workflows(
+                        _stream_rows(w), id_prefix=f"{inst['prefix']}:", instance_id=inst["instance_id"],
+                        definitions=definitions
+                    )
+                    etag = w.headers.get("etag")
+            except Exception as e:
+                sync_checkpoints.record_failure(state, e, now)
+                failed.add(inst["instance_id"])
                 continue
+            digest = sync_checkpoints.workflows_digest(rows)
+            workflow_updates[inst["instance_id"]] = {"workflows_etag": etag, "workflows_digest": digest}
+            if digest != state["workflows_digest"]:
+                fetched_workflows[inst["instance_id"]] = rows
         
-        _upsert_workflows(db, all_workflows)
+        all_workflows = [wf for rows in fetched_workflows.values() for wf in rows]
+        changed.update(_upsert_workflows(db, all_workflows, definitions))
         workflows_count = len(all_workflows)
         
-        # Get workflow IDs from API and database
-        api_workflow_ids: Set[str] = {str(w["id"]) for w in all_workflows if w.get("id") is not None}
-        db_workflows = db.query(N8NWorkflow).all()
-        db_workflow_ids: Set[str] = {str(wf.id) for wf in db_workflows}
-        
         # Delete stale workflows and related data
-        stale_workflow_ids = list(db_workflow_ids - api_workflow_ids)
-        if stale_workflow_ids:
-            try:
-                # Delete executions for stale workflows
-                db.query(N8NExecution).filter(N8NExecution.workflow_id.in_(stale_workflow_ids)).delete(synchronize_session=False)
-                # Delete workflow access for stale workflows
-                db.query(UserWorkflowAccess).filter(UserWorkflowAccess.workflow_id.in_(stale_workflow_ids)).delete(synchronize_session=False)
-                # Delete stale workflows
-                db.query(N8NWorkflow).filter(N8NWorkflow.id.in_(stale_workflow_ids)).delete(synchronize_session=False)
-                db.commit()
-            except Exception:
-                db.rollback()
+        try:
+            deleted: List[str] = []
+            for instance_id, rows in fetched_workflows.items():
+                deleted += _delete_workflows(db, and_(
+                    N8NWorkflow.instance_id == instance_id,
+                    N8NWorkflow.n8n_id.notin_([wf["n8n_id"] for wf in rows])
+                ))
+            # Data of instances that were removed or deactivated
+            if instance_registry.complete:
+                deleted += _delete_workflows(db, N8NWorkflow.instance_id.notin_([inst["instance_id"] for inst in instances]))
+            db.commit()
+            changed.update(deleted)
+            # Stored and reconciled: the next cycle may skip an identical list
+            for instance_id, update in workflow_updates.items():
+                states[instance_id].update(update)
+        except Exception:
+            db.rollback()
     except Exception:
         db.rollback()
     
     try:
-        # Sync executions
-        instances = _load_instances()
-        all_execs: List[Dict[str, Any]] = []
-        for inst in instances:
+        # Sync executions; only head pages are reconciled (catch-up pages are not contiguous with them)
+        fetched_execs: Dict[uuid.UUID, List[Dict[str, Any]]] = {}
+        older_execs: List[Dict[str, Any]] = []
+        execution_updates: Dict[uuid.UUID, Dict[str, Any]] = {}
+        for inst in due:
+            if inst["instance_id"] in failed:
+                continue
+            state = states[inst["instance_id"]]
             try:
-                e = requests.get(f"{inst['base_url']}/executions", headers=n8n_headers(inst["api_key"]), timeout=15)
-                e.raise_for_status()
-                all_execs += _normalize_executions(e.json(), id_prefix=f"{inst['prefix']}:")
-            except Exception:
+                head, older, update = _fetch_executions(inst, state)
+            except Exception as e:
+                sync_checkpoints.record_failure(state, e, now)
+                failed.add(inst["instance_id"])
                 continue
+            sync_checkpoints.record_success(state, now)
+            if head is not None:
+                fetched_execs[inst["instance_id"]] = head
+            older_execs += older
+            execution_updates[inst["instance_id"]] = update
         
-        _upsert_executions(db, all_execs)
+        all_execs = [ex for rows in fetched_execs.values() for ex in rows] + older_execs
+        _upsert_executions(db, all_execs, refresh_stale_summaries=True, changed_workflow_ids=changed)
         executions_count = len(all_execs)
         
-        # Get execution IDs from API and database
-        api_execution_ids: Set[str] = {str(e["id"]) for e in all_execs if e.get("id") is not None}
-        db_executions = db.query(N8NExecution).all()
-        db_execution_ids: Set[str] = {str(ex.id) for ex in db_executions}
-        
-        # Delete stale executions
-        stale_execution_ids = list(db_execution_ids - api_execution_ids)
-        if stale_execution_ids:
-            try:
-                db.query(N8NExecution).filter(N8NExecution.id.in_(stale_execution_ids)).delete(synchronize_session=False)
-                db.commit()
-            except Exception:
-                db.rollback()
+        # Delete stale executions, per instance and only within the time window the
+        # fetched page covers; older (e.g. backfilled) history is kept.
+        try:
+            affected_workflow_ids: List[str] = []
+            for instance_id, rows in fetched_execs.items():
+                started = [ex["started_at"] for ex in rows if ex["started_at"] is not None]
+                if not started:
+                    continue
+                affected_workflow_ids += change_journal.record_changes(
+                    db,
+                    delete(N8NExecution).where(
+                        N8NExecution.instance_id == instance_id,
+                        N8NExecution.started_at >= min(started),
+                        N8NExecution.n8n_id.notin_([ex["n8n_id"] for ex in rows])
+                    ).returning(N8NExecution.id, N8NExecution.workflow_id),
+                    "execution", "delete"
+                )
+            _refresh_workflow_summaries(db, affected_workflow_ids)
+            change_journal.prune(db)
+            db.commit()
+            changed.update(affected_workflow_ids)
+            for instance_id, update in execution_updates.items():
+                states[instance_id].update(update)
+        except Exception:
+            db.rollback()
+    except Exception:
+        db.rollback()
+    
+    try:
+        # Health is saved even when a phase failed; ETags and watermarks only once their data committed
+        sync_checkpoints.save(
+            db, states, keep=[inst["instance_id"] for inst in instances] if instance_registry.complete else None
+        )
     except Exception:
         db.rollback()
     finally:
         db.close()
     
-    return {"workflows": workflows_count, "executions": executions_count}
-
-
+    return {
+        "workflows": workflows_count,
+        "executions": executions_count,
+        "changed_workflows": _group_by_instance(changed)
+    }
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from ..core.config import N8N_SYNC_INTERVAL_SECONDS, N8N_SYNC_BACKOFF_MAX_SECONDS
+from ..database.models import N8NSyncCheckpoint
+
+# Checkpoint state is handled as plain dicts with these keys (the table's columns)
+FIELDS = (
+    "workflows_etag",
+    "workflows_digest",
+    "executions_etag",
+    "last_execution_id",
+    "catchup_cursor",
+    "catchup_high_id",
+    "consecutive_failures",
+    "next_attempt_at",
+    "last_success_at",
+    "last_error",
+)
+
+
+def empty() -> Dict[str, Any]:
+    state: Dict[str, Any] = dict.fromkeys(FIELDS)
+    state["consecutive_failures"] = 0
+    return state
+
+
+def load(db: Session) -> Dict[uuid.UUID, Dict[str, Any]]:
+    return {
+        row.instance_id: {field: getattr(row, field) for field in FIELDS}
+        for row in db.query(N8NSyncCheckpoint).all()
+    }
+
+
+def save(db: Session, states: Dict[uuid.UUID, Dict[str, Any]], keep: Optional[Iterable[uuid.UUID]] = None):
+    """Upsert the given states in one statement; with ``keep``, drop checkpoints of other instances."""
+    now = datetime.now(timezone.utc)
+    if states:
+        stmt = pg_insert(N8NSyncCheckpoint).values([
+            {"instance_id": instance_id, **{field: state[field] for field in FIELDS}, "updated_at": now}
+            for instance_id, state in states.items()
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[N8NSyncCheckpoint.instance_id],
+            set_={field: stmt.excluded[field] for field in FIELDS + ("updated_at",)},
+        ))
+    if keep is not None:
+        db.query(N8NSyncCheckpoint).filter(
+            N8NSyncCheckpoint.instance_id.notin_(list(keep))
+        ).delete(synchronize_session=False)
+    db.commit()
+
+
+def in_backoff(state: Dict[str, Any], now: datetime) -> bool:
+    return state["next_attempt_at"] is not None and state["next_attempt_at"] > now
+
+
+def record_failure(state: Dict[str, Any], error: Exception, now: datetime):
+    failures = state["consecutive_failures"] + 1
+    delay = min(N8N_SYNC_INTERVAL_SECONDS * 2 ** (failures - 1), N8N_SYNC_BACKOFF_MAX_SECONDS)
+    state.update(
+        consecutive_failures=failures,
+        next_attempt_at=now + timedelta(seconds=delay),
+        last_error=str(error)[:1000],
+    )
+
+
+def record_success(state: Dict[str, Any], now: datetime):
+    state.update(consecutive_failures=0, next_attempt_at=None, last_success_at=now, last_error=None)
+
+
+def workflows_digest(workflows: List[Dict[str, Any]]) -> str:
+    """Digest of everything the workflow upsert writes; equal digests mean the upsert would be a no-op."""
+    rows = sorted(
+        (wf["n8n_id"], wf["name"], wf["active"], wf["n8n_updated_at"].isoformat() if wf["n8n_updated_at"] else None,
+         wf["definition_hash"])
+        for wf in workflows
+    )
+    return hashlib.sha256(json.dumps(rows, separators=(",", ":")).encode()).hexdigest()
+
+
+def id_key(n8n_id: Optional[str]) -> Optional[int]:
+    """n8n execution ids are increasing integers; anything else disables gap tracking."""
+    return int(n8n_id) if n8n_id is not None and n8n_id.isdigit() else None
+
+
+def payload(instance: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    def iso(value):
+        return value.isoformat() if value else None
+
+    return {
+        "prefix": instance["prefix"],
+        "instance_id": str(instance["instance_id"]),
+        "last_execution_id": state["last_execution_id"],
+        "catching_up": state["catchup_cursor"] is not None,
+        "has_workflows_etag": state["workflows_etag"] is not None,
+        "has_executions_etag": state["executions_etag"] is not None,
+        "consecutive_failures": state["consecutive_failures"],
+        "next_attempt_at": iso(state["next_attempt_at"]),
+        "last_success_at": iso(state["last_success_at"]),
+        "last_error": state["last_error"],
+    }
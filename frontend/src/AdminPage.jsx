@@ -1,7 +1,7 @@
 import { useEffect, useMemo, useState } from "react";
 import SidebarLayout from "./SidebarLayout";
 import Loading from "./loading";
-import { apiPath } from "./api";
+import { apiPath, fetchWithRetry } from "./api";
 
 function Section({ title, children }) {
   return (
@@ -51,10 +51,33 @@ function Table({ columns, data, renderRow }) {
   );
 }
 
+// { users, workflows, access } from /admin/workflow-access/matrix → { userId: Set(workflowId) }
+function decodeAccessMatrix(matrix) {
+  const map = {};
+  if (!matrix || !Array.isArray(matrix.users)) return map;
+  matrix.users.forEach((userId, i) => {
+    const granted = new Set();
+    const row = matrix.access[i];
+    if (matrix.encoding === "bitset") {
+      const bytes = atob(row || "");
+      for (let b = 0; b < bytes.length; b++) {
+        const byte = bytes.charCodeAt(b);
+        for (let bit = 0; bit < 8; bit++) {
+          if (byte & (1 << bit)) granted.add(String(matrix.workflows[b * 8 + bit]));
+        }
+      }
+    } else {
+      (row || []).forEach(idx => granted.add(String(matrix.workflows[idx])));
+    }
+    if (granted.size) map[userId] = granted;
+  });
+  return map;
+}
+
 export default function AdminPage() {
   const [users, setUsers] = useState([]);
   const [workflows, setWorkflows] = useState([]);
-  const [access, setAccess] = useState([]);
+  const [userIdToAccess, setUserIdToAccess] = useState({});
   const [logs, setLogs] = useState([]);
   const [instances, setInstances] = useState([]);
   const [activeTab, setActiveTab] = useState("users");
@@ -67,6 +90,8 @@ export default function AdminPage() {
   const [selectedUserId, setSelectedUserId] = useState(null);
   const [userSearch, setUserSearch] = useState("");
   const [workflowSearch, setWorkflowSearch] = useState("");
+  // Ids matched by /workflows/search (ranked, typo-tolerant) for workflowSearch; null until loaded
+  const [workflowSearchIds, setWorkflowSearchIds] = useState(null);
   const [categoryFilter, setCategoryFilter] = useState("all");
   const [accessFilter, setAccessFilter] = useState("all");
   const [accessUpdating, setAccessUpdating] = useState(false);
@@ -79,14 +104,14 @@ export default function AdminPage() {
         const [u, w, a, l, inst, me] = await Promise.all([
           fetch(apiPath("/admin/users"), { credentials: "include" }).then(r => r.json()).catch(() => []),
           fetch(apiPath("/workflows"), { credentials: "include" }).then(r => r.json()).catch(() => []),
-          fetch(apiPath("/admin/workflow-access"), { credentials: "include" }).then(r => r.json()).catch(() => []),
+          fetch(apiPath("/admin/workflow-access/matrix"), { credentials: "include" }).then(r => r.json()).catch(() => null),
           fetch(apiPath("/admin/action-logs"), { credentials: "include" }).then(r => r.json()).catch(() => []),
           fetch(apiPath("/admin/instances"), { credentials: "include" }).then(r => r.json()).catch(() => []),
           fetch(apiPath("/me"), { credentials: "include" }).then(r => r.json()).catch(() => null)
         ]);
         setUsers(Array.isArray(u) ? u : []);
         setWorkflows(Array.isArray(w) ? w : []);
-        setAccess(Array.isArray(a) ? a : []);
+        setUserIdToAccess(decodeAccessMatrix(a));
         setLogs(Array.isArray(l) ? l : []);
         setInstances(Array.isArray(inst) ? inst : []);
         setCurrentUser(me);
@@ -100,21 +125,33 @@ export default function AdminPage() {
     loadAll();
   }, []);
 
+  useEffect(() => {
+    const q = workflowSearch.trim();
+    setWorkflowSearchIds(null);
+    if (!q) return;
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const params = new URLSearchParams({ q, limit: "200" });
+        const res = await fetchWithRetry(apiPath(`/workflows/search?${params.toString()}`), { credentials: "include", signal: controller.signal });
+        // Still limited after the retry: the local substring matches stay in effect
+        if (!res.ok) return;
+        const data = await res.json();
+        if (Array.isArray(data)) setWorkflowSearchIds(new Set(data.map(wf => String(wf.id))));
+      } catch {}
+    }, 150);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [workflowSearch]);
+
   useEffect(() => {
     if (!selectedUserId && users.length > 0) {
       setSelectedUserId(users[0].id);
     }
   }, [users, selectedUserId]);
 
-  const userIdToAccess = useMemo(() => {
-    const map = {};
-    access.forEach(a => {
-      if (!map[a.user_id]) map[a.user_id] = new Set();
-      map[a.user_id].add(String(a.workflow_id));
-    });
-    return map;
-  }, [access]);
-
   const userIdToEmail = useMemo(() => {
     const map = {};
     users.forEach(u => { map[u.id] = u.email; });
@@ -155,7 +192,9 @@ export default function AdminPage() {
       const wfName = String(wf.name || "");
       const category = wfId.includes(":") ? wfId.split(":")[0] : "default";
       const matchesCategory = categoryFilter === "all" || category === categoryFilter;
-      const matchesText = !q || wfName.toLowerCase().includes(q) || wfId.toLowerCase().includes(q);
+      // Substring matches are always kept (bulk grant/revoke acts on every match); the server adds fuzzy ones
+      const matchesText = !q || wfName.toLowerCase().includes(q) || wfId.toLowerCase().includes(q) ||
+        (workflowSearchIds !== null && workflowSearchIds.has(wfId));
       const hasAccess = selectedUserAccess.has(wfId);
       const matchesAccess =
         accessFilter === "all" ||
@@ -163,7 +202,7 @@ export default function AdminPage() {
         (accessFilter === "missing" && !hasAccess);
       return matchesCategory && matchesText && matchesAccess;
     });
-  }, [workflows, workflowSearch, categoryFilter, accessFilter, selectedUserAccess]);
+  }, [workflows, workflowSearch, workflowSearchIds, categoryFilter, accessFilter, selectedUserAccess]);
 
   const groupedWorkflows = useMemo(() => {
     const grouped = {};
@@ -246,16 +285,13 @@ export default function AdminPage() {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         credentials: "include",
-        body: JSON.stringify({ user_id: userId, workflow_ids: workflowIds })
+        body: JSON.stringify({ user_ids: [userId], workflow_ids: workflowIds })
       });
       if (res.ok) {
-        // Merge uniquely
-        setAccess(prev => {
-          const seen = new Set(prev.map(a => `${a.user_id}-${a.workflow_id}`));
-          const additions = workflowIds
-            .filter(id => !seen.has(`${userId}-${id}`))
-            .map(id => ({ user_id: userId, workflow_id: id }));
-          return [...prev, ...additions];
+        setUserIdToAccess(prev => {
+          const granted = new Set(prev[userId] || []);
+          workflowIds.forEach(id => granted.add(String(id)));
+          return { ...prev, [userId]: granted };
         });
       }
     } finally {
@@ -271,10 +307,14 @@ export default function AdminPage() {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         credentials: "include",
-        body: JSON.stringify({ user_id: userId, workflow_ids: workflowIds })
+        body: JSON.stringify({ user_ids: [userId], workflow_ids: workflowIds })
       });
       if (res.ok) {
-        setAccess(prev => prev.filter(a => !(a.user_id === userId && workflowIds.includes(String(a.workflow_id)))));
+        setUserIdToAccess(prev => {
+          const granted = new Set(prev[userId] || []);
+          workflowIds.forEach(id => granted.delete(String(id)));
+          return { ...prev, [userId]: granted };
+        });
       }
     } finally {
       setAccessUpdating(false);
@@ -49,7 +49,8 @@ export default function ExecutionsPage() {
     ws.onmessage = (event) => {
       try {
         const msg = JSON.parse(event.data);
-        if (msg.type === "n8n_sync") fetchData();
+        if (msg.type === "ping") ws.send(JSON.stringify({ action: "pong" }));
+        else if (msg.type === "n8n_sync") fetchData();
       } catch {}
     };
     return () => wsRef.current?.close();
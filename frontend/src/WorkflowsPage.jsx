@@ -1,23 +1,11 @@
 import { useEffect, useMemo, useRef, useState } from "react";
 import SidebarLayout from "./SidebarLayout";
-import { apiPath } from "./api";
-
-// Helper to count executions per workflow
-function getExecutionCounts(executions) {
-  const counts = {};
-  executions.forEach(ex => {
-    const wfId = ex.workflowId || ex.workflow_id;
-    if (!wfId) return;
-    counts[wfId] = (counts[wfId] || 0) + 1;
-  });
-  return counts;
-}
+import { apiPath, fetchWithRetry } from "./api";
 
 
 export default function WorkflowsPage() {
 
   const [workflows, setWorkflows] = useState([]);
-  const [executions, setExecutions] = useState([]);
   const [loading, setLoading] = useState(true);
   const wsRef = useRef(null);
   const [query, setQuery] = useState("");
@@ -25,6 +13,8 @@ export default function WorkflowsPage() {
   const [pageSize, setPageSize] = useState(20);
   const [instances, setInstances] = useState([]);
   const [selectedInstance, setSelectedInstance] = useState("all");
+  // Server-side name search results for the current query (null = no query / not loaded yet)
+  const [searchResults, setSearchResults] = useState(null);
   const instanceMap = useMemo(() => {
     const map = {};
     instances.forEach(i => { map[i.prefix] = i.name || i.prefix; });
@@ -45,24 +35,14 @@ export default function WorkflowsPage() {
     async function fetchData() {
       try {
         const wfParams = new URLSearchParams();
-        wfParams.set("q", query);
         wfParams.set("page", String(page));
         wfParams.set("page_size", String(pageSize));
         const wfRes = await fetch(apiPath(`/workflows?${wfParams.toString()}`), { credentials: "include" });
         const wfData = await wfRes.json();
         const wfItems = Array.isArray(wfData) ? wfData : (wfData.items || wfData.data || []);
         setWorkflows(wfItems);
-
-        const exParams = new URLSearchParams();
-        exParams.set("q", "");
-        exParams.set("page", "1");
-        exParams.set("page_size", "1");
-        const exRes = await fetch(apiPath(`/executions?${exParams.toString()}`), { credentials: "include" });
-        const exData = await exRes.json();
-        setExecutions(Array.isArray(exData) ? exData : (exData.items || exData.data || []));
       } catch (err) {
         setWorkflows([]);
-        setExecutions([]);
       } finally {
         setLoading(false);
       }
@@ -81,7 +61,10 @@ export default function WorkflowsPage() {
     ws.onmessage = (event) => {
       try {
         const msg = JSON.parse(event.data);
-        if (msg.type === "n8n_sync") {
+        if (msg.type === "ping") {
+          // Keeps the socket from being reaped as idle
+          ws.send(JSON.stringify({ action: "pong" }));
+        } else if (msg.type === "n8n_sync") {
           // Refresh lists upon sync notification
           fetchData();
         }
@@ -94,22 +77,51 @@ export default function WorkflowsPage() {
         try { wsRef.current.close(); } catch {}
       }
     };
-  }, [query, page, pageSize]);
+  }, [page, pageSize]);
+
+  // Typeahead: ask /workflows/search (trigram index) instead of filtering the full list locally
+  useEffect(() => {
+    const q = query.trim();
+    if (!q) {
+      setSearchResults(null);
+      return;
+    }
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const params = new URLSearchParams({ q, limit: "200" });
+        if (selectedInstance !== "all") params.set("instance", selectedInstance);
+        const res = await fetchWithRetry(apiPath(`/workflows/search?${params.toString()}`), { credentials: "include", signal: controller.signal });
+        // Still limited after the retry: keep the previous results rather than flashing the local filter
+        if (res.status === 429 || res.status === 503) return;
+        const data = await res.json();
+        setSearchResults(Array.isArray(data) ? data : null);
+      } catch (err) {
+        if (err.name !== "AbortError") setSearchResults(null);
+      }
+    }, 150);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [query, selectedInstance]);
 
   const filtered = useMemo(() => {
     const q = query.trim().toLowerCase();
-    const base = selectedInstance === "all" ? workflows : workflows.filter(w => {
+    const source = q && searchResults ? searchResults : workflows;
+    const base = selectedInstance === "all" ? source : source.filter(w => {
       const wfId = String(w.id || w.workflowId || "");
       const pfx = wfId.includes(":") ? wfId.split(":")[0] : "env";
       return pfx === selectedInstance;
     });
-    if (!q) return base;
+    // Server results are already matched and ranked; local filtering is the fallback while they load
+    if (!q || searchResults) return base;
     return base.filter(w => {
       const name = String(w.name || "").toLowerCase();
       const id = String(w.id || w.workflowId || "").toLowerCase();
       return name.includes(q) || id.includes(q);
     });
-  }, [workflows, query, selectedInstance]);
+  }, [workflows, searchResults, query, selectedInstance]);
 
   // When using server pagination, we use local filtered to support client-side quick search as a fallback
   const total = filtered.length;
@@ -128,7 +140,6 @@ export default function WorkflowsPage() {
     window.location.href = "/";
   };
 
-  const executionCounts = getExecutionCounts(executions);
 
   return (
     <SidebarLayout onLogout={handleLogout}>
@@ -161,6 +172,7 @@ export default function WorkflowsPage() {
               <th style={{ borderBottom: "1px solid #eaeaea", padding: 10, textAlign: "left" }}>Workflow ID</th>
               <th style={{ borderBottom: "1px solid #eaeaea", padding: 10, textAlign: "left" }}>Instance</th>
               <th style={{ borderBottom: "1px solid #eaeaea", padding: 10, textAlign: "left" }}>Active</th>
+              <th style={{ borderBottom: "1px solid #eaeaea", padding: 10, textAlign: "left" }}>Last Run</th>
               <th style={{ borderBottom: "1px solid #eaeaea", padding: 10, textAlign: "left" }}>Execution Count</th>
             </tr>
           </thead>
@@ -189,7 +201,8 @@ export default function WorkflowsPage() {
                       {isActive ? "Active" : "Inactive"}
                     </span>
                   </td>
-                  <td style={{ padding: 10 }}>{executionCounts[wfId] || 0}</td>
+                  <td style={{ padding: 10 }}>{wf.last_status || "-"}</td>
+                  <td style={{ padding: 10 }}>{wf.execution_count || 0}</td>
                 </tr>
               );
             })}
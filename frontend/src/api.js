@@ -9,6 +9,21 @@ export function apiPath(path) {
   return `${API_BASE}${path}`;
 }
 
+// fetch that honours Retry-After once on 429/503 (admission control), e.g. for typeahead requests
+export async function fetchWithRetry(url, options = {}) {
+  const res = await fetch(url, options);
+  if (res.status !== 429 && res.status !== 503) return res;
+  const seconds = Math.min(Number(res.headers.get("Retry-After")) || 1, 5);
+  await new Promise((resolve, reject) => {
+    const timer = setTimeout(resolve, seconds * 1000);
+    options.signal?.addEventListener("abort", () => {
+      clearTimeout(timer);
+      reject(new DOMException("Aborted", "AbortError"));
+    });
+  });
+  return fetch(url, options);
+}
+
 export function wsPath(path) {
   const u = new URL(API_BASE);
   const proto = u.protocol === "https:" ? "wss" : "ws";
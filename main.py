@@ -1,14 +1,28 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
-from typing import Dict
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict
 
-from app.core.config import get_allowed_origins
+from app.core.config import get_allowed_origins, N8N_SYNC_INTERVAL_SECONDS
+from app.core.profiling import ProfilingMiddleware, request_profiler
+from app.core.query_accounting import QueryAccountingMiddleware
+from app.core.readiness import readiness
+from app.database.database import track_queries
 from app.routers import auth as auth_router
 from app.routers import admin as admin_router
 from app.routers import data as data_router
 from app.routers import ws as ws_router
+from app.routers import ingest as ingest_router
+from app.routers import health as health_router
 from app.services import n8n_sync
+from app.services.n8n_client import n8n_clients
+from app.services.audit_log import audit_log
+from app.services.backfill import backfill
+from app.services.archive import archiver
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
@@ -20,26 +34,61 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After", "X-Profile-Id", "X-DB-Queries", "X-DB-Time-Ms", "X-Missing-Segments"],
 )
+app.add_middleware(ProfilingMiddleware)
+# Added last so it wraps the profiler, which reads the request's SQL totals from it
+app.add_middleware(QueryAccountingMiddleware)
 
 # Routers
 app.include_router(auth_router.router)
 app.include_router(admin_router.router)
 app.include_router(data_router.router)
 app.include_router(ws_router.router)
+app.include_router(ingest_router.router)
+app.include_router(health_router.router)
 
 # Background sync loop
 async def _sync_loop():
 	await asyncio.sleep(1)
 	while True:
-		counts: Dict[str, int] = n8n_sync.sync_once()
-		await ws_router.broadcast_to_clients({
-			"type": "n8n_sync",
-			"counts": counts,
-			"timestamp": ""
-		})
-		await asyncio.sleep(15)
+		try:
+			# sync_once is blocking (HTTP + DB); run it in a thread so /healthz, /readyz and WebSockets stay responsive
+			with track_queries("sync_cycle"):
+				counts: Dict[str, Any] = await asyncio.to_thread(n8n_sync.sync_once)
+		except Exception:
+			logger.exception("Sync cycle failed")
+			await asyncio.sleep(N8N_SYNC_INTERVAL_SECONDS)
+			continue
+		readiness.mark_first_sync()
+		changed = counts.pop("changed_workflows", {})
+		# One message per instance that changed, so subscribers of other instances are not woken
+		for prefix, workflow_ids in changed.items():
+			await ws_router.broadcast_to_clients({
+				"type": "n8n_sync",
+				"source": "poll",
+				"instance": prefix,
+				"workflow_ids": workflow_ids,
+				"counts": counts,
+				"timestamp": datetime.now(timezone.utc).isoformat()
+			})
+		await asyncio.sleep(N8N_SYNC_INTERVAL_SECONDS)
 
 @app.on_event("startup")
 async def on_startup():
+	request_profiler.install(asyncio.get_running_loop())
+	readiness.start()
+	audit_log.start()
+	backfill.start()
+	archiver.start()
+	ws_router.broadcaster.start()
 	asyncio.create_task(_sync_loop())
+
+@app.on_event("shutdown")
+async def on_shutdown():
+	await readiness.stop()
+	await ws_router.broadcaster.stop()
+	await archiver.stop()
+	await backfill.stop()
+	await audit_log.stop()
+	n8n_clients.close()
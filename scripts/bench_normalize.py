@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""Micro-benchmark for n8n payload normalization throughput.
+
+Usage: python scripts/bench_normalize.py [rows]
+
+Compares dateutil against the ISO-8601 fast path, and full-body json.loads
+against streamed decoding of the same /executions response. Streaming trades
+CPU for bounded memory; the sync uses it only for unbounded lists.
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dateutil import parser as date_parser  # noqa: E402
+from app.services.json_stream import JsonArrayStream  # noqa: E402
+from app.services.n8n_sync import _normalize_executions, _parse_ts  # noqa: E402
+
+
+def _payload(rows: int) -> bytes:
+    data = [
+        {
+            "id": str(100000 + i),
+            "workflowId": str(i % 250),
+            "finished": i % 7 != 0,
+            "mode": "trigger",
+            "status": "success" if i % 7 else "error",
+            "startedAt": f"2025-03-{(i % 28) + 1:02d}T10:{i % 60:02d}:{(i * 7) % 60:02d}.{i % 1000:03d}Z",
+            "stoppedAt": f"2025-03-{(i % 28) + 1:02d}T10:{i % 60:02d}:{(i * 7 + 3) % 60:02d}.{i % 1000:03d}Z",
+        }
+        for i in range(rows)
+    ]
+    return json.dumps({"data": data, "nextCursor": None}).encode()
+
+
+def _chunks(raw: bytes, size: int = 65536):
+    for i in range(0, len(raw), size):
+        yield raw[i:i + size]
+
+
+def _bench(label: str, fn, rows: int, repeat: int = 3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<40} {best * 1000:9.1f} ms  {rows / best:12,.0f} rows/s")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    raw = _payload(rows)
+    stamps = [ex["startedAt"] for ex in json.loads(raw)["data"]]
+    print(f"{rows:,} executions, {len(raw) / 1e6:.1f} MB payload\n")
+
+    _bench("timestamps: dateutil.parser.parse", lambda: [date_parser.parse(s) for s in stamps], rows)
+    _bench("timestamps: _parse_ts fast path", lambda: [_parse_ts(s) for s in stamps], rows)
+    _bench("normalize: json.loads + normalize", lambda: _normalize_executions(json.loads(raw), "env:"), rows)
+    _bench("normalize: streamed + normalize", lambda: _normalize_executions(JsonArrayStream(_chunks(raw)), "env:"), rows)
+
+
+if __name__ == "__main__":
+    main()
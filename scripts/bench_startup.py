@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""Import-time benchmark for application startup.
+
+Usage: python scripts/bench_startup.py [runs] [top]
+
+Imports ``main`` in fresh interpreters (``python -X importtime``) and
+reports the best wall time over ``runs`` plus the ``top`` slowest
+modules by cumulative import time. No database connection is made:
+engines connect on first use and the warm-up runs only on startup.
+"""
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _import_once():
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return time.perf_counter() - started, result.stderr
+
+
+def _parse(importtime: str):
+    """(cumulative us, module) for every line of -X importtime output."""
+    rows = []
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    return rows
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    # Bytecode is compiled on the first run; that one is not representative
+    _import_once()
+    timings = []
+    report = ""
+    for _ in range(runs):
+        seconds, report = _import_once()
+        timings.append(seconds)
+    rows = _parse(report)
+    main_us = next((us for us, name in rows if name == "main"), 0)
+    print(f"interpreter + import main: best {min(timings) * 1000:.0f} ms, "
+          f"median {sorted(timings)[len(timings) // 2] * 1000:.0f} ms over {runs} runs")
+    print(f"import main (importtime):  {main_us / 1000:.0f} ms\n")
+    print(f"{'cumulative ms':>14}  module")
+    for us, name in sorted(rows, reverse=True)[:top]:
+        print(f"{us / 1000:14.1f}  {name}")
+    lazy = [name for _, name in rows if name.startswith("google")]
+    print("\nOAuth stack imported at startup:" if lazy else "\nOAuth stack not imported at startup.")
+    for name in lazy[:10]:
+        print(f"  {name}")
+
+
+if __name__ == "__main__":
+    main()
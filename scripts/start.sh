@@ -13,15 +13,16 @@ until PGPASSWORD=$DB_PASSWORD psql -h postgres -U $DB_USER -d $DB_NAME -c '\q' 2
 done
 
 echo "PostgreSQL is ready. Running migrations..."
-# Mark migration as applied if tables already exist (from init-db.sql)
-if PGPASSWORD=$DB_PASSWORD psql -h postgres -U $DB_USER -d $DB_NAME -tAc "SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'profiles');" | grep -q t; then
-    echo "Tables already exist from init-db.sql. Stamping migration..."
-    alembic stamp head || true
-else
-    echo "Running migrations..."
-    alembic upgrade head
+# init-db.sql creates the same schema as the initial migration. If it ran first
+# (tables exist but Alembic has never been used), stamp the initial revision so
+# later migrations still get applied.
+if PGPASSWORD=$DB_PASSWORD psql -h postgres -U $DB_USER -d $DB_NAME -tAc "SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'profiles') AND NOT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'alembic_version');" | grep -q t; then
+    echo "Tables already exist from init-db.sql. Stamping initial migration..."
+    alembic stamp 001_initial || true
 fi
+echo "Running migrations..."
+alembic upgrade head
 
 echo "Starting application..."
-exec uvicorn main:app --host 0.0.0.0 --port 4000
+exec uvicorn main:app --host 0.0.0.0 --port 4000 --ws websockets --ws-ping-interval 20 --ws-ping-timeout 20 --ws-per-message-deflate true
 
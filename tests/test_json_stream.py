@@ -0,0 +1,27 @@
+import json
+import pytest
+from app.services.json_stream import JsonArrayStream
+
+DOCUMENTS = [
+    b'[1.5, 2]',
+    b'[12.25, 3]',
+    b'["abc", 1.25]',
+    b'[-0.5e-3, 1E+10, 0, true, null, {"a": [1, 2.0]}]',
+    b'{"data": [{"id": "1", "n": 3.75}, 42], "nextCursor": 12.5}',
+    '[{"name": "café ✓"}, 7]'.encode(),
+]
+
+
+def _chunked(raw: bytes, size: int):
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+@pytest.mark.parametrize("raw", DOCUMENTS)
+def test_every_chunk_size(raw):
+    expected = json.loads(raw)
+    items = expected["data"] if isinstance(expected, dict) else expected
+    for size in range(1, len(raw) + 1):
+        stream = JsonArrayStream(_chunked(raw, size))
+        assert list(stream) == items, size
+        if isinstance(expected, dict):
+            assert stream.extra == {k: v for k, v in expected.items() if k != "data"}, size